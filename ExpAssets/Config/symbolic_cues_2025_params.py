@@ -71,6 +71,15 @@ append_hostname = False
 #########################################
 
 # Opti/movement params #
+opti_storage = 'sqlite'  # where trajectories are recorded: 'sqlite' (klibs db), 'archive' (OptiData/{p_id}.zip), 'stream' (compressed, OptiData/{p_id}.otrj) or 'csv' (OptiData/{p_id}/)
+opti_stream_quantum = None  # step (m) positions are rounded to in 'stream' storage (error at most half of it); None stores them exactly
+opti_ready_timeout = 2000  # ms to wait, once listening, for the first frames of a trial before giving up
+opti_max_frame_gap = 250  # ms without a tracker frame before a trial is aborted (and recycled) as tracking lost
+opti_acquisition_process = False  # run NatNet in its own process, handing frames over via shared memory
+opti_calibration_dir = 'ExpAssets/Resources/calibration'  # tracker-to-screen mappings, cached per station; where present, target touches are also detected by tracker
+opti_calibrate_screen = False  # run screen calibration at startup if this station has no cached calibration
+opti_calibration_model = 'affine'  # 'affine', or 'projective' (corrects keystone, e.g., for an off-axis camera)
+opti_fingertip_set = ''  # marker set (e.g., fingertip rigid body) tested for touches; '' to use the hand's centroid
 marker_count = 10
 window_size = 5  # num frames considered when calculating velocity
 rescale_by = 1000  # rescale values from m to mm
@@ -92,24 +101,9 @@ blocks_per_experiment = 4
 trials_per_cue = 40
 cue_reps_block = 4
 trials_per_block = trials_per_cue * cue_reps_block
-# generate trial sequence, with 40 trials per cue
-# for each cue, divy up trials such that cues' intended
-# probability matches their actual probability (of cuing target)
-trial_list = []
-
-for reliability in cue_types.keys():
-    for laterality in cue_types[reliability].keys():
-        # first number in array represents % of correctly cued trials
-        for _ in range(
-            int(cue_types[reliability][laterality][0] * trials_per_cue)
-        ):
-            trial_list.append((reliability, laterality, True))
-
-        # second num represents invalidly cued trials
-        for _ in range(
-            int(cue_types[reliability][laterality][1] * trials_per_cue)
-        ):
-            trial_list.append((reliability, laterality, False))
+# trial sequences (40 trials per cue, split such that cues' intended probability
+# matches their actual probability of cuing target) are generated by trial_schedule
+max_trial_run = 4  # max consecutive trials of identical cue & validity
 
 # visual params #
 v_offset = 40
@@ -18,7 +18,20 @@ CREATE TABLE trials (
     cue_validity text not null,
     reaction_time text not null,
     movement_time text not null,
-    touched_target text not null
+    touched_target text not null,
+    peak_velocity text not null,
+    peak_velocity_time text not null,
+    peak_acceleration text not null,
+    peak_acceleration_time text not null,
+    path_length text not null,
+    lateral_deviation text not null,
+    reversal_time text not null,
+    frame_rate text not null,
+    dropped_frames text not null,
+    latency_mean text not null,
+    latency_max text not null,
+    tracker_touch text not null,
+    touch_lag text not null
 ) ;
 
 CREATE TABLE cues (
@@ -45,3 +58,15 @@ CREATE TABLE aborts (
     reason text not null,
     recycled text not null
 ) ;
+
+CREATE TABLE trajectories (
+    id integer primary key autoincrement not null,
+    participant_id integer not null references participants(id),
+    block_num integer not null,
+    trial_num integer not null,
+    frame_number integer not null,
+    pos_x real not null,
+    pos_y real not null,
+    pos_z real not null,
+    timestamp real
+) ;
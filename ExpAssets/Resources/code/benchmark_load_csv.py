@@ -0,0 +1,126 @@
+# Benchmarks loading recorded Opti csv files, against the former genfromtxt-based loader
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# NOTE: On PC this is case sensitive (first O is a big O)
+from Optitracker.optitracker.RecordingSinks import load_csv  # type: ignore
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PACKAGE = 'Optitracker' if os.path.isdir(os.path.join(HERE, 'Optitracker')) else 'optitracker'
+
+FIXTURE = os.path.join(
+    HERE, PACKAGE, 'optitracker', 'tests', 'recorded_opti_files',
+    'gripaperture_trial_handmarkers.csv',
+)
+
+
+def genfromtxt_load_csv(path):
+    """Loads a csv file as load_csv did formerly: every column, via genfromtxt."""
+    with open(path, 'r') as file:
+        header = file.readline().strip().split(',')
+
+    dtype_map = [
+        (
+            name,
+            (
+                'f8'
+                if name in ['pos_x', 'pos_y', 'pos_z', 'timestamp']
+                else 'i8'
+                if name == 'frame_number'
+                else 'U32'
+            ),
+        )
+        for name in header
+    ]
+    return np.atleast_1d(
+        np.genfromtxt(path, delimiter=',', dtype=dtype_map, skip_header=1)
+    )
+
+
+def scaled_fixture(path, rows, truncated=False):
+    """Writes the fixture, repeated (with frames renumbered) up to rows rows.
+
+    If truncated, a final row is cut short, as left by an interrupted recording.
+
+    """
+    with open(FIXTURE, 'r') as file:
+        header = file.readline()
+        lines = [line.rstrip('\n').rsplit(',', 1) for line in file if line.strip()]
+
+    first = int(lines[0][1])
+    span = int(lines[-1][1]) - first + 1
+
+    with open(path, 'w') as file:
+        file.write(header)
+        for i in range(rows):
+            repeat, index = divmod(i, len(lines))
+            prefix, frame = lines[index]
+            file.write(f'{prefix},{int(frame) + repeat * span}\n')
+        if truncated:
+            file.write(lines[0][0][:20])
+
+
+def time_loader(loader, path, runs):
+    """Returns load times (in s) over runs, and the rows loaded."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        frames = loader(path)
+        times.append(time.perf_counter() - start)
+    return times, len(frames)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark load_csv against genfromtxt on scaled-up recordings.'
+    )
+    parser.add_argument(
+        '--rows', type=int, nargs='+', default=[2_700, 100_000, 1_000_000],
+        help='row counts of files to benchmark',
+    )
+    parser.add_argument('--runs', type=int, default=3, help='loads per file & loader')
+    parser.add_argument(
+        '--truncated', action='store_true',
+        help='cut the final row of each file short, as an interrupted recording would',
+    )
+    args = parser.parse_args(argv)
+
+    loaders = {'genfromtxt (former)': genfromtxt_load_csv, 'load_csv': load_csv}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, f'{rows}.csv')
+            scaled_fixture(path, rows, args.truncated)
+            print(f'{rows} rows ({os.path.getsize(path) / 1e6:.1f} MB):')
+
+            medians = {}
+            for label, loader in loaders.items():
+                try:
+                    times, loaded = time_loader(loader, path, args.runs)
+                except ValueError as error:
+                    print(f'    {label:>20}: failed ({error})')
+                    continue
+                medians[label] = statistics.median(times)
+                print(
+                    f'    {label:>20}: median {medians[label] * 1000:9.1f} ms, '
+                    f'{loaded} rows'
+                )
+
+            if len(medians) == len(loaders):
+                speedup = medians['genfromtxt (former)'] / medians['load_csv']
+                print(f'    {"speedup":>20}: {speedup:.1f}x')
+            print()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,273 @@
+# Exports trials & aborts from the klibs database, joined with per-trial kinematics from OptiData
+import argparse
+import csv
+import heapq
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import groupby
+
+# NOTE: On PC this is case sensitive (first O is a big O)
+from Optitracker.optitracker.RecordingSinks import (  # type: ignore
+    SQLiteSink,
+    as_frames,
+    load_csv,
+)
+from Optitracker.optitracker.TrajectoryCodec import TrajectoryReader  # type: ignore
+from Optitracker.optitracker.TrialArchive import TrialArchive  # type: ignore
+
+from optidata import participant_sources, trial_files
+from process_optidata import bounded_map, trial_kinematics
+
+
+PARTICIPANT_COLS = ['sex', 'age', 'handedness']
+
+ABORT_COLS = ['reason', 'recycled']
+
+KINEMATIC_COLS = [
+    'frame_count', 'peak_velocity', 'peak_velocity_time', 'peak_acceleration',
+    'peak_acceleration_time', 'path_length', 'lateral_deviation', 'reversal_time',
+]
+
+
+def table_columns(connection, table):
+    """Returns the names of a table's columns, in order (none if it doesn't exist)."""
+    return [row[1] for row in connection.execute(f'PRAGMA table_info({table})')]
+
+
+def export_columns(connection):
+    """Returns the columns of the exported dataset.
+
+    Trials' columns come first, then how (and whether) the trial was aborted, then
+    kinematics recomputed from its trajectory (prefixed 'opti_', so as not to
+    clash with those recorded online).
+
+    """
+    trial_cols = [
+        col for col in table_columns(connection, 'trials')
+        if col not in ['id', 'participant_id']
+    ]
+    return (
+        ['participant_id'] + PARTICIPANT_COLS + trial_cols
+        + [f'abort_{col}' for col in ABORT_COLS]
+        + ['opti_source'] + [f'opti_{col}' for col in KINEMATIC_COLS]
+    )
+
+
+class TrajectoryStore(object):
+    """Finds a participant's recorded trials, wherever their trajectories were stored.
+
+    Trajectories are looked for in the participant's OptiData stream, archive or
+    csv files (see participant_sources), then in the database's trajectory table.
+
+    """
+
+    def __init__(self, connection, database, source):
+        self.database = database
+        self.source = source
+        self.__sink = None
+
+        # (block_num, trial_num) -> where the trial's frames are kept
+        self.__trials = {}
+        if source is None:
+            self.__recorded = bool(table_columns(connection, 'trajectories'))
+            return
+
+        if source.endswith('.otrj'):
+            self.__reader = TrajectoryReader(source)
+            for entry in self.__reader.index():
+                self.__trials[(entry['block_num'], entry['trial_num'])] = entry['offset']
+        elif source.endswith('.zip'):
+            self.__reader = TrialArchive(source)
+            for entry in self.__reader.index():
+                self.__trials[(entry['block_num'], entry['trial_num'])] = None
+        else:
+            # trials are identified by parsing csv file names
+            for path, info in trial_files(source):
+                self.__trials[(info['block_num'], info['trial_num'])] = path
+
+    @property
+    def kind(self):
+        if self.source is None:
+            return 'sqlite'
+        if self.source.endswith('.otrj'):
+            return 'stream'
+        return 'archive' if self.source.endswith('.zip') else 'csv'
+
+    def read(self, participant_id, block_num, trial_num):
+        """Returns the trial's marker rows, or None if it wasn't recorded."""
+        if self.source is None:
+            if not self.__recorded:
+                return None
+            if self.__sink is None:
+                self.__sink = SQLiteSink(self.database)
+            frames = self.__sink.read(participant_id, block_num, trial_num)
+            return frames if len(frames) else None
+
+        key = (block_num, trial_num)
+        if key not in self.__trials:
+            return None
+
+        if self.source.endswith('.otrj'):
+            frames = self.__reader.read(self.__trials[key])
+        elif self.source.endswith('.zip'):
+            frames = self.__reader.read(block_num, trial_num)
+        else:
+            frames = load_csv(self.__trials[key])
+        return as_frames(frames)
+
+    def close(self):
+        if self.__sink is not None:
+            self.__sink.close()
+
+
+def is_recycled(abort):
+    """Returns whether an abort was recycled (klibs stores booleans as text)."""
+    return str(abort['recycled']).lower() in ['true', '1']
+
+
+def joined_rows(connection, participant_id):
+    """Yields a participant's trials, each merged with any abort of the same trial.
+
+    Trials and aborts are both streamed in trial order and merged as they come, so
+    only one trial number is held at a time. A trial is joined with its
+    (non-recycled) abort; recycled aborts, i.e., attempts that were run again
+    later, are yielded on their own, ahead of the attempt sharing their number.
+
+    """
+    trial_cols = table_columns(connection, 'trials')
+    abort_cols = table_columns(connection, 'aborts')
+    order = 'WHERE participant_id = ? ORDER BY block_num, trial_num, id'
+
+    trials = connection.execute(f'SELECT * FROM trials {order}', (participant_id,))
+    aborts = connection.execute(f'SELECT * FROM aborts {order}', (participant_id,))
+
+    def keyed(rows, cols, is_abort):
+        for row in rows:
+            row = dict(zip(cols, row))
+            yield row['block_num'], row['trial_num'], is_abort, row
+
+    def with_abort(row, abort):
+        return dict(row, **{f'abort_{col}': abort[col] for col in ABORT_COLS})
+
+    merged = heapq.merge(
+        keyed(trials, trial_cols, False),
+        keyed(aborts, abort_cols, True),
+        key=lambda item: item[:3],
+    )
+    for _, group in groupby(merged, key=lambda item: item[:2]):
+        trial_rows, abort_rows = [], []
+        for _, _, is_abort, row in group:
+            (abort_rows if is_abort else trial_rows).append(row)
+
+        # each completed trial takes up one of the aborts not recycled
+        joinable = [abort for abort in abort_rows if not is_recycled(abort)]
+        joined = [
+            with_abort(trial, joinable.pop(0)) if joinable else trial
+            for trial in trial_rows
+        ]
+        for abort in abort_rows:
+            if is_recycled(abort) or abort in joinable:
+                yield with_abort(abort, abort)
+        yield from joined
+
+
+def export_participant(task, database, columns, **kinematics_args):
+    """Exports a single participant's trials (run within a worker process).
+
+    Returns:
+        list: The participant's rows (dicts), in trial order.
+
+    """
+    participant_id, details, source = task
+
+    connection = sqlite3.connect(f'file:{database}?mode=ro', uri=True)
+    store = TrajectoryStore(connection, database, source)
+    rows = []
+    try:
+        for joined in joined_rows(connection, participant_id):
+            row = {col: joined.get(col, 'NA') for col in columns}
+            row.update(details, participant_id=participant_id)
+
+            frames = store.read(participant_id, joined['block_num'], joined['trial_num'])
+            if frames is not None:
+                positions, _, features = trial_kinematics(frames, **kinematics_args)
+                features['frame_count'] = len(positions)
+                row['opti_source'] = store.kind
+                row.update({f'opti_{col}': features[col] for col in KINEMATIC_COLS})
+
+            rows.append(row)
+    finally:
+        store.close()
+        connection.close()
+
+    return rows
+
+
+def participant_tasks(connection, opti_data):
+    """Yields a (participant_id, details, trajectory source) task per participant."""
+    sources = {}
+    if os.path.isdir(opti_data):
+        sources = dict(participant_sources(opti_data))
+
+    cursor = connection.execute(
+        f'SELECT id, {", ".join(PARTICIPANT_COLS)} FROM participants ORDER BY id'
+    )
+    for participant_id, *details in cursor:
+        yield (
+            participant_id,
+            dict(zip(PARTICIPANT_COLS, details)),
+            sources.get(str(participant_id)),
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Export trials & aborts joined with per-trial OptiData kinematics.'
+    )
+    parser.add_argument('database', nargs='?', default='ExpAssets/symbolic_cues_2025.db')
+    parser.add_argument('--opti-data', default='OptiData')
+    parser.add_argument('--out', default='export.csv')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--marker-count', type=int, default=10)
+    parser.add_argument('--rescale-by', type=float, default=1000)
+    parser.add_argument('--sample-rate', type=int, default=120)
+    parser.add_argument('--window-size', type=int, default=5)
+    parser.add_argument('--primary-axis', default='z')
+    args = parser.parse_args(argv)
+
+    connection = sqlite3.connect(f'file:{args.database}?mode=ro', uri=True)
+    columns = export_columns(connection)
+
+    worker = partial(
+        export_participant,
+        database=args.database,
+        columns=columns,
+        marker_count=args.marker_count,
+        rescale_by=args.rescale_by,
+        sample_rate=args.sample_rate,
+        window_size=args.window_size,
+        primary_axis=args.primary_axis,
+    )
+
+    row_count = 0
+    with open(args.out, 'w', newline='') as out_file, ProcessPoolExecutor(
+        max_workers=args.workers
+    ) as executor:
+        out = csv.DictWriter(out_file, fieldnames=columns)
+        out.writeheader()
+
+        tasks = participant_tasks(connection, args.opti_data)
+        for rows in bounded_map(executor, worker, tasks, 2 * args.workers):
+            out.writerows(rows)
+            row_count += len(rows)
+
+    connection.close()
+    print(f'Exported {row_count} trials')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# Converts per-trial OptiData csv files (or trajectories recorded to the klibs database)
+# into per-participant TrialArchives (or compressed streams)
+import argparse
+import os
+import sys
+from functools import partial
+
+# NOTE: On PC this is case sensitive (first O is a big O)
+from Optitracker.optitracker.RecordingSinks import (  # type: ignore
+    SQLiteSink,
+    as_frames,
+    load_csv,
+)
+from Optitracker.optitracker.TrajectoryCodec import (  # type: ignore
+    TrajectoryReader,
+    TrajectoryWriter,
+)
+from Optitracker.optitracker.TrialArchive import TrialArchive  # type: ignore
+
+from optidata import database_trials, participant_sources, trial_files
+
+
+def participant_trials(source, participant_id=None):
+    """Yields (trial details, load) for each of a participant's recorded trials.
+
+    Source is either the participant's directory of csv files or, given their
+    participant_id, the klibs database; load() returns the trial's marker rows.
+
+    """
+    if source.endswith('.db'):
+        sink = SQLiteSink(source)
+        try:
+            for info in database_trials(source, participant_id):
+                del info['participant_id']  # archives & streams are per participant
+                yield info, partial(
+                    sink.read, participant_id, info['block_num'], info['trial_num']
+                )
+        finally:
+            sink.close()
+    else:
+        for path, info in trial_files(source):
+            yield info, partial(load_csv, path)
+
+
+def migrate_participant(source, archive_path, participant_id=None):
+    """Appends all of a participant's trials to their archive.
+
+    Trials already present in the archive are skipped, so an interrupted migration
+    can simply be re-run.
+
+    Returns:
+        int: The number of trials added to the archive.
+
+    """
+    archive = TrialArchive(archive_path)
+    added = 0
+    for info, load in participant_trials(source, participant_id):
+        name = TrialArchive.trial_name(info['block_num'], info['trial_num'])
+        if name in archive:
+            continue
+        archive.append(as_frames(load()), **info)
+        added += 1
+    return added
+
+
+def stream_participant(source, stream_path, quantum=None, participant_id=None):
+    """Appends all of a participant's trials to their compressed stream.
+
+    As with migrate_participant(), trials already present in the stream are
+    skipped.
+
+    Returns:
+        int: The number of trials added to the stream.
+
+    """
+    present = set()
+    if os.path.exists(stream_path):
+        present = {
+            (entry['block_num'], entry['trial_num'])
+            for entry in TrajectoryReader(stream_path).index()
+        }
+
+    added = 0
+    with TrajectoryWriter(stream_path, quantum=quantum) as stream:
+        for info, load in participant_trials(source, participant_id):
+            if (info['block_num'], info['trial_num']) in present:
+                continue
+            stream.write(as_frames(load()), **info)
+            added += 1
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            'Migrate OptiData/{p_id}/ csv files (or trajectories in the klibs database) '
+            'to OptiData/{p_id}.zip archives (or .otrj streams).'
+        )
+    )
+    parser.add_argument('opti_data', nargs='?', default='OptiData')
+    parser.add_argument(
+        '--database', default='ExpAssets/symbolic_cues_2025.db',
+        help='klibs database, for trajectories recorded to it',
+    )
+    parser.add_argument(
+        '--stream', action='store_true',
+        help='write compressed OptiData/{p_id}.otrj streams instead of archives',
+    )
+    parser.add_argument(
+        '--quantum', type=float, default=None,
+        help='step (m) to round positions to in streams (default: exact)',
+    )
+    args = parser.parse_args(argv)
+
+    # participants recorded to the database (and nowhere else) are archived too
+    tasks = [
+        (p_id, source)
+        for p_id, source in participant_sources(args.opti_data, args.database)
+        if os.path.isdir(source) or source.endswith('.db')
+    ]
+    os.makedirs(args.opti_data, exist_ok=True)
+
+    for p_id, source in tasks:
+        participant_id = int(p_id) if source.endswith('.db') else None
+        path = os.path.join(args.opti_data, p_id)
+        if args.stream:
+            added = stream_participant(
+                source, path + '.otrj', args.quantum, participant_id
+            )
+        else:
+            added = migrate_participant(source, path + '.zip', participant_id)
+        print(f'{p_id}: archived {added} trials')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
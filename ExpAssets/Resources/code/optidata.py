@@ -0,0 +1,132 @@
+# Helpers for locating recorded OptiData trials
+import os
+import re
+import sqlite3
+from contextlib import closing
+
+
+TRIAL_FILE = re.compile(
+    r'^Block_(?P<block_num>\d+)_Trial_(?P<trial_num>\d+)'
+    r'_(?P<cue_reliability>[^_]+)_(?P<cue_laterality>[^_]+)_(?P<cue_validity>[^_]+)'
+    r'(?P<practicing>_PRACTICE)?\.csv$'
+)
+
+
+def parse_trial_file(name):
+    """Parses trial details from the name of a recorded OptiData file.
+
+    Args:
+        name (str): File name, e.g. 'Block_2_Trial_14_high_left_True.csv'.
+
+    Returns:
+        dict or None: block_num, trial_num, cue_reliability, cue_laterality,
+        cue_validity and practicing, or None if the name isn't a trial file.
+
+    """
+    match = TRIAL_FILE.match(name)
+    if match is None:
+        return None
+
+    info = match.groupdict()
+    info['block_num'] = int(info['block_num'])
+    info['trial_num'] = int(info['trial_num'])
+    info['practicing'] = info['practicing'] is not None
+    return info
+
+
+def trial_files(participant_dir):
+    """Yields (path, trial details) for each trial file of a participant.
+
+    Files may sit directly within the participant's directory (as written by the
+    experiment) or within per-block subdirectories.
+
+    """
+    for root, _, files in os.walk(participant_dir):
+        for name in sorted(files):
+            info = parse_trial_file(name)
+            if info is not None:
+                yield os.path.join(root, name), info
+
+
+def participant_sources(opti_data, database=None):
+    """Yields (p_id, source) for each participant's recordings in OptiData.
+
+    Sources are either a directory of per-trial csv files, a per-participant
+    archive ('{p_id}.zip') or a per-participant compressed stream ('{p_id}.otrj').
+    Where several exist, the stream is preferred, then the archive.
+
+    Given the klibs database, participants recorded to it (P.opti_storage =
+    'sqlite') but not in OptiData are yielded too, with the database as source;
+    their p_id is their participant_id.
+
+    """
+    entries = sorted(os.listdir(opti_data)) if os.path.isdir(opti_data) else []
+    streams = {name[:-5] for name in entries if name.endswith('.otrj')}
+    archives = {name[:-4] for name in entries if name.endswith('.zip')}
+    for name in entries:
+        path = os.path.join(opti_data, name)
+        if name.endswith('.otrj'):
+            yield name[:-5], path
+        elif name.endswith('.zip') and name[:-4] not in streams:
+            yield name[:-4], path
+        elif os.path.isdir(path) and name not in archives | streams:
+            yield name, path
+
+    if database is None or not os.path.exists(database):
+        return
+
+    recorded = {name.split('.')[0] for name in entries}
+    with closing(_connect(database)) as connection:
+        if not _has_trajectories(connection):
+            return
+        cursor = connection.execute(
+            'SELECT DISTINCT participant_id FROM trajectories ORDER BY participant_id'
+        )
+        participant_ids = [row[0] for row in cursor]
+
+    for participant_id in participant_ids:
+        if str(participant_id) not in recorded:
+            yield str(participant_id), database
+
+
+def database_trials(database, participant_id):
+    """Yields the details of each of a participant's trials in the klibs database.
+
+    Trials are those with trajectories recorded to the database, joined with their
+    (completed) trial's cue details where present.
+
+    Yields:
+        dict: participant_id, block_num, trial_num, practicing, cue_reliability,
+        cue_laterality and cue_validity ('NA' for trials never completed).
+
+    """
+    with closing(_connect(database)) as connection:
+        if not _has_trajectories(connection):
+            return
+        cursor = connection.execute(
+            'SELECT r.block_num, r.trial_num, t.practicing, t.cue_reliability, '
+            't.cue_laterality, t.cue_validity '
+            'FROM (SELECT DISTINCT participant_id, block_num, trial_num '
+            '      FROM trajectories WHERE participant_id = ?) AS r '
+            'LEFT JOIN trials AS t USING (participant_id, block_num, trial_num) '
+            'GROUP BY r.block_num, r.trial_num ORDER BY r.block_num, r.trial_num',
+            (participant_id,),
+        )
+        cols = [col[0] for col in cursor.description]
+        rows = cursor.fetchall()
+
+    for row in rows:
+        info = {col: 'NA' if value is None else value for col, value in zip(cols, row)}
+        yield dict(info, participant_id=participant_id)
+
+
+def _connect(database):
+    # read only: the offline tools never write to the klibs database
+    return sqlite3.connect(f'file:{database}?mode=ro', uri=True)
+
+
+def _has_trajectories(connection):
+    cursor = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trajectories'"
+    )
+    return cursor.fetchone() is not None
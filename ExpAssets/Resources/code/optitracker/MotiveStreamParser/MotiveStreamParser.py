@@ -4,6 +4,8 @@ from ..MotiveStreamParser.MotivePacketStructures import packet_structs as struct
 
 from typing import Container
 
+import numpy as np
+
 
 class MotiveStreamParser(object):
     def __init__(self, stream: bytes):
@@ -45,6 +47,15 @@ class MotiveStreamParser(object):
         self.seek(my_size)
         return (label, my_size)
 
+    def markers(self, marker_count: int) -> tuple[np.ndarray, int]:
+        # decode a run of unlabeled markers in one go, as (marker_count, 3) floats
+        my_size = self.size("unlabeled_marker", marker_count)
+        positions = np.frombuffer(
+            self.__stream, dtype="<f4", count=marker_count * 3, offset=self.__offset
+        ).reshape(marker_count, 3)
+        self.seek(my_size)
+        return (positions, my_size)
+
     def struct(self, asset: str) -> tuple[Container, int]:
         if asset == "count":
             raise ValueError("Use count() method to parse count struct")
@@ -20,6 +20,8 @@ import time
 from threading import Thread
 from typing import Any, Callable
 
+import numpy as np
+
 from ..MotiveStreamParser.MotiveStreamParser import MotiveStreamParser as Parser
 
 
@@ -41,6 +43,38 @@ def trace_mf(*args):
     # print(''.join(map(str, args)))
 
 
+# marker rows as handed to the marker listener
+MARKER_DTYPE = [
+    ('frame_number', 'i8'),
+    ('pos_x', 'f8'),
+    ('pos_y', 'f8'),
+    ('pos_z', 'f8'),
+    ('timestamp', 'f8'),
+]
+
+# frame suffix, which ends each frame of data (NatNet 4.1+): timecode & subframe,
+# timestamp (s), camera mid-exposure, data received & transmit stamps (clock ticks),
+# precision timestamp (s & fraction), params & end-of-data tag
+FRAME_SUFFIX = struct.Struct('<IIdqqqIIhi')
+
+# earlier layouts of the suffix, by the NatNet version introducing them: stamps
+# came with 3.0, and the timestamp became a double with 2.7 (before which the
+# suffix isn't read)
+FRAME_SUFFIXES = [
+    ((4, 1), FRAME_SUFFIX),
+    ((3, 0), struct.Struct('<IIdqqqhi')),
+    ((2, 7), struct.Struct('<IIdhi')),
+]
+
+
+def frame_suffix(version) -> struct.Struct | None:
+    """Return the frame suffix layout of a NatNet version, if timestamps are read."""
+    for introduced, suffix in FRAME_SUFFIXES:
+        if tuple(version[:2]) >= introduced:
+            return suffix
+    return None
+
+
 def get_message_id(bytestream: bytes) -> int:
     message_id = int.from_bytes(bytestream[0:2], byteorder='little')
     return message_id
@@ -76,11 +110,15 @@ class NatNetClient:
             'is_locked': False,
             # Server has the ability to change bitstream version
             'can_change_bitstream_version': False,
+            # Ticks per second of the server's high resolution clock. This will be updated during initialization.
+            'clock_frequency': 0,
         }
 
         self.settings.update(instance_settings)
 
         self.marker_listener = None
+        # labels of marker sets passed to marker_listener (None for all sets)
+        self.marker_labels = None
 
         self.listeners = {
             'prefix': None,
@@ -121,8 +159,28 @@ class NatNetClient:
             'NAT_UNDEFINED': 999999.9999,
         }
 
+    def __unpack_suffix(self, stream: bytes) -> tuple[float | None, float | None]:
+        # suffix sits at a fixed offset from the end of the frame, so it's read first;
+        # its layout depends on the stream's version (neither is known before 2.7)
+        suffix = frame_suffix(self.settings['server_stream_version'])
+        if suffix is None:
+            return None, None
+
+        fields = suffix.unpack_from(stream, len(stream) - suffix.size)
+        timestamp = fields[2]
+
+        # time from mid-exposure to transmission by Motive (3.0+)
+        latency = None
+        if len(fields) > 5 and self.settings['clock_frequency'] > 0:
+            mid_exposure, _, transmit = fields[3:6]
+            latency = (transmit - mid_exposure) / self.settings['clock_frequency']
+
+        return timestamp, latency
+
     def __unpack_data(self, stream: bytes) -> int:
         # print("__unpack_data")
+        timestamp, latency = self.__unpack_suffix(stream)
+
         parse = Parser(stream=stream)
         frame_number, _ = parse.frame_number()
 
@@ -130,26 +188,38 @@ class NatNetClient:
         _, _ = parse.bytelen()
 
         # TODO: Pointer() might aide skipping
+        # single pass over all marker sets; sets not listened for are skipped over
         for _ in range(0, n_marker_sets):
             set_label, _ = parse.label()
 
-            marker_set = {'label': set_label, 'markers': []}
-
             n_markers_in_set, _ = parse.count()
 
             # if self.listeners['marker'] is not None:
-            if self.marker_listener is not None:
-                for _ in range(n_markers_in_set):
-                    marker, _ = parse.struct('unlabeled_marker')
-                    marker['frame_number'] = frame_number  # type: ignore
-                    marker_set['markers'].append(marker)
+            if self.marker_listener is not None and (
+                self.marker_labels is None or set_label in self.marker_labels
+            ):
+                positions, _ = parse.markers(n_markers_in_set)
+
+                markers = np.empty(n_markers_in_set, dtype=MARKER_DTYPE)
+                markers['frame_number'] = frame_number
+                markers['pos_x'] = positions[:, 0]
+                markers['pos_y'] = positions[:, 1]
+                markers['pos_z'] = positions[:, 2]
+                markers['timestamp'] = timestamp
 
                 # self.listeners['marker'](marker_set)
-                # print("__unpack | callback")
-                self.marker_listener(marker_set)
+                self.marker_listener(
+                    {
+                        'label': set_label,
+                        'frame_number': frame_number,
+                        'markers': markers,
+                        'timestamp': timestamp,
+                        'latency': latency,
+                    }
+                )
 
             else:
-                parse.seek(by=parse.size('marker', n_markers_in_set))
+                parse.seek(by=parse.size('unlabeled_marker', n_markers_in_set))
 
         n_rigid_bodies, _ = parse.count()
         _, _ = parse.bytelen()
@@ -225,6 +295,12 @@ class NatNetClient:
                 and not self.settings['use_multicast']
             )
 
+        # High resolution clock frequency (for converting frame suffix stamps)
+        if len(bytestream) >= offset + 272:
+            self.settings['clock_frequency'] = int.from_bytes(
+                bytestream[offset + 264 : offset + 272], byteorder='little'
+            )
+
         trace_mf(
             f"Sending Application Name: {self.settings['application_name']}"
         )
@@ -412,7 +488,7 @@ class NatNetClient:
         # skip the 4 bytes for message ID and packet_size
         offset = 4
         if message_id == self.message_ids['NAT_FRAMEOFDATA']:
-            offset += self.__unpack_data(bytestream[offset:])
+            offset += self.__unpack_data(bytestream[offset : offset + packet_size])
 
         elif message_id == self.message_ids['NAT_MODELDEF']:
             pass
@@ -0,0 +1,145 @@
+import multiprocessing
+import time
+
+from .SharedRing import SharedRing
+
+
+def _acquire(ring_name, labels, frame_arrived, ready, stop, started) -> None:
+    """Run a NatNet client, publishing marker sets to a shared ring until stopped.
+
+    Target of the acquisition process; NatNet's threads are the only ones in it, so
+    packet handling is never held up by the experiment's GIL.
+    """
+    from ..NatNetClient.NatNetClient import NatNetClient
+
+    ring = SharedRing(name=ring_name)
+    set_indices = {label: index for index, label in enumerate(labels)}
+
+    def publish(frames):
+        # perf_counter() is system-wide, so readers can compare against it
+        received = time.perf_counter()
+        set_index = set_indices.get(frames.get('label'))
+        if set_index is None:
+            return
+
+        markers = frames.get('markers', [])
+        frame_number = frames.get('frame_number')
+        if frame_number is None:
+            if len(markers) == 0:
+                return
+            frame_number = int(markers[0]['frame_number'])
+
+        ring.write(
+            set_index,
+            frame_number,
+            markers,
+            frames.get('timestamp'),
+            frames.get('latency'),
+            received,
+        )
+        with frame_arrived:
+            frame_arrived.notify_all()
+
+    natnet = NatNetClient()
+    natnet.marker_labels = set(labels)
+    natnet.marker_listener = publish
+
+    started.value = natnet.startup()
+    ready.set()
+
+    if started.value:
+        stop.wait()
+        natnet.shutdown()
+
+    ring.close()
+
+
+class Acquisition(object):
+    """NatNet acquisition in a separate process, publishing to a SharedRing.
+
+    The process streams continuously once started; readers in the experiment
+    process follow the ring from wherever they begin, and wait on frame_arrived
+    for new messages.
+
+    Attributes:
+        labels (tuple): Labels of marker sets published, indexed by slot set_index
+        ring (SharedRing): Ring the process publishes to (owned by this process)
+    """
+
+    def __init__(self, labels, max_markers: int, capacity: int = 8192):
+        """Initialize the Acquisition object (the process is started by start()).
+
+        Args:
+            labels (list): Labels of marker sets to publish; slots refer to them by
+                index
+            max_markers (int): Markers held per slot
+            capacity (int, optional): Number of slots in the ring. Defaults to 8192.
+        """
+        self.labels = tuple(labels)
+        self.ring = SharedRing(max_markers, capacity)
+
+        self.__frame_arrived = multiprocessing.Condition()
+        self.__ready = multiprocessing.Event()
+        self.__stop = multiprocessing.Event()
+        self.__started = multiprocessing.Value('b', False)
+        self.__process = None
+
+    def start(self, timeout: float = 10.0) -> bool:
+        """Launch the acquisition process (if not already running).
+
+        Args:
+            timeout (float, optional): Maximum time to wait for the NatNet client to
+                start up, in seconds. Defaults to 10.0.
+
+        Returns:
+            bool: True if the NatNet client is running
+        """
+        if self.__process is None:
+            self.__process = multiprocessing.Process(
+                target=_acquire,
+                args=(
+                    self.ring.name,
+                    self.labels,
+                    self.__frame_arrived,
+                    self.__ready,
+                    self.__stop,
+                    self.__started,
+                ),
+                daemon=True,
+            )
+            self.__process.start()
+
+        self.__ready.wait(timeout)
+        return bool(self.__started.value)
+
+    def wait(self, cursor: int, timeout: float | None = None) -> bool:
+        """Block until a message at or after cursor has been published.
+
+        Args:
+            cursor (int): Index of the next message the caller will read
+            timeout (float, optional): Maximum time to wait, in seconds. Defaults to
+                None (wait indefinitely).
+
+        Returns:
+            bool: True if a message is waiting, False if timed out
+        """
+        with self.__frame_arrived:
+            return self.__frame_arrived.wait_for(
+                lambda: self.ring.written > cursor, timeout
+            )
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the acquisition process, and free the ring.
+
+        Args:
+            timeout (float, optional): Maximum time to wait for the process to shut
+                down NatNet and exit, in seconds. Defaults to 5.0.
+        """
+        if self.__process is not None:
+            self.__stop.set()
+            self.__process.join(timeout)
+            if self.__process.is_alive():
+                self.__process.terminate()
+            self.__process = None
+
+        self.ring.close()
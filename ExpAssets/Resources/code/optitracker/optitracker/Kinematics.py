@@ -0,0 +1,257 @@
+import numpy as np
+
+from .Workspace import Workspace, allocate, arange
+
+
+POSITION_DTYPE = [
+    ('frame_number', 'i8'),
+    ('pos_x', 'f8'),
+    ('pos_y', 'f8'),
+    ('pos_z', 'f8'),
+]
+
+DISTANCE_DTYPE = [
+    ('frame_number', 'i8'),
+    ('distance', 'f8'),
+]
+
+VELOCITY_DTYPE = [
+    ('frame_number', 'i8'),
+    ('velocity', 'f8'),
+]
+
+
+def assemble(
+    frames: np.ndarray, max_markers: int, workspace: Workspace | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Assemble marker rows into a fixed-size array of markers per frame.
+
+    Rows are grouped by frame number, rather than assumed to come in runs of
+    exactly max_markers, so an occluded marker leaves NaN padding within its own
+    frame instead of misaligning every later one. Rows beyond max_markers within
+    a frame (e.g., ghost markers) are dropped.
+
+    Args:
+        frames (np.ndarray): Structured array of marker rows, ordered by frame, with
+            fields frame_number, pos_x, pos_y, pos_z
+        max_markers (int): Number of markers tracked per frame
+        workspace (Workspace, optional): Buffers to write results into, rather than
+            allocating new arrays. Defaults to None.
+
+    Returns:
+        tuple: Frame numbers (frames,), marker positions (frames, max_markers, 3)
+            padded with NaN, and number of valid markers in each frame (frames,)
+    """
+    row_count = len(frames)
+    frame_numbers = frames['frame_number']
+    new_frame, slot, frame_count = _frame_slots(frame_numbers, workspace)
+
+    # index of each row within its frame: its row less its frame's first row
+    rows = arange(workspace, row_count)
+    index = allocate(workspace, 'index', np.int64, row_count)
+    index.fill(0)
+    np.copyto(index, rows, where=new_frame)
+    np.maximum.accumulate(index, out=index)
+    np.subtract(rows, index, out=index)
+    # surplus rows are parked in a spare slot past max_markers, then left out
+    np.minimum(index, max_markers, out=index)
+
+    grid = allocate(
+        workspace, 'grid', np.float64, frame_count * (max_markers + 1) * 3
+    ).reshape(frame_count, max_markers + 1, 3)
+    grid.fill(np.nan)
+    for i, col in enumerate(['pos_x', 'pos_y', 'pos_z']):
+        grid[slot, index, i] = frames[col]
+    markers = grid[:, :max_markers]
+
+    numbers = allocate(workspace, 'frame_numbers', np.int64, frame_count)
+    numbers[slot] = frame_numbers
+
+    valid = _valid_markers(markers, workspace)
+
+    counts = allocate(workspace, 'counts', np.int64, frame_count)
+    counts.fill(0)
+    for marker in range(max_markers):
+        np.add(counts, 1, out=counts, where=valid[:, marker])
+
+    return numbers, markers, counts
+
+
+def centroids(
+    frames: np.ndarray, marker_count: int, workspace: Workspace | None = None
+) -> np.ndarray:
+    """Calculate mean positions across all markers for each frame.
+
+    Operates on any number of frames at once, e.g., a whole trial. Frames are
+    assembled by frame number (see assemble()), and each centroid is the mean of
+    that frame's valid markers; a frame with none has a NaN centroid.
+
+    Args:
+        frames (np.ndarray): Structured array of marker rows (up to marker_count
+            per frame) with fields frame_number, pos_x, pos_y, pos_z
+        marker_count (int): Number of markers tracked per frame
+        workspace (Workspace, optional): See assemble(). Defaults to None.
+
+    Returns:
+        np.ndarray: Structured array of mean positions with fields:
+            - frame_number (int): Frame identifier
+            - pos_x (float): Mean X coordinate
+            - pos_y (float): Mean Y coordinate
+            - pos_z (float): Mean Z coordinate
+    """
+    numbers, markers, counts = assemble(frames, marker_count, workspace)
+
+    positions = allocate(workspace, 'positions', POSITION_DTYPE, len(numbers))
+    positions['frame_number'][:] = numbers
+
+    valid = _valid_markers(markers, workspace)
+
+    # counts as floats, as dividing by ints would cast them through a temporary
+    divisor = allocate(workspace, 'divisor', np.float64, len(counts))
+    np.copyto(divisor, counts)
+
+    # NaN-aware mean, summing only valid markers
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i, axis in enumerate(['pos_x', 'pos_y', 'pos_z']):
+            mean = positions[axis]
+            np.add.reduce(markers[..., i], axis=1, where=valid, out=mean)
+            np.divide(mean, divisor, out=mean)
+
+    return positions
+
+
+def frame_times(
+    frames: np.ndarray, workspace: Workspace | None = None
+) -> np.ndarray | None:
+    """Return the timestamp of each frame, as grouped by assemble().
+
+    Args:
+        frames (np.ndarray): Structured array of marker rows, ordered by frame
+        workspace (Workspace, optional): See assemble(). Defaults to None.
+
+    Returns:
+        np.ndarray | None: Timestamp (s) of each frame, or None if frames were
+            recorded without timestamps
+    """
+    if 'timestamp' not in frames.dtype.names:
+        return None
+
+    _, slot, frame_count = _frame_slots(frames['frame_number'], workspace)
+
+    # each frame's first row: assigned in reverse, as the last of repeated slots wins
+    times = allocate(workspace, 'frame_times', np.float64, frame_count)
+    times[slot[::-1]] = frames['timestamp'][::-1]
+
+    # the sum is NaN if any time is
+    if np.isnan(np.add.reduce(times)):
+        return None
+    return times
+
+
+def distances(
+    positions: np.ndarray, axis: str = 'z', workspace: Workspace | None = None
+) -> np.ndarray:
+    """Calculate frame-to-frame distances travelled.
+
+    Args:
+        positions (np.ndarray): Structured array of (centroid) positions
+        axis (str, optional): One of 'x', 'y', 'z' (signed displacement along that
+            axis), or 'all' (Euclidean distance). Defaults to 'z'.
+        workspace (Workspace, optional): See centroids(). Defaults to None.
+
+    Returns:
+        np.ndarray: Structured array, one row per frame after the first, with fields
+            frame_number and distance
+    """
+    size = max(len(positions) - 1, 0)
+    result = allocate(workspace, 'distances', DISTANCE_DTYPE, size)
+    result['frame_number'][:] = positions['frame_number'][1:]
+
+    distance = result['distance']
+    if axis == 'all':
+        # sum of squared steps is accumulated in place, one axis at a time
+        step = allocate(workspace, 'steps', np.float64, size)
+        distance[:] = 0.0
+        for col in ['pos_x', 'pos_y', 'pos_z']:
+            np.subtract(positions[col][1:], positions[col][:-1], out=step)
+            np.multiply(step, step, out=step)
+            np.add(distance, step, out=distance)
+        np.sqrt(distance, out=distance)
+        # TODO: retain sign of deviation
+    else:
+        col = positions[f'pos_{axis}']
+        np.subtract(col[1:], col[:-1], out=distance)
+
+    return result
+
+
+def velocities(
+    positions: np.ndarray,
+    sample_rate: int,
+    axis: str = 'z',
+    workspace: Workspace | None = None,
+    timestamps: np.ndarray | None = None,
+) -> np.ndarray:
+    """Calculate frame-to-frame velocities.
+
+    Args:
+        positions (np.ndarray): Structured array of (centroid) positions
+        sample_rate (int): Data sampling rate in Hz, used to space frames if no
+            timestamps are given
+        axis (str, optional): See distances(). Defaults to 'z'.
+        workspace (Workspace, optional): See centroids(). Defaults to None.
+        timestamps (np.ndarray, optional): Timestamp (s) of each position, e.g.,
+            from frame_times(). Defaults to None (frames 1 / sample_rate apart).
+
+    Returns:
+        np.ndarray: Structured array, one row per frame after the first, with fields
+            frame_number and velocity (in units/second)
+    """
+    steps = distances(positions, axis, workspace)
+
+    result = allocate(workspace, 'velocities', VELOCITY_DTYPE, len(steps))
+    result['frame_number'][:] = steps['frame_number']
+
+    if timestamps is None:
+        np.divide(steps['distance'], 1.0 / sample_rate, out=result['velocity'])
+    else:
+        intervals = allocate(workspace, 'intervals', np.float64, len(steps))
+        np.subtract(timestamps[1:], timestamps[:-1], out=intervals)
+        np.divide(steps['distance'], intervals, out=result['velocity'])
+
+    return result
+
+
+def _frame_slots(
+    frame_numbers: np.ndarray, workspace: Workspace | None
+) -> tuple[np.ndarray, np.ndarray, int]:
+    # slot (frame index) of each row: count of frame number changes up to that row;
+    # returns where frames start, each row's slot and the number of frames
+    row_count = len(frame_numbers)
+
+    new_frame = allocate(workspace, 'new_frame', np.bool_, row_count)
+    new_frame[:1] = True
+    np.not_equal(frame_numbers[1:], frame_numbers[:-1], out=new_frame[1:])
+
+    # copied to int first, as cumsum() would cast through a temporary of every row
+    slot = allocate(workspace, 'slot', np.int64, row_count)
+    np.copyto(slot, new_frame)
+    np.cumsum(slot, out=slot)
+    np.subtract(slot, 1, out=slot)
+    frame_count = int(slot[-1]) + 1 if row_count else 0
+
+    return new_frame, slot, frame_count
+
+
+def _valid_markers(markers: np.ndarray, workspace: Workspace | None) -> np.ndarray:
+    # which markers of each frame are tracked (not NaN padding), as (frames, markers);
+    # laid out marker by marker, as numpy would buffer a strided (frames, markers)
+    # view whole (and isnan() into strided output is unreliable)
+    frame_count, max_markers = markers.shape[:2]
+    valid = allocate(
+        workspace, 'valid', np.bool_, max_markers * frame_count
+    ).reshape(max_markers, frame_count)
+    for marker in range(max_markers):
+        np.isnan(markers[:, marker, 0], out=valid[marker])
+    np.logical_not(valid, out=valid)
+    return valid.T
@@ -0,0 +1,129 @@
+import numpy as np
+
+from .TrialBuffer import TrialBuffer
+from .TrajectoryFeatures import TrajectoryFeatures
+from .TrajectoryIndex import TrajectoryIndex
+from .Workspace import Workspace
+
+
+class MarkerSet(object):
+    """A named marker set followed by an Optitracker.
+
+    Each tracked set keeps its own trial buffer, query workspace and trajectory
+    features, so several sets (e.g., both hands, or a hand and an object) can be
+    followed through one NatNet session without interfering with one another.
+
+    Attributes:
+        label (str): Name of the marker set, as streamed by Motive
+        marker_count (int): Number of markers in the set
+        sink (CSVSink | SQLiteSink | ArchiveSink | None): Where committed trials are
+            stored; if None, the set is tracked live but never stored
+        buffer (TrialBuffer): Marker rows received since listening started
+        workspace (Workspace): Buffers reused by queries on this set
+        features (TrajectoryFeatures): Features of this set's trajectory
+        index (TrajectoryIndex): Prefix sums over this set's trajectory, for range
+            queries
+        touches (TouchDetector | None): Tests this set's position against screen
+            targets, if watching for touches
+
+    Note:
+        Motive streams the markers of each rigid body as a marker set under the
+        rigid body's name, so rigid bodies can be followed by name here too.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        marker_count: int,
+        sink,
+        features: TrajectoryFeatures,
+        index: TrajectoryIndex | None = None,
+    ):
+        """Initialize the MarkerSet object.
+
+        Args:
+            label (str): Name of the marker set
+            marker_count (int): Number of markers in the set
+            sink (CSVSink | SQLiteSink | ArchiveSink | None): Recording sink
+            features (TrajectoryFeatures): Feature extraction for this set
+            index (TrajectoryIndex, optional): Range index for this set; if None,
+                one is made at the default sample rate. Defaults to None.
+
+        Raises:
+            ValueError: If label is empty
+            ValueError: If marker_count is non-positive integer
+        """
+        if not label:
+            raise ValueError('Marker set label must be specified.')
+        if marker_count <= 0:
+            raise ValueError('Marker count must be positive.')
+
+        self.label = label
+        self.marker_count = marker_count
+        self.sink = sink
+        self.features = features
+        self.index = index if index is not None else TrajectoryIndex()
+        self.touches = None
+
+        self.buffer = TrialBuffer()
+        self.workspace = Workspace()
+
+    def reset(self) -> None:
+        """Drop anything buffered, and restart feature extraction & indexing."""
+        self.buffer.discard()
+        self.features.reset()
+        self.index.reset()
+        if self.touches is not None:
+            self.touches.reset()
+
+    def append(
+        self, markers, rescale_by: float = 1.0, received: float | None = None
+    ) -> None:
+        """Buffer a frame's markers, and feed their centroid to features & index.
+
+        Args:
+            markers (list | np.ndarray): Marker dicts sharing a frame_number, with
+                pos_x, pos_y, pos_z; or a structured array with those fields
+            rescale_by (float, optional): Factor applied to the centroid before
+                feature extraction (buffered rows are stored as received).
+                Defaults to 1.0.
+            received (float, optional): time.perf_counter() when the frame arrived,
+                if appended later (see TouchDetector.update). Defaults to None (now).
+        """
+        self.buffer.append(markers)
+
+        if len(markers) == 0:
+            return
+
+        # as in Kinematics.assemble(), surplus (e.g., ghost) markers are left out
+        markers = markers[: self.marker_count]
+
+        if isinstance(markers, np.ndarray):
+            frame_number = int(markers['frame_number'][0])
+            timestamp = (
+                float(markers['timestamp'][0])
+                if 'timestamp' in markers.dtype.names
+                else None
+            )
+            centroid = np.array(
+                [markers[col].mean() for col in ['pos_x', 'pos_y', 'pos_z']]
+            )
+        else:
+            frame_number = int(markers[0]['frame_number'])
+            timestamp = markers[0].get('timestamp')
+            centroid = np.mean(
+                [[m['pos_x'], m['pos_y'], m['pos_z']] for m in markers], axis=0
+            )
+
+        centroid *= rescale_by
+        self.features.update(frame_number, centroid, timestamp)
+        self.index.append(frame_number, centroid, timestamp)
+        if self.touches is not None:
+            self.touches.update(frame_number, centroid, timestamp, received)
+
+    def commit(self) -> None:
+        """Store buffered rows via the sink (or drop them, if there is none)."""
+        if self.sink is None:
+            self.buffer.discard()
+        else:
+            self.buffer.commit(self.sink)
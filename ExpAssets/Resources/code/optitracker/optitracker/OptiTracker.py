@@ -1,19 +1,25 @@
-from threading import Thread
+from threading import Condition, Thread
 import time
-import os
 import numpy as np
-from csv import DictWriter
-from rich.console import Console
 
-from ..NatNetClient.NatNetClient import NatNetClient
+from . import Kinematics
+from .MarkerSet import MarkerSet
+from .RecordingSinks import CSVSink, FRAME_DTYPE
+from .Readiness import Readiness
+from .StreamHealth import StreamHealth
+from .StreamStats import StreamStats
+from .TouchDetector import TouchDetector
+from .TrajectoryFeatures import TrajectoryFeatures
+from .TrajectoryIndex import TrajectoryIndex
 
 # import warnings
 
 # from klibs.KLDatabase import KLDatabase as kld
 
+# NOTE: Backend dependencies (NatNet & its packet parser, pyautogui) and rich are
+# imported on demand, so importing this module only costs numpy & the stdlib.
+
 # TODO:
-# grab first frame, row count indicates num markers tracked.
-# incorporate checks to ensure frames queried match expected marker count
 # refactor nomeclature about frame indexing/querying
 
 
@@ -24,11 +30,22 @@ class Optitracker(object):
     tracking markers. It provides functionality for calculating velocities, positions,
 
 
+    Several marker sets can be followed at once (see track()); queries default to
+    the primary marker set given at initialization.
+
+    With acquisition_process=True, NatNet runs in a separate process which publishes
+    frames to a shared memory ring (see Acquisition); frames are then taken up from
+    the ring whenever the tracker is queried or waited on, so packet handling never
+    competes with the experiment (e.g., rendering) for the GIL.
+
     Attributes:
-        marker_count (int): Number of markers being tracked
+        marker_count (int): Number of markers being tracked (in the primary set)
+        marker_sets (list): Labels of tracked marker sets, primary set first
         sample_rate (int): Data sampling rate in Hz
         window_size (int): Size of the temporal window for calculations (in frames)
-        data_dir (str): Path to the data file containing tracking data
+        data_dir (str): Path to the data file containing tracking data (CSV sink only)
+        sink (CSVSink | SQLiteSink | ArchiveSink): Where committed trials (of the
+            primary set) are stored
         rescale_by (float): Factor to rescale position data (e.g., 1000 for m to mm); default is 1000
 
     Note:
@@ -47,6 +64,11 @@ class Optitracker(object):
         primary_axis: str = 'z',
         use_mouse: bool = False,
         display_ppi: int = -1,
+        lateral_axis: str = 'x',
+        sink=None,
+        marker_set: str = 'Hand',
+        acquisition_process: bool = False,
+        ring_capacity: int = 8192,
     ):
         """Initialize the OptiTracker object.
 
@@ -58,6 +80,15 @@ class Optitracker(object):
             rescale_by (float, optional): Factor to rescale position values. Defaults to 1000.
             init_natnet (bool, optional): Whether to initialize NatNet client. Defaults to True.
             primary_axis (str): Primary axis of movement (e.g., 'x', 'y', 'z')
+            lateral_axis (str, optional): Axis along which lateral deviation is measured. Defaults to 'x'.
+            sink (CSVSink | SQLiteSink | ArchiveSink, optional): Recording sink; if None,
+                trials are stored as CSV files at data_dir. Defaults to None.
+            marker_set (str, optional): Label of the primary marker set. Defaults to 'Hand'.
+            acquisition_process (bool, optional): Whether to run NatNet in a separate
+                process, rather than in threads of this one. Defaults to False.
+            ring_capacity (int, optional): Number of marker set messages the shared
+                ring holds (acquisition_process only); frames not taken up before
+                being overwritten count as dropped. Defaults to 8192.
 
         Raises:
             ValueError: If marker_count is non-positive integer
@@ -66,14 +97,14 @@ class Optitracker(object):
             ValueError: If rescale_by is non-positive numeric
             ValueError: If primary_axis is None or empty
             ValueError: If primary_axis is not 'x', 'y', or 'z'
+            ValueError: If acquisition_process is requested for mouse tracking
         """
-        self.console = Console()
+        self.__console = None
 
         self.__is_listening = False
 
         if marker_count <= 0:
             raise ValueError('Marker count must be positive.')
-        self.__marker_count = marker_count
 
         if sample_rate <= 0:
             raise ValueError('Sample rate must be positive.')
@@ -87,13 +118,36 @@ class Optitracker(object):
             raise ValueError('Rescale factor must be positive')
         self.__rescale_by = rescale_by
 
-        self.__data_dir = data_dir
+        self.__lateral_axis = lateral_axis
+
+        # signalled by the acquisition thread whenever a frame is buffered
+        self.__frame_arrived = Condition()
+        self.__frames_received = 0
+        self.__frames_waited = 0
+        # frames holding any of the primary set's markers, i.e., giving a position
+        self.__frames_valid = 0
+
+        # rate & latency of the primary set's frames, per trial and live
+        self.__stream = StreamStats()
+        self.__health = StreamHealth(1 if use_mouse else marker_count, sample_rate)
 
         self.__use_mouse = use_mouse
 
+        # separate acquisition process & shared ring, started on first listen
+        self.__acquisition = None
+        self.__acquisition_process = acquisition_process
+        self.__ring_capacity = ring_capacity
+        self.__ring_cursor = 0
+
+        if self.__use_mouse and acquisition_process:
+            raise ValueError('Mouse tracking cannot run in a separate process.')
+
         if self.__use_mouse:
             import pyautogui
 
+            # held onto so the sampling loop never has to import it
+            self.__pyautogui = pyautogui
+
             init_natnet = False
             self.__natnet = None
 
@@ -105,14 +159,17 @@ class Optitracker(object):
                 )
 
             _, self.__screen_height = pyautogui.size()
-            self.__data_dir = 'mouse_tracking.csv'
+            self.__mouse_position = np.zeros(1, dtype=FRAME_DTYPE)
             self.__mouse_thread = None
             self.__stop_mouse_thread = False
 
-            if os.path.exists(self.__data_dir):
-                os.remove(self.__data_dir)
+        if acquisition_process:
+            init_natnet = False
+            self.__natnet = None
 
         if init_natnet:
+            from ..NatNetClient.NatNetClient import NatNetClient
+
             self.__natnet = NatNetClient()
             # self.__natnet.listeners['marker'] = self.__write  # type: ignore
             self.__natnet.marker_listener = self.__write
@@ -125,20 +182,113 @@ class Optitracker(object):
 
         self.__primary_axis = primary_axis
 
+        self.__marker_sets = {}
+        self.__primary = self.track(
+            marker_set,
+            marker_count,
+            sink if sink is not None else CSVSink(data_dir),
+        )
+
+    def track(self, label: str, marker_count: int, sink=None) -> MarkerSet:
+        """Follow an (additional) marker set.
+
+        All tracked sets are decoded from the same NatNet frames, each into its
+        own buffer; query methods take the set's label as marker_set.
+
+        Args:
+            label (str): Name of the marker set (or rigid body), as streamed by Motive
+            marker_count (int): Number of markers in the set
+            sink (CSVSink | SQLiteSink | ArchiveSink, optional): Where the set's trials
+                are stored; if None, the set is tracked but never stored.
+                Defaults to None.
+
+        Returns:
+            MarkerSet: The tracked set
+
+        Raises:
+            ValueError: If the set is already tracked, or marker_count is non-positive
+            RuntimeError: If called while listening
+        """
+        if self.__is_listening:
+            raise RuntimeError('Cannot change tracked marker sets while listening.')
+
+        if label in self.__marker_sets:
+            raise ValueError(f'Marker set "{label}" is already tracked.')
+
+        tracked = MarkerSet(
+            label,
+            marker_count,
+            sink,
+            TrajectoryFeatures(
+                sample_rate=self.__sample_rate,
+                window_size=self.__window_size,
+                primary_axis=self.__primary_axis if self.__primary_axis != 'all' else 'z',
+                lateral_axis=self.__lateral_axis,
+            ),
+            TrajectoryIndex(sample_rate=self.__sample_rate),
+        )
+        self.__marker_sets[label] = tracked
+        return tracked
+
+    def __tracked(self, marker_set: str | None) -> MarkerSet:
+        """Return the named tracked set, or the primary set if None."""
+        if marker_set is None:
+            return self.__primary
+        try:
+            return self.__marker_sets[marker_set]
+        except KeyError:
+            raise LookupError(f'Marker set "{marker_set}" is not tracked.') from None
+
     @property
     def marker_count(self) -> int:
-        """Get the number of markers to track."""
-        return self.__marker_count
+        """Get the number of markers to track (in the primary set)."""
+        return self.__primary.marker_count
+
+    @property
+    def marker_sets(self) -> list:
+        """Get the labels of tracked marker sets, primary set first."""
+        return list(self.__marker_sets)
+
+    @property
+    def console(self):
+        """rich Console for status output; rich is only imported on first use."""
+        if self.__console is None:
+            from rich.console import Console
+
+            self.__console = Console()
+        return self.__console
+
+    @property
+    def allocations(self) -> int:
+        """Number of times query workspace buffers have been (re)allocated.
+
+        Should hold steady once queries have warmed up; growth during a trial
+        means queries are asking for more frames than ever before. Only workspace
+        buffers are counted: results copied out (where no out array is given) and
+        numpy's own scratch memory are not.
+        """
+        return sum(
+            tracked.workspace.allocations for tracked in self.__marker_sets.values()
+        )
 
     @property
     def data_dir(self) -> str:
         """Get the data directory path."""
-        return self.__data_dir
+        if not isinstance(self.__primary.sink, CSVSink):
+            raise AttributeError('Data directory is only used by CSV sinks.')
+        return self.__primary.sink.path
 
     @data_dir.setter
     def data_dir(self, data_dir: str) -> None:
         """Set the data directory path."""
-        self.__data_dir = data_dir
+        if not isinstance(self.__primary.sink, CSVSink):
+            raise AttributeError('Data directory is only used by CSV sinks.')
+        self.__primary.sink.path = data_dir
+
+    @property
+    def sink(self):
+        """Get the recording sink."""
+        return self.__primary.sink
 
     @property
     def sample_rate(self) -> int:
@@ -162,19 +312,9 @@ class Optitracker(object):
     def __get_mouse_position(self) -> np.ndarray:
         self.__mouse_frame += 1
 
-        import pyautogui
-
-        frame = np.ndarray(
-            1,
-            dtype=[
-                ('frame_number', 'i8'),
-                ('pos_x', 'f8'),
-                ('pos_y', 'f8'),
-                ('pos_z', 'f8'),
-            ],
-        )
+        frame = self.__mouse_position
 
-        raw_pos = pyautogui.position()
+        raw_pos = self.__pyautogui.position()
 
         frame['frame_number'][:] = self.__mouse_frame
         frame['pos_x'][:] = float(raw_pos[0]) / (self.__display_ppi / 25.4)
@@ -182,22 +322,69 @@ class Optitracker(object):
         frame['pos_z'][:] = self.__screen_height - float(raw_pos[1]) / (
             self.__display_ppi / 25.4
         )
+        frame['timestamp'][:] = time.perf_counter()
 
         return frame
 
     def is_listening(self) -> bool:
-        """Return whether the NatNet client is currently listening."""
+        """Return whether the NatNet client is currently listening.
+
+        Listening does not mean frames are arriving; see health() for that.
+        """
         return self.__is_listening
 
-    def start_listening(self) -> bool:
+    def health(self) -> dict:
+        """Return the live health of the primary set's frame stream.
+
+        Cheap enough to poll every loop iteration, e.g., to abort or pause when the
+        stream stalls or degrades, rather than collect bad trials.
+
+        Returns:
+            dict: Whether listening, plus current frame rate, jitter, dropped frames,
+                marker count mismatches, backlog (messages published by the
+                acquisition process but not yet taken up; always 0 otherwise) and
+                time since the last frame. See StreamHealth.report().
+        """
+        backlog = 0
+        if self.__acquisition is not None and self.__is_listening:
+            backlog = self.__acquisition.ring.written - self.__ring_cursor
+            self.__drain()
+
+        report = self.__health.report(backlog)
+        report['listening'] = self.__is_listening
+        return report
+
+    def start_listening(self, record: bool = True, ready_frames: int = 1) -> Readiness:
         """
         Start listening for NatNet data.
 
+        Args:
+            record (bool, optional): Whether frames are to be stored (by commit());
+                if False, sinks are left alone, e.g., while calibrating, and
+                frames should be discard()ed after. Defaults to True.
+            ready_frames (int, optional): Number of valid frames (holding any of the
+                primary set's markers) to be buffered before the returned handle
+                resolves. Defaults to 1.
+
+        Returns:
+            Readiness: Handle resolving once ready_frames valid frames have been
+                buffered; truthy if listening started
+
         Raises:
-            ValueError: If data directory is unset
+            ValueError: If data directory (or sink key) is unset (when recording)
         """
-        if self.__data_dir == '':
-            raise ValueError('No data directory was set.')
+        for tracked in self.__marker_sets.values():
+            if record and tracked.sink is not None:
+                tracked.sink.begin()
+            tracked.reset()
+
+        with self.__frame_arrived:
+            self.__frames_received = 0
+            self.__frames_waited = 0
+            self.__frames_valid = 0
+
+        self.__stream.reset()
+        self.__health.reset()
 
         if self.__use_mouse:
             self.__mouse_frame = 0
@@ -207,18 +394,32 @@ class Optitracker(object):
             self.__mouse_thread.start()
             self.__is_listening = True
 
+        elif self.__acquisition_process:
+            self.__is_listening = self.__start_acquisition()
+
         else:
             if self.__natnet is None:
                 raise RuntimeError('NatNet client not initialized.')
             else:
+                # sets not tracked are skipped over (rather than decoded) by the client
+                self.__natnet.marker_labels = set(self.__marker_sets)
                 self.__is_listening = self.__natnet.startup()
 
-        return self.__is_listening
+        return Readiness(self.__is_listening, ready_frames, self.__wait_until_ready)
 
     def stop_listening(self) -> None:
-        """Stop listening for NatNet data."""
+        """Stop listening for NatNet data.
 
-        if not self.__use_mouse:
+        Data recorded since listening started are held in memory until either
+        commit() or discard() is called.
+        """
+
+        if self.__acquisition_process:
+            # take up what arrived before now; the process itself keeps streaming
+            self.__drain()
+            self.__is_listening = False
+
+        elif not self.__use_mouse:
             if self.__natnet is None:
                 raise RuntimeError('NatNet client not initialized.')
 
@@ -233,16 +434,329 @@ class Optitracker(object):
                 self.__mouse_thread.join()
                 self.__mouse_thread = None
 
-            if os.path.exists(self.__data_dir):
-                os.remove(self.__data_dir)
-
             self.__is_listening = False
 
-    def query_frames(self, num_frames: int = 0) -> np.ndarray:
+    def wait_for_frame(self, timeout: float | None = None) -> bool:
+        """Block until a frame arrives that has not already been waited on.
+
+        Returns immediately if frames have arrived since the last call, so callers
+        can pace their work to the tracker's frame rate without missing frames.
+
+        Args:
+            timeout (float, optional): Maximum time to wait, in seconds. Defaults to
+                None (wait indefinitely).
+
+        Returns:
+            bool: True if a new frame arrived, False if timed out
+        """
+        if self.__acquisition is not None and self.__is_listening:
+            self.__wait_for_ring(timeout)
+            timeout = 0
+
+        with self.__frame_arrived:
+            arrived = self.__frame_arrived.wait_for(
+                lambda: self.__frames_received > self.__frames_waited, timeout
+            )
+            self.__frames_waited = self.__frames_received
+
+        return arrived
+
+    def __wait_until_ready(self, required: int, timeout: float | None) -> bool:
+        """Block until required valid frames have been buffered since listening began."""
+        if self.__acquisition is None:
+            with self.__frame_arrived:
+                return self.__frame_arrived.wait_for(
+                    lambda: self.__frames_valid >= required, timeout
+                )
+
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        while True:
+            self.__drain()
+
+            with self.__frame_arrived:
+                if self.__frames_valid >= required:
+                    return True
+
+            if not self.__is_listening:
+                return False
+
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return False
+
+            self.__acquisition.wait(self.__ring_cursor, remaining)
+
+    def close(self) -> None:
+        """Stop listening, and shut down the acquisition process (if any)."""
+        if self.__is_listening:
+            self.stop_listening()
+
+        if self.__acquisition is not None:
+            self.__acquisition.close()
+            self.__acquisition = None
+
+    def __start_acquisition(self) -> bool:
+        """Start (or restart) the acquisition process, and follow its ring from now."""
+        labels = tuple(self.__marker_sets)
+
+        # tracked sets are baked into the process, so it's restarted if they change
+        if self.__acquisition is not None and self.__acquisition.labels != labels:
+            self.__acquisition.close()
+            self.__acquisition = None
+
+        if self.__acquisition is None:
+            from .Acquisition import Acquisition
+
+            self.__acquisition = Acquisition(
+                labels,
+                max(tracked.marker_count for tracked in self.__marker_sets.values()),
+                self.__ring_capacity,
+            )
+            # reused to hand each message's markers on as rows
+            self.__ring_rows = np.zeros(
+                self.__acquisition.ring.max_markers, dtype=FRAME_DTYPE
+            )
+
+        started = self.__acquisition.start()
+        self.__ring_cursor = self.__acquisition.ring.written
+        return started
+
+    def __drain(self) -> None:
+        """Take up frames published to the shared ring since last drained."""
+        if self.__acquisition is None or not self.__is_listening:
+            return
+
+        ring = self.__acquisition.ring
+        labels = self.__acquisition.labels
+        rows = self.__ring_rows
+
+        while True:
+            slot, self.__ring_cursor, _ = ring.read(self.__ring_cursor)
+            if slot is None:
+                return
+
+            # lost messages surface as gaps in frame numbers, i.e., dropped frames
+            count = int(slot['marker_count'][0])
+            frame = rows[:count]
+            frame['frame_number'] = slot['frame_number'][0]
+            frame['timestamp'] = slot['timestamp'][0]
+            for i, col in enumerate(['pos_x', 'pos_y', 'pos_z']):
+                frame[col] = slot['markers'][0, :count, i]
+
+            latency = float(slot['latency'][0])
+            received = float(slot['received'][0])
+            self.__write(
+                {
+                    'label': labels[int(slot['set_index'][0])],
+                    'frame_number': int(slot['frame_number'][0]),
+                    'markers': frame,
+                    'timestamp': float(slot['timestamp'][0]),
+                    'latency': None if latency != latency else latency,
+                    'received': None if received != received else received,
+                }
+            )
+
+    def __wait_for_ring(self, timeout: float | None) -> None:
+        """Take up ring messages until the primary set delivers an unwaited frame."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        while True:
+            self.__drain()
+
+            with self.__frame_arrived:
+                if self.__frames_received > self.__frames_waited:
+                    return
+
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return
+
+            self.__acquisition.wait(self.__ring_cursor, remaining)  # type: ignore
+
+    def commit(self) -> None:
+        """Store data recorded since listening started via each set's recording sink.
+
+        Note:
+            Mouse tracking data are never retained, so are discarded instead.
+        """
+        for tracked in self.__marker_sets.values():
+            if self.__use_mouse:
+                tracked.buffer.discard()
+            else:
+                tracked.commit()
+
+    def discard(self) -> None:
+        """Drop data recorded since listening started, without storing them."""
+        for tracked in self.__marker_sets.values():
+            tracked.buffer.discard()
+
+    def stream_stats(self) -> dict:
+        """Return rate & latency of frames received since listening started.
+
+        Returns:
+            dict: Measured frame rate (Hz), number of dropped frames, and mean & max
+                system latency (ms, from camera mid-exposure to transmission by
+                Motive), ready to be inserted into the database. See
+                StreamStats.summary().
+        """
+        self.__drain()
+        return self.__stream.summary()
+
+    def features(self, marker_set: str | None = None) -> dict:
+        """Return trajectory features accumulated since listening started.
+
+        Features are updated as each frame arrives, so this is cheap to call at
+        trial end.
+
+        Args:
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+
+        Returns:
+            dict: Per-trial summary (peak velocity & its time, peak acceleration & its
+                time, path length, lateral deviation, time of reversal), ready to be
+                inserted into the database. See TrajectoryFeatures.summary().
+        """
+        self.__drain()
+        return self.__tracked(marker_set).features.summary()
+
+    def mark(self, marker_set: str | None = None) -> None:
+        """Start measuring travel from the latest frame, e.g., at a phase boundary.
+
+        Args:
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+        """
+        self.__drain()
+        self.__tracked(marker_set).features.mark()
+
+    def travelled(self, marker_set: str | None = None) -> float:
+        """Return the path length covered since mark() (or listening started).
+
+        Kept as a running total as frames arrive, so this is O(1) however long
+        it has been since the mark; cf. distance(axis='all') over a window.
+
+        Args:
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+
+        Returns:
+            float: Path length (mm, given rescale_by)
+        """
+        self.__drain()
+        return self.__tracked(marker_set).features.travelled()
+
+    def displacement(self, axis: str = 'all', marker_set: str | None = None) -> float:
+        """Return how far the latest frame lies from the position at mark().
+
+        Args:
+            axis (str, optional): One of 'x', 'y', 'z' for the signed displacement
+                along that axis, or 'all' for the Euclidean distance. Defaults to 'all'.
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+
+        Returns:
+            float: Displacement (mm, given rescale_by)
+        """
+        self.__drain()
+        return self.__tracked(marker_set).features.displacement(axis)
+
+    def watch(
+        self,
+        bounds,
+        calibration,
+        marker_set: str | None = None,
+        labels: list | None = None,
+        contact_distance: float = 10.0,
+    ) -> None:
+        """Detect touches of on-screen targets by a tracked set, as frames arrive.
+
+        The set's (rescaled) centroid is mapped onto the screen and hit-tested as
+        each frame is buffered, so touches are timed by the tracker rather than by
+        the screen's touch events; see touch(). Frames are buffered on arrival by
+        the acquisition thread; with acquisition_process, they are only buffered
+        (and tested) once the experiment thread takes them up, but a touch is
+        still stamped with the time its frame arrived.
+
+        Args:
+            bounds (BoundarySet): Targets, in screen pixels
+            calibration (ScreenCalibration): Mapping from tracker (mm) to screen (px)
+            marker_set (str, optional): Label of the set touching (e.g., a fingertip);
+                if None, the primary set. Defaults to None.
+            labels (list, optional): Boundaries to test. Defaults to None (all).
+            contact_distance (float, optional): Maximum distance (mm) from the screen
+                of a touch. Defaults to 10.0.
+
+        Raises:
+            ValueError: If the calibration doesn't know the screen's plane
+        """
+        self.__tracked(marker_set).touches = TouchDetector(
+            bounds, calibration, labels, contact_distance
+        )
+
+    def touch(self, marker_set: str | None = None) -> dict | None:
+        """Return the first touch of a target since listening started, if any.
+
+        Args:
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+
+        Returns:
+            dict | None: Touch with keys label, frame_number, timestamp & received
+                (see TouchDetector.touch), or None if no target has been touched
+
+        Raises:
+            RuntimeError: If the set isn't being watched for touches (see watch())
+        """
+        self.__drain()
+        touches = self.__tracked(marker_set).touches
+        if touches is None:
+            raise RuntimeError('Marker set is not being watched for touches.')
+        return touches.touch
+
+    def trajectory(self, marker_set: str | None = None) -> TrajectoryIndex:
+        """Return the index over the set's trajectory since listening started.
+
+        The index is extended as frames arrive, and answers distance & velocity
+        between any two frames in constant time (or many ranges in one call); see
+        TrajectoryIndex.
+
+        Args:
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+
+        Returns:
+            TrajectoryIndex: Index over centroid positions (mm, given rescale_by)
+        """
+        self.__drain()
+        return self.__tracked(marker_set).index
+
+    def query_frames(
+        self,
+        num_frames: int = 0,
+        out: np.ndarray | None = None,
+        marker_set: str | None = None,
+        last_ms: float | None = None,
+        since: float | None = None,
+    ) -> np.ndarray:
         """Query the most recent frames from the tracking data.
 
         Args:
             num_frames (int, optional): Number of frames to query. If 0, uses the instance's window_size. Defaults to 0.
+            out (np.ndarray, optional): Array to write frames into (which must be
+                large enough to hold them); if None, a new array is returned.
+                Defaults to None.
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+            last_ms (float, optional): Instead of num_frames, query frames captured
+                within this many ms of the latest frame. Defaults to None.
+            since (float, optional): Instead of num_frames, query frames captured at
+                or after this timestamp (s, on the tracker's clock). Defaults to None.
 
         Returns:
             np.ndarray: Structured array of frame data with fields:
@@ -250,20 +764,26 @@ class Optitracker(object):
                 - pos_x (float): X coordinate
                 - pos_y (float): Y coordinate
                 - pos_z (float): Z coordinate
+                - timestamp (float): Time (s) the frame was captured
 
         Raises:
             ValueError: If data directory is empty
             FileNotFoundError: If data file does not exist
             ValueError: If num_frames is negative
+            ValueError: If out is too small to hold the frames
+            ValueError: If more than one of num_frames, last_ms & since is given
         """
-        return self.__read(
-            num_frames=num_frames,
-        )
+        tracked = self.__tracked(marker_set)
+        frames = self.__read(tracked, num_frames, last_ms, since)
+        return self.__output(frames, out)
 
     def velocity(
         self,
         num_frames: int = 0,
         axis: str = 'z',
+        marker_set: str | None = None,
+        last_ms: float | None = None,
+        since: float | None = None,
     ) -> np.float64:
         """Calculate the current velocity from position data.
 
@@ -273,30 +793,47 @@ class Optitracker(object):
         Args:
             num_frames (int, optional): Number of frames to use for calculation.
                 If 0, uses the instance's window_size. Defaults to 0.
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+            last_ms (float, optional): Instead of num_frames, query frames captured
+                within this many ms of the latest frame. Defaults to None.
+            since (float, optional): Instead of num_frames, query frames captured at
+                or after this timestamp (s, on the tracker's clock). Defaults to None.
 
         Returns:
             float: Calculated velocity in units/second (based on rescale_by factor)
 
         Raises:
             ValueError: If num_frames is less than 2
+            ValueError: If the time window covers fewer than two frames
         """
-        if num_frames == 0:
-            num_frames = self.__window_size
+        if last_ms is None and since is None:
+            if num_frames == 0:
+                num_frames = self.__window_size
 
-        if num_frames < 2:
-            raise ValueError('Window size must cover at least two frames.')
+            if num_frames < 2:
+                raise ValueError('Window size must cover at least two frames.')
 
-        frames = self.__read(num_frames)
+        tracked = self.__tracked(marker_set)
+        frames = self.__read(tracked, num_frames, last_ms, since)
 
-        velocities = self.__calc_vector_velocity(frames, axis)
+        velocities = self.__calc_vector_velocity(tracked, frames, axis)
+        if len(velocities) == 0:
+            raise ValueError('Time window must cover at least two frames.')
 
         return np.mean(velocities['velocity'], dtype=np.float64)  # type: ignore
 
     def position(
-        self,
+        self, out: np.ndarray | None = None, marker_set: str | None = None
     ) -> np.ndarray:
         """Calculates and returns mean position(s) for the last n frames.
 
+        Args:
+            out (np.ndarray, optional): Array to write the position into; if None,
+                a new array is returned. Defaults to None.
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+
         Returns:
             np.ndarray: Structured array containing the mean position with fields:
                 - frame_number (int): Frame identifier
@@ -304,16 +841,75 @@ class Optitracker(object):
                 - pos_y (float): Y coordinate
                 - pos_z (float): Z coordinate
         """
-        frame = self.__read(num_frames=1)
+        tracked = self.__tracked(marker_set)
+        frame = self.__read(tracked, num_frames=1)
 
-        return self.__calc_position(frames=frame)
+        return self.__output(self.__calc_position(tracked, frames=frame), out)
 
-    def distance(self, num_frames: int = 0, axis: str = 'z') -> np.float64:
+    def visible_markers(
+        self,
+        num_frames: int = 0,
+        marker_set: str | None = None,
+        last_ms: float | None = None,
+        since: float | None = None,
+    ) -> np.ndarray:
+        """Return how many of the set's markers were tracked in each recent frame.
+
+        Args:
+            num_frames (int, optional): Number of frames to query. If 0, uses the
+                instance's window_size. Defaults to 0.
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+            last_ms (float, optional): Instead of num_frames, query frames captured
+                within this many ms of the latest frame. Defaults to None.
+            since (float, optional): Instead of num_frames, query frames captured at
+                or after this timestamp (s, on the tracker's clock). Defaults to None.
+
+        Returns:
+            np.ndarray: Valid marker count of each frame, oldest first
+        """
+        tracked = self.__tracked(marker_set)
+        frames = self.__read(tracked, num_frames, last_ms, since)
+
+        if self.__use_mouse:
+            return np.ones(len(frames), dtype=np.int64)
+
+        _, _, counts = Kinematics.assemble(
+            frames, tracked.marker_count, tracked.workspace
+        )
+        return counts.copy()
+
+    def __output(self, result: np.ndarray, out: np.ndarray | None) -> np.ndarray:
+        """Copy a result out of the workspace, into out if given."""
+        if out is None:
+            return result.copy()
+
+        if len(out) < len(result):
+            raise ValueError(
+                f'Output array holds {len(out)} rows, but {len(result)} are needed.'
+            )
+        out[: len(result)] = result
+        return out[: len(result)]
+
+    def distance(
+        self,
+        num_frames: int = 0,
+        axis: str = 'z',
+        marker_set: str | None = None,
+        last_ms: float | None = None,
+        since: float | None = None,
+    ) -> np.float64:
         """Calculate the Euclidean distance traveled over specified frames.
 
         Args:
             num_frames (int, optional): Number of frames to calculate distance over.
                 If 0, uses the instance's window_size. Defaults to 0.
+            marker_set (str, optional): Label of the set; if None, the primary set.
+                Defaults to None.
+            last_ms (float, optional): Instead of num_frames, query frames captured
+                within this many ms of the latest frame. Defaults to None.
+            since (float, optional): Instead of num_frames, query frames captured at
+                or after this timestamp (s, on the tracker's clock). Defaults to None.
 
         Returns:
             float: Euclidean distance between start and end positions
@@ -322,22 +918,21 @@ class Optitracker(object):
             Distance is calculated using smoothed position data if smoothing is enabled
         """
 
-        if num_frames == 0:
-            num_frames = self.__window_size
+        tracked = self.__tracked(marker_set)
+        frames = self.__read(tracked, num_frames, last_ms, since)
 
-        frames = self.__read(num_frames)
-
-        distances = self.__calc_vector_distance(frames, axis)
+        distances = self.__calc_vector_distance(tracked, frames, axis)
 
         return np.sum(distances['distance'], dtype=np.float64)   # type: ignore
 
     def __calc_vector_velocity(
-        self, frames: np.ndarray = np.array([]), axis: str = 'z'
+        self, tracked: MarkerSet, frames: np.ndarray = np.array([]), axis: str = 'z'
     ) -> np.ndarray:
         """
         Calculate velocity using position data over the specified window.
 
         Args:
+            tracked (MarkerSet): Set the frames belong to
             frames (np.ndarray, optional): Array of frame data; queries last window_size frames if empty.
 
         Returns:
@@ -347,45 +942,35 @@ class Optitracker(object):
             raise ValueError('Window size must cover at least two frames.')
 
         if len(frames) == 0:
-            frames = self.__read()
-
-        distances = self.__calc_vector_distance(frames, axis)
-        velocities = np.ndarray(
-            len(distances),
-            dtype=[
-                ('frame_number', 'i8'),
-                ('velocity', 'f8'),
-            ],
-        )
+            frames = self.__read(tracked)
 
-        velocities['frame_number'][:] = distances['frame_number']
-        velocities['velocity'][:] = distances['distance'] / (
-            1.0 / self.__sample_rate
-        )
+        if axis is None:
+            axis = self.__primary_axis
+
+        positions = self.__calc_position(tracked, frames)
 
-        return velocities
+        # frames are spaced by their timestamps where recorded, else by sample rate
+        timestamps = Kinematics.frame_times(frames, tracked.workspace)
+
+        return Kinematics.velocities(
+            positions, self.__sample_rate, axis, tracked.workspace, timestamps
+        )
 
     def __calc_vector_distance(
-        self, frames: np.ndarray = np.array([]), axis: str = 'z'
+        self, tracked: MarkerSet, frames: np.ndarray = np.array([]), axis: str = 'z'
     ) -> np.ndarray:
         """
         Calculate Euclidean distance between first and last frames.
 
         Args:
+            tracked (MarkerSet): Set the frames belong to
             frames (np.ndarray, optional): Array of frame data; queries last window_size frames if empty.
             axis (str, optional): Along which axis to calculate velocity; defaults to None (uses self.__primary_axis)
 
         Returns:
             float: Euclidean distance in mm
         """
-        positions = self.__calc_position(frames)
-        distances = np.ndarray(
-            len(positions) - 1,
-            dtype=[
-                ('frame_number', 'i8'),
-                ('distance', 'f8'),
-            ],
-        )
+        positions = self.__calc_position(tracked, frames)
 
         # if axis is not None and axis not in ['x', 'y', 'z', 'all']:
         #     raise ValueError('Axis must be one of: x, y, z, all')
@@ -393,38 +978,18 @@ class Optitracker(object):
         if axis is None:
             axis = self.__primary_axis
 
-        distances['frame_number'][:] = positions['frame_number'][1:]
-        for i in range(len(positions) - 1):
-            distances['frame_number'][i] = positions['frame_number'][i + 1]
-
-            if axis == 'all':
-                variance = np.sum(
-                    [
-                        np.diff(positions['pos_x'][i : i + 2]) ** 2,
-                        np.diff(positions['pos_y'][i : i + 2]) ** 2,
-                        np.diff(positions['pos_z'][i : i + 2]) ** 2,
-                    ]
-                )
-                deviation = np.sqrt(variance)
-                # TODO: retain sign of deviation
-
-            else:
-                deviation = np.diff(positions[f'pos_{axis}'][i : i + 2])
-
-            distances['distance'][i] = deviation
-
-        if axis:
-            pass
+        return Kinematics.distances(positions, axis, tracked.workspace)
 
-        return distances
-
-    def __calc_position(self, frames: np.ndarray = np.array([])) -> np.ndarray:
+    def __calc_position(
+        self, tracked: MarkerSet, frames: np.ndarray = np.array([])
+    ) -> np.ndarray:
         """Calculate mean positions across all markers for each frame.
 
         For each frame, computes the centroid position by averaging the positions
         of all markers tracked in that frame.
 
         Args:
+            tracked (MarkerSet): Set the frames belong to
             frames (np.ndarray, optional): Structured array of frame data.
                 If empty, queries last window_size frames. Defaults to empty array.
 
@@ -442,28 +1007,9 @@ class Optitracker(object):
             return frames
 
         if len(frames) == 0:
-            frames = self.__read()
-
-        # Create output array with the correct dtype
-        positions = np.zeros(
-            len(frames) // self.__marker_count,
-            dtype=[
-                ('frame_number', 'i8'),
-                ('pos_x', 'f8'),
-                ('pos_y', 'f8'),
-                ('pos_z', 'f8'),
-            ],
-        )
+            frames = self.__read(tracked)
 
-        positions['frame_number'][:] = frames['frame_number'][
-            :: self.__marker_count
-        ]
-        for axis in ['pos_x', 'pos_y', 'pos_z']:
-            positions[axis][:] = np.mean(
-                frames[axis].reshape(-1, self.__marker_count), axis=1
-            )
-
-        return positions
+        return Kinematics.centroids(frames, tracked.marker_count, tracked.workspace)
 
     # def __validate_data(self, data: np.ndarray) -> None:
     #     """Validate the format of the data array.
@@ -499,15 +1045,31 @@ class Optitracker(object):
     #             'Data fields must be of types: float64 (for position) or int64 (for frame number).'
     #         )
 
-    def __read(self, num_frames: int = 0) -> np.ndarray:
-        """Load and process frame data from the tracking data file.
+    def __read(
+        self,
+        tracked: MarkerSet,
+        num_frames: int = 0,
+        last_ms: float | None = None,
+        since: float | None = None,
+    ) -> np.ndarray:
+        """Load and process frame data for the current trial.
+
+        Queries buffered data for the most recent frames, and applies rescaling. If
+        nothing has been buffered, frames are instead read from a previously recorded
+        file at data_dir (CSV sinks only).
 
-        Reads position data from CSV file, validates format, and applies rescaling.
-        Returns the most recent frames up to the specified number.
+        Time windows are found by binary search over frame timestamps. Where frames
+        lack timestamps, last_ms is instead converted to a number of frames at the
+        sample rate.
 
         Args:
+            tracked (MarkerSet): Set to read frames of
             num_frames (int, optional): Number of most recent frames to return.
                 If 0, uses the instance's window_size. Defaults to 0.
+            last_ms (float, optional): Window back from the latest frame, in ms.
+                Defaults to None.
+            since (float, optional): Start of window, as a frame timestamp (s).
+                Defaults to None.
 
         Returns:
             np.ndarray: Structured array of frame data with fields:
@@ -519,53 +1081,44 @@ class Optitracker(object):
         Raises:
             ValueError: If data_dir is empty or data format is invalid
             FileNotFoundError: If data file does not exist
+            LookupError: If nothing has been buffered (non-CSV sinks)
             ValueError: If num_frames is negative
             ValueError: If rescale_by is not positive
+            ValueError: If more than one of num_frames, last_ms & since is given
+            ValueError: If since is given, but frames lack timestamps
 
         Note:
             Position values are automatically multiplied by rescale_by factor
         """
 
-        if self.__data_dir == '':
-            raise ValueError('Must specify data directory.')
-
-        if not os.path.exists(self.__data_dir):
-            raise FileNotFoundError(
-                f'No data directory present at:\n{self.__data_dir}'
-            )
-
         if num_frames < 0:
             raise ValueError('Number of frames cannot be negative.')
 
-        with open(self.__data_dir, 'r') as file:
-            header = file.readline().strip().split(',')
+        if (num_frames != 0) + (last_ms is not None) + (since is not None) > 1:
+            raise ValueError('Only one of num_frames, last_ms & since can be given.')
 
-        if any(
-            col not in header
-            for col in ['frame_number', 'pos_x', 'pos_y', 'pos_z']
-        ):
-            raise ValueError(
-                'Data must contain columns frame_number, pos_x, pos_y, pos_z.'
-            )
+        if num_frames == 0:
+            num_frames = self.__window_size
 
-        dtype_map = [
-            (
-                name,
-                (
-                    'f8'
-                    if name in ['pos_x', 'pos_y', 'pos_z']
-                    else 'i8'
-                    if name == 'frame_number'
-                    else 'U32'
-                ),
-            )
-            for name in header
-        ]
+        self.__drain()
 
-        # read in data now that columns have been validated and typed
-        frames = np.genfromtxt(
-            self.__data_dir, delimiter=',', dtype=dtype_map, skip_header=1
-        )
+        timestamped = tracked.buffer.timestamped
+
+        if since is not None and len(tracked.buffer) and not timestamped:
+            raise ValueError('Frames were recorded without timestamps.')
+
+        if last_ms is not None and not timestamped:
+            num_frames = max(1, int(np.ceil(last_ms * self.__sample_rate / 1000)))
+            last_ms = None
+
+        if since is not None:
+            frames = tracked.buffer.since(since, tracked.workspace)
+        elif last_ms is not None:
+            frames = tracked.buffer.within(last_ms / 1000, tracked.workspace)
+        elif len(tracked.buffer) == 0 and isinstance(tracked.sink, CSVSink):
+            frames = tracked.sink.read(num_frames)
+        else:
+            frames = tracked.buffer.latest(num_frames, tracked.workspace)
 
         # self.__validate_data(frames)
 
@@ -575,71 +1128,66 @@ class Optitracker(object):
                 raise ValueError('Rescale factor must be positive')
 
             for col in ['pos_x', 'pos_y', 'pos_z']:
-                frames[col][:] = frames[col][:] * self.__rescale_by
-
-        if num_frames == 0:
-            num_frames = self.__window_size
-
-        # Calculate which frames to include
-        last_frame = frames['frame_number'][-1]
-        lookback = last_frame - num_frames
-
-        # Filter for relevant frames
-        frames = frames[frames['frame_number'] > lookback]
+                np.multiply(frames[col], self.__rescale_by, out=frames[col])
 
         return frames
 
     def __write(self, frames) -> None:
-        """Write marker set data to CSV file.
+        """Buffer marker set data for the current trial.
+
+        Called by the NatNet client once per marker set in each frame; sets which
+        aren't tracked are ignored. Waiters are woken by the primary set, so
+        wait_for_frame() is paced by one notification per frame.
 
         Args:
             marker_set (dict): Dictionary containing marker data to be written.
-                Expected format: {'markers': [{'key1': val1, ...}, ...]}
+                Expected format: {'label': str, 'markers': [{'key1': val1, ...}, ...]}
+                (markers may also be a structured array), optionally with
+                frame_number, timestamp, latency and received (perf_counter() on
+                arrival)
         """
-        # print("__write()")
-
         if self.__use_mouse:
-            frames = self.__get_mouse_position()
-            fname = self.__data_dir
-            header = list(frames.dtype.names)
-
-            if not os.path.exists(fname):
-                with open(self.__data_dir, 'w', newline='') as file:
-                    writer = DictWriter(
-                        file,
-                        fieldnames=['frame_number', 'pos_x', 'pos_y', 'pos_z'],
-                    )
-                    writer.writeheader()
-
-            with open(fname, 'a', newline='') as file:
-                np.savetxt(file, frames, delimiter=',', fmt='%s')
+            frame = self.__get_mouse_position()
+            self.__primary.append(frame)
+            self.__stream.update(
+                int(frame['frame_number'][0]), float(frame['timestamp'][0])
+            )
+            self.__health.update(
+                int(frame['frame_number'][0]), 1, float(frame['timestamp'][0])
+            )
+            self.__notify_frame()
 
         else:
-            # if type(frames) is dict:
-            if frames.get('label') == 'Hand':
-                # print("__write | hand")
-                # Append data to trial-specific CSV file
-                fname = self.__data_dir
-                header = list(frames['markers'][0].keys())
-
-                # if file doesn't exist, create it and write header
-                if not os.path.exists(fname):
-                    # print("__write | headers")
-                    with open(fname, 'w', newline='') as file:
-                        writer = DictWriter(file, fieldnames=header)
-                        writer.writeheader()
-
-                # append marker data to file
-                with open(fname, 'a', newline='') as file:
-                    # print("__write | markers")
-                    writer = DictWriter(file, fieldnames=header)
-                    for marker in frames.get('markers', None):
-                        if marker is not None:
-                            writer.writerow(marker)
-            # else:
-            #     raise ValueError(
-            #         'Frames of unexpected type. Should be dict or np.ndarray'
-            #     )
+            tracked = self.__marker_sets.get(frames.get('label'))
+            if tracked is None:
+                return
+
+            markers = frames.get('markers', [])
+            tracked.append(markers, self.__rescale_by, frames.get('received'))
+
+            if tracked is self.__primary:
+                frame_number = frames.get('frame_number')
+                if frame_number is None and len(markers):
+                    frame_number = int(markers[0]['frame_number'])
+                if frame_number is not None:
+                    self.__stream.update(
+                        frame_number, frames.get('timestamp'), frames.get('latency')
+                    )
+                    self.__health.update(
+                        frame_number,
+                        len(markers),
+                        frames.get('timestamp'),
+                        frames.get('received'),
+                    )
+                self.__notify_frame(valid=len(markers) > 0)
+
+    def __notify_frame(self, valid: bool = True) -> None:
+        """Wake any callers blocked in wait_for_frame() (or waiting to be ready)."""
+        with self.__frame_arrived:
+            self.__frames_received += 1
+            if valid:
+                self.__frames_valid += 1
+            self.__frame_arrived.notify_all()
 
     def __track_mouse(self) -> None:
         """Continuously track and write mouse position data."""
@@ -0,0 +1,83 @@
+class Readiness(object):
+    """Resolves once enough frames have been buffered after listening started.
+
+    Returned by Optitracker.start_listening(), so that work can begin as soon as
+    data are available (and never before). Mirrors the parts of
+    concurrent.futures.Future that apply: done() & result(), plus wait().
+
+    The handle is truthy if listening started, as start_listening()'s return
+    value was before it returned a handle.
+
+    Attributes:
+        started (bool): Whether listening started
+        required (int): Number of frames needed for readiness
+    """
+
+    def __init__(self, started: bool, required: int, wait):
+        """Initialize the Readiness object.
+
+        Args:
+            started (bool): Whether listening started
+            required (int): Number of frames needed for readiness
+            wait (callable): wait(required, timeout) -> bool; blocks until required
+                frames have been buffered, or timeout (s; None to wait indefinitely)
+                elapses, and returns whether they were
+
+        Raises:
+            ValueError: If required is less than 1
+        """
+        if required < 1:
+            raise ValueError('At least one frame must be required.')
+
+        self.started = started
+        self.required = required
+
+        self.__wait = wait
+        self.__ready = False
+
+    def __bool__(self) -> bool:
+        return self.started
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until ready, or until timeout elapses.
+
+        Args:
+            timeout (float, optional): Maximum time to wait, in seconds. Defaults to
+                None (wait indefinitely).
+
+        Returns:
+            bool: True if ready; False if timed out, or listening never started
+        """
+        if not self.started:
+            return False
+
+        if not self.__ready:
+            self.__ready = self.__wait(self.required, timeout)
+        return self.__ready
+
+    def done(self) -> bool:
+        """Return whether ready, without blocking."""
+        return self.wait(timeout=0)
+
+    def result(self, timeout: float | None = None) -> int:
+        """Block until ready, raising if that doesn't happen.
+
+        Args:
+            timeout (float, optional): Maximum time to wait, in seconds. Defaults to
+                None (wait indefinitely).
+
+        Returns:
+            int: Number of frames readiness required
+
+        Raises:
+            RuntimeError: If listening never started
+            TimeoutError: If not ready within timeout
+        """
+        if not self.started:
+            raise RuntimeError('Listening did not start.')
+
+        if not self.wait(timeout):
+            raise TimeoutError(
+                f'{self.required} frame(s) not received within {timeout} s.'
+            )
+        return self.required
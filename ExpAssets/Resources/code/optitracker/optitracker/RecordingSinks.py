@@ -0,0 +1,449 @@
+import functools
+import os
+import sqlite3
+
+import numpy as np
+
+
+FRAME_DTYPE = [
+    ('frame_number', 'i8'),
+    ('pos_x', 'f8'),
+    ('pos_y', 'f8'),
+    ('pos_z', 'f8'),
+    ('timestamp', 'f8'),
+]
+
+
+# columns read by default, where present
+FRAME_COLUMNS = [name for name, _ in FRAME_DTYPE]
+
+# bytes at the end of a file checked for malformed (e.g., truncated) rows
+TAIL_SIZE = 4096
+
+
+def load_csv(path: str, columns: list | None = None) -> np.ndarray:
+    """Load marker rows from a recorded CSV file.
+
+    Only the columns needed are parsed, by NumPy's (compiled) loadtxt. Rows at the
+    end of the file that are malformed, e.g., cut short when recording was
+    interrupted, are left out.
+
+    Args:
+        path (str): Path to the CSV file
+        columns (list, optional): Columns to read; others are skipped unparsed.
+            Defaults to None (frame_number, pos_x, pos_y, pos_z and, if recorded,
+            timestamp).
+
+    Returns:
+        np.ndarray: Structured array of marker rows with the columns read
+            (columns outside FRAME_DTYPE are read as strings)
+
+    Raises:
+        ValueError: If data format is invalid, or a requested column is missing
+    """
+    with open(path, 'r') as file:
+        header = file.readline()
+
+    schema = _csv_schema(header, None if columns is None else tuple(columns))
+    usecols, dtype, _ = schema
+
+    rows = _row_count(path, schema)
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+
+    return np.loadtxt(
+        path,
+        delimiter=',',
+        skiprows=1,
+        usecols=usecols,
+        dtype=dtype,
+        max_rows=rows,
+        ndmin=1,
+    )
+
+
+def as_frames(frames: np.ndarray) -> np.ndarray:
+    """Return marker rows as FRAME_DTYPE, however (and whenever) they were recorded.
+
+    Fields outside FRAME_DTYPE are dropped, and timestamps missing from rows
+    recorded without them are NaN, as sinks store them.
+
+    Args:
+        frames (np.ndarray): Structured array of marker rows with (at least) fields
+            frame_number, pos_x, pos_y, pos_z
+
+    Returns:
+        np.ndarray: Structured array of the rows, as FRAME_DTYPE
+    """
+    result = np.empty(len(frames), dtype=FRAME_DTYPE)
+    for col, _ in FRAME_DTYPE:
+        result[col] = frames[col] if col in frames.dtype.names else np.nan
+    return result
+
+
+@functools.lru_cache(maxsize=32)
+def _csv_schema(header: str, columns: tuple | None) -> tuple:
+    """Return column indices, dtype & field count for files with a given header.
+
+    Cached, as every trial file recorded with the same columns shares its schema.
+    """
+    names = header.strip().split(',')
+
+    if any(col not in names for col in ['frame_number', 'pos_x', 'pos_y', 'pos_z']):
+        raise ValueError(
+            'Data must contain columns frame_number, pos_x, pos_y, pos_z.'
+        )
+
+    if columns is None:
+        columns = tuple(name for name in names if name in FRAME_COLUMNS)
+    elif any(col not in names for col in columns):
+        raise ValueError(f'Data lacks columns: {set(columns) - set(names)}')
+
+    types = dict(FRAME_DTYPE)
+    dtype = np.dtype([(col, types.get(col, 'U32')) for col in columns])
+    usecols = tuple(names.index(col) for col in columns)
+
+    return usecols, dtype, len(names)
+
+
+def _row_count(path: str, schema: tuple) -> int:
+    """Return the number of data rows in a file, less any malformed trailing rows."""
+    usecols, dtype, field_count = schema
+
+    lines = 0
+    with open(path, 'rb') as file:
+        while chunk := file.read(1 << 20):
+            lines += chunk.count(b'\n')
+
+        size = file.tell()
+        file.seek(max(0, size - TAIL_SIZE))
+        tail = file.read().split(b'\n')
+
+    # last line lacks a newline (where the file was cut short)
+    if tail[-1]:
+        lines += 1
+    else:
+        tail.pop()
+
+    # first line of the tail is the header, or a fragment of a row
+    rows = lines - 1
+    for line in reversed(tail[1:]):
+        if _well_formed(line, usecols, dtype, field_count):
+            break
+        rows -= 1
+
+    return max(rows, 0)
+
+
+def _well_formed(line: bytes, usecols: tuple, dtype: np.dtype, field_count: int) -> bool:
+    fields = line.strip().split(b',')
+    if len(fields) != field_count:
+        return False
+
+    try:
+        for index, name in zip(usecols, dtype.names):
+            kind = dtype[name].kind
+            if kind == 'i':
+                int(fields[index])
+            elif kind == 'f':
+                float(fields[index])
+    except ValueError:
+        return False
+
+    return True
+
+
+class CSVSink(object):
+    """Stores each committed trial as its own CSV file.
+
+    Attributes:
+        path (str): Path to the CSV file for the current trial
+    """
+
+    def __init__(self, path: str = ''):
+        """Initialize the CSVSink object.
+
+        Args:
+            path (str, optional): Path to the trial's CSV file. Defaults to "".
+        """
+        self.path = path
+
+    def begin(self) -> None:
+        """Check that a new trial can be recorded.
+
+        Raises:
+            ValueError: If path is unset
+        """
+        if self.path == '':
+            raise ValueError('No data directory was set.')
+
+    def commit(self, frames: np.ndarray) -> None:
+        """Write a trial's marker rows to its CSV file, in one go.
+
+        Args:
+            frames (np.ndarray): Structured array of marker rows with fields
+                frame_number, pos_x, pos_y, pos_z
+        """
+        with open(self.path, 'w', newline='') as file:
+            file.write(','.join(frames.dtype.names) + '\n')
+            np.savetxt(file, frames, delimiter=',', fmt='%s')
+
+    def read(self, num_frames: int) -> np.ndarray:
+        """Read the most recent frames from a previously recorded trial file.
+
+        Args:
+            num_frames (int): Number of most recent frames to return
+
+        Returns:
+            np.ndarray: Structured array of marker rows with fields frame_number,
+                pos_x, pos_y, pos_z (and timestamp, if recorded); empty, with
+                FRAME_DTYPE fields, if the file holds no rows
+
+        Raises:
+            ValueError: If path is unset or data format is invalid
+            FileNotFoundError: If data file does not exist
+        """
+        if self.path == '':
+            raise ValueError('Must specify data directory.')
+
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(
+                f'No data directory present at:\n{self.path}'
+            )
+
+        frames = load_csv(self.path)
+        if len(frames) == 0:
+            # header only, e.g., recording stopped before the first frame
+            return np.zeros(0, dtype=FRAME_DTYPE)
+
+        # Calculate which frames to include
+        last_frame = frames['frame_number'][-1]
+        lookback = last_frame - num_frames
+
+        # Filter for relevant frames
+        return frames[frames['frame_number'] > lookback]
+
+
+class SQLiteSink(object):
+    """Stores committed trials in a trajectory table within an SQLite database.
+
+    Each trial is inserted by a single executemany, within one transaction. Rows
+    are keyed by participant, block, and trial, and indexed for retrieval.
+
+    Attributes:
+        database_path (str): Path to the SQLite database
+        table (str): Name of the trajectory table
+        key (dict): participant_id, block_num, and trial_num of the current trial
+    """
+
+    KEY_COLUMNS = ('participant_id', 'block_num', 'trial_num')
+
+    def __init__(self, database_path: str, table: str = 'trajectories'):
+        """Initialize the SQLiteSink object.
+
+        Args:
+            database_path (str): Path to the SQLite database
+            table (str, optional): Name of the trajectory table. Defaults to "trajectories".
+        """
+        self.database_path = database_path
+        self.table = table
+        self.key = {}
+
+        self.__connection = None
+
+    def __connect(self) -> sqlite3.Connection:
+        if self.__connection is None:
+            self.__connection = sqlite3.connect(
+                self.database_path, timeout=5.0, isolation_level=None
+            )
+            self.__connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                'id integer primary key autoincrement not null, '
+                'participant_id integer not null, '
+                'block_num integer not null, '
+                'trial_num integer not null, '
+                'frame_number integer not null, '
+                'pos_x real not null, '
+                'pos_y real not null, '
+                'pos_z real not null, '
+                'timestamp real)'
+            )
+            # tables created before timestamps were recorded lack the column
+            columns = [
+                row[1]
+                for row in self.__connection.execute(f'PRAGMA table_info({self.table})')
+            ]
+            if 'timestamp' not in columns:
+                self.__connection.execute(
+                    f'ALTER TABLE {self.table} ADD COLUMN timestamp real'
+                )
+            self.__connection.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_trial_frame '
+                f'ON {self.table} ({", ".join(self.KEY_COLUMNS)}, frame_number)'
+            )
+        return self.__connection
+
+    def begin(self) -> None:
+        """Check that a new trial can be recorded.
+
+        Raises:
+            ValueError: If key is missing any of participant_id, block_num, trial_num
+        """
+        if any(col not in self.key for col in self.KEY_COLUMNS):
+            raise ValueError(
+                'Key must specify participant_id, block_num, trial_num.'
+            )
+
+    def commit(self, frames: np.ndarray) -> None:
+        """Insert a trial's marker rows within a single transaction.
+
+        Args:
+            frames (np.ndarray): Structured array of marker rows with fields
+                frame_number, pos_x, pos_y, pos_z, timestamp
+        """
+        key_values = tuple(self.key[col] for col in self.KEY_COLUMNS)
+        rows = [
+            key_values + row
+            for row in frames[
+                ['frame_number', 'pos_x', 'pos_y', 'pos_z', 'timestamp']
+            ].tolist()
+        ]
+
+        connection = self.__connect()
+        with connection:
+            connection.execute('BEGIN')
+            connection.executemany(
+                f'INSERT INTO {self.table} ({", ".join(self.KEY_COLUMNS)}, '
+                'frame_number, pos_x, pos_y, pos_z, timestamp) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+
+    def read(self, participant_id: int, block_num: int, trial_num: int) -> np.ndarray:
+        """Read all frames stored for a given trial.
+
+        Args:
+            participant_id (int): Participant the trial belongs to
+            block_num (int): Block number of the trial
+            trial_num (int): Trial number within the block
+
+        Returns:
+            np.ndarray: Structured array of marker rows with fields frame_number,
+                pos_x, pos_y, pos_z, timestamp
+        """
+        where = ' AND '.join(f'{col} = ?' for col in self.KEY_COLUMNS)
+        rows = (
+            self.__connect()
+            .execute(
+                f'SELECT frame_number, pos_x, pos_y, pos_z, timestamp FROM {self.table} '
+                f'WHERE {where} ORDER BY frame_number, id',
+                (participant_id, block_num, trial_num),
+            )
+            .fetchall()
+        )
+
+        # rows stored without a timestamp read back as NaN
+        rows = [row[:4] + (np.nan if row[4] is None else row[4],) for row in rows]
+        return np.array(rows, dtype=FRAME_DTYPE)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+
+class ArchiveSink(object):
+    """Appends committed trials to a per-participant TrialArchive.
+
+    Attributes:
+        archive (TrialArchive): Archive trials are appended to
+        key (dict): block_num and trial_num of the current trial, plus any other
+            details to index the trial by
+    """
+
+    def __init__(self, path: str):
+        """Initialize the ArchiveSink object.
+
+        Args:
+            path (str): Path to the participant's archive file
+        """
+        # zipfile is only worth importing when trials are actually archived
+        from .TrialArchive import TrialArchive
+
+        self.archive = TrialArchive(path)
+        self.key = {}
+
+    def begin(self) -> None:
+        """Check that a new trial can be recorded.
+
+        Raises:
+            ValueError: If key is missing either of block_num, trial_num
+        """
+        if 'block_num' not in self.key or 'trial_num' not in self.key:
+            raise ValueError('Key must specify block_num, trial_num.')
+
+    def commit(self, frames: np.ndarray) -> None:
+        """Append a trial's marker rows to the archive.
+
+        Args:
+            frames (np.ndarray): Structured array of marker rows with fields
+                frame_number, pos_x, pos_y, pos_z
+        """
+        self.archive.append(frames, **self.key)
+
+
+class StreamSink(object):
+    """Appends committed trials to a per-participant compressed trajectory stream.
+
+    Each trial is encoded as one chunk as soon as it is committed (see
+    TrajectoryWriter), so the session is compressed as it is recorded.
+
+    Attributes:
+        path (str): Path to the participant's stream file
+        quantum (float | None): Step positions are rounded to; None if exact
+        key (dict): block_num and trial_num of the current trial, plus any other
+            details to label the trial's chunk with
+    """
+
+    def __init__(self, path: str, quantum: float | None = None):
+        """Initialize the StreamSink object.
+
+        Args:
+            path (str): Path to the participant's stream file
+            quantum (float, optional): Step to round positions to. Defaults to None
+                (exact).
+        """
+        self.path = path
+        self.quantum = quantum
+        self.key = {}
+
+        self.__writer = None
+
+    def begin(self) -> None:
+        """Check that a new trial can be recorded.
+
+        Raises:
+            ValueError: If key is missing either of block_num, trial_num
+        """
+        if 'block_num' not in self.key or 'trial_num' not in self.key:
+            raise ValueError('Key must specify block_num, trial_num.')
+
+    def commit(self, frames: np.ndarray) -> None:
+        """Append a trial's marker rows to the stream, as one chunk.
+
+        Args:
+            frames (np.ndarray): Structured array of marker rows with fields
+                frame_number, pos_x, pos_y, pos_z
+        """
+        if self.__writer is None:
+            from .TrajectoryCodec import TrajectoryWriter
+
+            self.__writer = TrajectoryWriter(self.path, quantum=self.quantum)
+        self.__writer.write(frames, **self.key)
+
+    def close(self) -> None:
+        """Close the stream file."""
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
@@ -0,0 +1,273 @@
+import json
+import os
+import socket
+
+import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
+
+
+class ScreenCalibration(object):
+    """Maps tracker positions onto screen pixels.
+
+    The mapping is a projective transform of homogeneous tracker coordinates,
+    pixel ~ matrix @ (x, y, z, 1); an affine mapping is the special case whose
+    last row is (0, 0, 0, 1). The screen's surface may also be given as a plane in
+    tracker space, so that how far a position lies from the screen is known.
+
+    Calibrations are fit (see fit()) from fingertip positions recorded at known
+    screen locations, and cached per station (see cached()), as they only change
+    when the tracker or display is moved.
+
+    Attributes:
+        matrix (np.ndarray): 3 x 4 transform from tracker (mm) to screen (px)
+        plane (np.ndarray | None): Unit normal (pointing away from the screen) and
+            offset of the screen's plane, as (nx, ny, nz, d) with n . p + d = 0 on
+            the screen; None if unknown
+        error (float | None): RMS error (px) of the fit at calibration points;
+            None if not fitted
+    """
+
+    def __init__(self, matrix, plane=None, error: float | None = None):
+        """Initialize the ScreenCalibration object.
+
+        Args:
+            matrix (array-like): 2 x 4 (affine) or 3 x 4 (projective) transform
+            plane (array-like, optional): Screen plane as (nx, ny, nz, d); the normal
+                need not be of unit length. Defaults to None.
+            error (float, optional): RMS error of the fit (px). Defaults to None.
+
+        Raises:
+            ValueError: If matrix is not 2 x 4 or 3 x 4
+            ValueError: If plane is not 4 values with a non-zero normal
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+
+        if matrix.shape == (2, 4):
+            matrix = np.vstack([matrix, [0.0, 0.0, 0.0, 1.0]])
+        elif matrix.shape != (3, 4):
+            raise ValueError('Calibration matrix must be 2 x 4 or 3 x 4.')
+        self.matrix = matrix
+
+        self.plane = None
+        if plane is not None:
+            plane = np.asarray(plane, dtype=np.float64)
+            if plane.shape != (4,) or not np.any(plane[:3]):
+                raise ValueError('Screen plane must be given as (nx, ny, nz, d).')
+            self.plane = plane / np.linalg.norm(plane[:3])
+
+        self.error = error
+
+    @classmethod
+    def fit(
+        cls, tracker_points, screen_points, model: str = 'affine'
+    ) -> 'ScreenCalibration':
+        """Fit a calibration from tracker positions recorded at known screen locations.
+
+        Calibration points are taken to lie on the screen: a plane is fit to them
+        first, and positions are mapped onto the screen from their projection onto
+        that plane, so positions off the screen map to the pixel beneath them.
+
+        Args:
+            tracker_points (array-like): (n, 3) positions in tracker space (mm)
+            screen_points (array-like): (n, 2) screen locations touched (px)
+            model (str, optional): 'affine' (needs 3+ points) or 'projective' (4+
+                points; also corrects for keystone, e.g., an off-axis tracker).
+                Defaults to 'affine'.
+
+        Returns:
+            ScreenCalibration: Fitted calibration, knowing the screen's plane
+
+        Raises:
+            ValueError: If model is unknown, too few points are given, or point
+                counts differ
+        """
+        tracker_points = np.asarray(tracker_points, dtype=np.float64)
+        screen_points = np.asarray(screen_points, dtype=np.float64)
+
+        if model not in ['affine', 'projective']:
+            raise ValueError("Model must be one of: 'affine', 'projective'")
+        if len(tracker_points) != len(screen_points):
+            raise ValueError('Tracker & screen points must be paired.')
+        if len(tracker_points) < (3 if model == 'affine' else 4):
+            raise ValueError(f'Too few calibration points for {model} model.')
+
+        # in-plane axes of the screen, in tracker space
+        centre = tracker_points.mean(axis=0)
+        _, _, axes = np.linalg.svd(tracker_points - centre)
+        to_plane = np.zeros((3, 4))
+        to_plane[:2, :3] = axes[:2]
+        to_plane[:2, 3] = -axes[:2] @ centre
+        to_plane[2, 3] = 1.0
+
+        plane_points = tracker_points @ to_plane[:2, :3].T + to_plane[:2, 3]
+        affine = _fit_affine(plane_points, screen_points)
+        if model == 'affine':
+            matrix = affine @ to_plane
+        else:
+            matrix = _fit_homography(plane_points, screen_points) @ to_plane
+
+        # normal faces the viewer: screen x runs right & y down, so x cross y
+        # points into the screen
+        in_plane = axes[:2].T @ np.linalg.inv(affine[:2, :2])
+        normal = -np.cross(in_plane[:, 0], in_plane[:, 1])
+        normal /= np.linalg.norm(normal)
+        plane = np.append(normal, -normal @ centre)
+
+        calibration = cls(matrix, plane)
+        residuals = calibration.to_screen(tracker_points) - screen_points
+        calibration.error = float(np.sqrt(np.mean(np.sum(residuals**2, axis=1))))
+        return calibration
+
+    @staticmethod
+    def station_path(directory: str, station: str | None = None) -> str:
+        """Return where a station's calibration is cached.
+
+        Args:
+            directory (str): Directory calibrations are cached in
+            station (str, optional): Station name. Defaults to None (this host's).
+        """
+        if station is None:
+            station = socket.gethostname()
+        return os.path.join(directory, f'{station}.json')
+
+    @classmethod
+    def cached(
+        cls, directory: str, station: str | None = None
+    ) -> 'ScreenCalibration | None':
+        """Load a station's cached calibration, or None if it has none (yet).
+
+        Args:
+            directory (str): Directory calibrations are cached in
+            station (str, optional): Station name. Defaults to None (this host's).
+        """
+        path = cls.station_path(directory, station)
+        if not os.path.exists(path):
+            return None
+        return cls.load(path)
+
+    def cache(self, directory: str, station: str | None = None) -> str:
+        """Save the calibration as a station's cached calibration.
+
+        Args:
+            directory (str): Directory calibrations are cached in (created if need be)
+            station (str, optional): Station name. Defaults to None (this host's).
+
+        Returns:
+            str: Path calibration was saved to
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = self.station_path(directory, station)
+        self.save(path)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'ScreenCalibration':
+        """Read a calibration saved by save().
+
+        Raises:
+            FileNotFoundError: If there is no calibration at path
+        """
+        with open(path) as f:
+            saved = json.load(f)
+        return cls(saved['matrix'], saved.get('plane'), saved.get('error'))
+
+    def save(self, path: str) -> None:
+        """Write the calibration to path (as JSON)."""
+        saved = {'matrix': self.matrix.tolist()}
+        if self.plane is not None:
+            saved['plane'] = self.plane.tolist()
+        if self.error is not None:
+            saved['error'] = self.error
+
+        with open(path, 'w') as f:
+            json.dump(saved, f, indent=2)
+
+    def to_screen(self, positions, out: np.ndarray | None = None):
+        """Map tracker positions onto the screen.
+
+        Whole buffers are mapped in one call, so positions can be taken into
+        screen space every frame.
+
+        Args:
+            positions (array-like | np.ndarray): A single (x, y, z) position; an
+                (n, 3) array of positions; or a structured array of frames (or
+                centroids) with fields pos_x, pos_y, pos_z. In tracker space (mm).
+            out (np.ndarray, optional): (n, 2) array to write screen positions into
+                (arrays only). Defaults to None.
+
+        Returns:
+            tuple | np.ndarray: (x, y) screen position (px) for a single position,
+                otherwise an (n, 2) array of them
+        """
+        if isinstance(positions, np.ndarray) and positions.dtype.names:
+            # a view, where fields lie side by side as in FRAME_DTYPE
+            positions = structured_to_unstructured(
+                positions[['pos_x', 'pos_y', 'pos_z']]
+            )
+        else:
+            positions = np.asarray(positions, dtype=np.float64)
+
+        if positions.ndim == 1:
+            x, y, w = self.matrix[:, :3] @ positions + self.matrix[:, 3]
+            return x / w, y / w
+
+        mapped = positions @ self.matrix[:, :3].T
+        mapped += self.matrix[:, 3]
+
+        if out is None:
+            out = np.empty((len(positions), 2), dtype=np.float64)
+        np.divide(mapped[:, :2], mapped[:, 2:], out=out)
+        return out
+
+    def depth(self, position) -> float | None:
+        """Return how far a tracker position lies from the screen's plane.
+
+        Args:
+            position (array-like): (x, y, z) position in tracker space (mm)
+
+        Returns:
+            float | None: Signed distance (mm; positive in front of the screen), or
+                None if the screen's plane is unknown
+        """
+        if self.plane is None:
+            return None
+        return float(self.plane[:3] @ np.asarray(position) + self.plane[3])
+
+
+def _fit_affine(points: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Least squares 2D affine transform, as a 3 x 3 homogeneous matrix."""
+    design = np.column_stack([points, np.ones(len(points))])
+    solution, *_ = np.linalg.lstsq(design, targets, rcond=None)
+    return np.vstack([solution.T, [0.0, 0.0, 1.0]])
+
+
+def _normalizer(points: np.ndarray) -> np.ndarray:
+    """Similarity moving points to the origin, at mean distance sqrt(2) from it."""
+    centre = points.mean(axis=0)
+    scale = np.sqrt(2) / np.mean(np.linalg.norm(points - centre, axis=1))
+    return np.array(
+        [
+            [scale, 0.0, -scale * centre[0]],
+            [0.0, scale, -scale * centre[1]],
+            [0.0, 0.0, 1.0],
+        ]
+    )
+
+
+def _fit_homography(points: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """2D projective transform by normalized direct linear transformation."""
+    from_norm = _normalizer(points)
+    to_norm = _normalizer(targets)
+
+    src = points @ from_norm[:2, :2].T + from_norm[:2, 2]
+    dst = targets @ to_norm[:2, :2].T + to_norm[:2, 2]
+
+    rows = []
+    for (x, y), (u, v) in zip(src, dst):
+        rows.append([-x, -y, -1.0, 0.0, 0.0, 0.0, u * x, u * y, u])
+        rows.append([0.0, 0.0, 0.0, -x, -y, -1.0, v * x, v * y, v])
+    _, _, vt = np.linalg.svd(np.asarray(rows))
+    homography = vt[-1].reshape(3, 3)
+
+    homography = np.linalg.inv(to_norm) @ homography @ from_norm
+    return homography / homography[2, 2]
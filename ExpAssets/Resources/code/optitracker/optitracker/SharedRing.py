@@ -0,0 +1,179 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# layout of the segment's header: messages written, slot count, markers per slot
+HEADER_DTYPE = np.dtype('<i8')
+HEADER_SIZE = 3
+
+
+def slot_dtype(max_markers: int) -> np.dtype:
+    """Return the dtype of a ring slot holding up to max_markers markers."""
+    return np.dtype(
+        [
+            ('seq', '<i8'),
+            ('set_index', '<i4'),
+            ('marker_count', '<i4'),
+            ('frame_number', '<i8'),
+            ('timestamp', '<f8'),
+            ('latency', '<f8'),
+            ('received', '<f8'),
+            ('markers', '<f4', (max_markers, 3)),
+        ]
+    )
+
+
+class SharedRing(object):
+    """Ring buffer of marker set messages in shared memory, for one writer process.
+
+    Each slot holds one marker set of one frame, and is guarded by a sequence
+    lock: the writer makes the slot's sequence number odd while writing, then sets
+    it to 2 * (message index + 1). Readers copy a slot out and check its sequence
+    number is unchanged and matches the message they expected, so torn or
+    overwritten slots are detected rather than read. Neither side ever blocks
+    the other.
+
+    Attributes:
+        name (str): Name of the shared memory segment, used to attach to it
+        capacity (int): Number of slots (messages) held before the oldest are
+            overwritten
+        max_markers (int): Number of markers a slot holds; surplus markers of a
+            set are left out
+
+    Note:
+        The creating process owns the segment, and unlinks it on close(); other
+        processes attach by name. The sequence lock relies on the writer's
+        stores becoming visible in program order, as they do on x86 (which Motive,
+        and so the acquisition host, runs on).
+    """
+
+    def __init__(
+        self, max_markers: int = 0, capacity: int = 8192, name: str | None = None
+    ):
+        """Create a ring, or attach to an existing one.
+
+        Args:
+            max_markers (int, optional): Markers per slot (when creating). Defaults to 0.
+            capacity (int, optional): Number of slots (when creating). Defaults to 8192.
+            name (str, optional): Name of an existing ring to attach to; if None, a
+                new ring is created. Defaults to None.
+
+        Raises:
+            ValueError: If creating, and max_markers or capacity is non-positive
+        """
+        if name is None:
+            if max_markers < 1:
+                raise ValueError('Slots must hold at least one marker.')
+            if capacity < 1:
+                raise ValueError('Capacity must be positive.')
+
+            size = HEADER_SIZE * HEADER_DTYPE.itemsize
+            size += capacity * slot_dtype(max_markers).itemsize
+
+            self.__memory = shared_memory.SharedMemory(create=True, size=size)
+            self.__owner = True
+
+            header = np.ndarray(HEADER_SIZE, HEADER_DTYPE, self.__memory.buf)
+            header[:] = (0, capacity, max_markers)
+        else:
+            self.__memory = shared_memory.SharedMemory(name=name)
+            self.__owner = False
+
+        self.__header = np.ndarray(HEADER_SIZE, HEADER_DTYPE, self.__memory.buf)
+        _, self.capacity, self.max_markers = (int(v) for v in self.__header)
+
+        self.__slots = np.ndarray(
+            self.capacity,
+            slot_dtype(self.max_markers),
+            self.__memory.buf,
+            offset=HEADER_SIZE * HEADER_DTYPE.itemsize,
+        )
+        self.__scratch = np.zeros(1, dtype=self.__slots.dtype)
+
+        self.name = self.__memory.name
+
+    @property
+    def written(self) -> int:
+        """Get the number of messages written since the ring was created."""
+        return int(self.__header[0])
+
+    def write(
+        self,
+        set_index: int,
+        frame_number: int,
+        markers: np.ndarray,
+        timestamp: float | None = None,
+        latency: float | None = None,
+        received: float | None = None,
+    ) -> None:
+        """Publish a marker set of one frame (writer process only).
+
+        Args:
+            set_index (int): Index of the marker set, as agreed with readers
+            frame_number (int): Frame identifier
+            markers (np.ndarray): Structured array with fields pos_x, pos_y, pos_z
+            timestamp (float, optional): Time (s) the frame was captured. Defaults to None.
+            latency (float, optional): Time (s) from capture to transmission. Defaults to None.
+            received (float, optional): time.perf_counter() when the writer received
+                the frame. Defaults to None.
+        """
+        index = int(self.__header[0])
+        slot = self.__slots[index % self.capacity]
+        count = min(len(markers), self.max_markers)
+
+        slot['seq'] = 2 * index + 1
+        slot['set_index'] = set_index
+        slot['marker_count'] = count
+        slot['frame_number'] = frame_number
+        slot['timestamp'] = np.nan if timestamp is None else timestamp
+        slot['latency'] = np.nan if latency is None else latency
+        slot['received'] = np.nan if received is None else received
+        for i, col in enumerate(['pos_x', 'pos_y', 'pos_z']):
+            slot['markers'][:count, i] = markers[col][:count]
+        slot['seq'] = 2 * index + 2
+
+        self.__header[0] = index + 1
+
+    def read(self, cursor: int) -> tuple[np.ndarray | None, int, int]:
+        """Copy out the next intact message at or after cursor.
+
+        Args:
+            cursor (int): Index of the next message to be read
+
+        Returns:
+            tuple: (slot, cursor, lost), where slot is a one-element array holding
+                the message (overwritten by the next read), or None if no message
+                is waiting; cursor is the index to read from next; and lost counts
+                messages overwritten before they could be read
+        """
+        written = self.written
+        lost = 0
+
+        # writer has lapped the reader: skip what has been overwritten
+        if written - cursor > self.capacity:
+            lost = written - self.capacity - cursor
+            cursor = written - self.capacity
+
+        while cursor < written:
+            expected = 2 * cursor + 2
+            slot = self.__slots[cursor % self.capacity : cursor % self.capacity + 1]
+
+            seq = int(slot['seq'][0])
+            self.__scratch[:] = slot
+            cursor += 1
+
+            if seq == expected and int(slot['seq'][0]) == expected:
+                return self.__scratch, cursor, lost
+
+            # overwritten while (or before) being copied
+            lost += 1
+
+        return None, cursor, lost
+
+    def close(self) -> None:
+        """Detach from the ring, and free it if this process created it."""
+        self.__header = None
+        self.__slots = None
+        self.__memory.close()
+        if self.__owner:
+            self.__memory.unlink()
@@ -0,0 +1,141 @@
+import time
+
+
+class StreamHealth(object):
+    """Monitors the live frame stream, for checks made every loop iteration.
+
+    Where StreamStats summarises a trial once it is over, StreamHealth reports on
+    the stream as it currently is: how fast frames are arriving, how regularly,
+    and how long it has been since the last one, so that a stalled or degraded
+    stream can be acted upon before a trial's data are spoiled.
+
+    Attributes:
+        window (int): Number of recent frames the frame rate is measured over
+
+    Note:
+        Updates and reports are a few arithmetic operations, so frames can be
+        accounted for on the acquisition thread, and reports polled freely. Fields
+        are updated one at a time without locking; a report taken mid-update may
+        mix two consecutive frames' values.
+    """
+
+    def __init__(self, marker_count: int, sample_rate: int = 120, window: int = 60):
+        """Initialize the StreamHealth object.
+
+        Args:
+            marker_count (int): Number of markers each frame is expected to hold
+            sample_rate (int, optional): Nominal frame rate (Hz), used to time frames
+                without timestamps. Defaults to 120.
+            window (int, optional): Number of recent frames to measure frame rate
+                over. Defaults to 60.
+
+        Raises:
+            ValueError: If window is less than 2
+        """
+        if window < 2:
+            raise ValueError('Window must span at least two frames.')
+
+        self.window = window
+        self.__marker_count = marker_count
+        self.__sample_rate = sample_rate
+
+        self.__started = None
+        self.reset()
+
+    def reset(self, started: float | None = None) -> None:
+        """Discard all accumulated state, e.g., when listening (re)starts.
+
+        Args:
+            started (float, optional): time.perf_counter() when the stream began;
+                until a frame arrives, time since the last frame is measured from
+                it. Defaults to None (now).
+        """
+        self.__started = time.perf_counter() if started is None else started
+
+        self.__frames = 0
+        self.__last_frame = None
+        self.__last_arrival = None
+        self.__last_transit = None
+        self.__jitter = 0.0
+        self.__dropped_frames = 0
+        self.__marker_mismatches = 0
+
+        # arrival times of recent frames, as a ring
+        self.__arrivals = [0.0] * self.window
+
+    def update(
+        self,
+        frame_number: int,
+        marker_count: int,
+        timestamp=None,
+        received: float | None = None,
+    ) -> None:
+        """Account for a newly received frame.
+
+        Args:
+            frame_number (int): Frame identifier
+            marker_count (int): Number of markers the frame held
+            timestamp (float, optional): Time (s) the frame was captured. Defaults to None.
+            received (float, optional): time.perf_counter() when the frame arrived.
+                Defaults to None (now).
+        """
+        if received is None:
+            received = time.perf_counter()
+
+        if self.__last_frame is not None:
+            if frame_number <= self.__last_frame:
+                return  # duplicate or out-of-order frame
+            self.__dropped_frames += frame_number - self.__last_frame - 1
+
+        if marker_count != self.__marker_count:
+            self.__marker_mismatches += 1
+
+        # jitter as in RFC 3550: smoothed variation in transit time between frames
+        if timestamp is None or timestamp != timestamp:  # i.e., NaN
+            timestamp = frame_number / self.__sample_rate
+        transit = received - timestamp
+        if self.__last_transit is not None:
+            self.__jitter += (abs(transit - self.__last_transit) - self.__jitter) / 16
+        self.__last_transit = transit
+
+        self.__arrivals[self.__frames % self.window] = received
+        self.__frames += 1
+        self.__last_frame = frame_number
+        self.__last_arrival = received
+
+    def report(self, backlog: int = 0) -> dict:
+        """Return the stream's current health.
+
+        Args:
+            backlog (int, optional): Messages received but not yet taken up by the
+                reader (see Optitracker.health()). Defaults to 0.
+
+        Returns:
+            dict: Mapping with keys frames (received since reset), frame_rate (Hz,
+                over the last window frames; None until two have arrived), jitter
+                (ms), dropped_frames (gaps in frame numbers), marker_mismatches
+                (frames not holding the expected number of markers), backlog and
+                since_last_frame (s; since reset, if no frame has arrived).
+        """
+        now = time.perf_counter()
+        frames = self.__frames
+
+        frame_rate = None
+        if frames >= 2:
+            span = min(frames, self.window)
+            newest = self.__arrivals[(frames - 1) % self.window]
+            oldest = self.__arrivals[(frames - span) % self.window]
+            if newest > oldest:
+                frame_rate = (span - 1) / (newest - oldest)
+
+        last = self.__last_arrival if self.__last_arrival is not None else self.__started
+
+        return {
+            'frames': frames,
+            'frame_rate': frame_rate,
+            'jitter': self.__jitter * 1000.0,
+            'dropped_frames': self.__dropped_frames,
+            'marker_mismatches': self.__marker_mismatches,
+            'backlog': backlog,
+            'since_last_frame': now - last,
+        }
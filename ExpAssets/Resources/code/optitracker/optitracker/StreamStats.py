@@ -0,0 +1,86 @@
+class StreamStats(object):
+    """Tracks the rate and latency of the frame stream over a trial.
+
+    Rate is measured from frame timestamps rather than assumed from the configured
+    sample rate, so a mismatched Motive frame rate or dropped frames show up in the
+    trial record.
+
+    Note:
+        Updates are a few arithmetic operations, cheap enough to make on the
+        acquisition thread for every frame.
+    """
+
+    def __init__(self):
+        """Initialize the StreamStats object."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard all accumulated state, e.g., at the start of a new trial."""
+        self.__frame_count = 0
+        self.__last_frame = None
+        self.__dropped_frames = 0
+
+        # (frame number, timestamp) of the first & last frames with timestamps
+        self.__first_timed = None
+        self.__last_timed = None
+
+        self.__latency_count = 0
+        self.__latency_total = 0.0
+        self.__latency_max = None
+
+    def update(self, frame_number: int, timestamp=None, latency=None) -> None:
+        """Account for a newly received frame.
+
+        Args:
+            frame_number (int): Frame identifier
+            timestamp (float, optional): Time (s) the frame was captured. Defaults to None.
+            latency (float, optional): Time (s) from capture to transmission of the
+                frame. Defaults to None.
+        """
+        if self.__last_frame is not None:
+            if frame_number <= self.__last_frame:
+                return  # duplicate or out-of-order frame
+            self.__dropped_frames += frame_number - self.__last_frame - 1
+
+        self.__last_frame = frame_number
+        self.__frame_count += 1
+
+        if timestamp is not None and timestamp == timestamp:  # i.e., not NaN
+            if self.__first_timed is None:
+                self.__first_timed = (frame_number, timestamp)
+            self.__last_timed = (frame_number, timestamp)
+
+        if latency is not None:
+            self.__latency_count += 1
+            self.__latency_total += latency
+            if self.__latency_max is None or latency > self.__latency_max:
+                self.__latency_max = latency
+
+    def summary(self) -> dict:
+        """Return stream statistics accumulated so far, keyed for database insertion.
+
+        Returns:
+            dict: Mapping with keys frame_rate (Hz, from timestamps of frames spanned),
+                dropped_frames (gaps in frame numbers), latency_mean and latency_max
+                (ms); values not (yet) available are reported as 'NA'.
+        """
+        frame_rate = 'NA'
+        if self.__first_timed is not None:
+            first_frame, first_timestamp = self.__first_timed
+            last_frame, last_timestamp = self.__last_timed  # type: ignore
+            if last_timestamp > first_timestamp:
+                frame_rate = (last_frame - first_frame) / (
+                    last_timestamp - first_timestamp
+                )
+
+        latency_mean = latency_max = 'NA'
+        if self.__latency_count:
+            latency_mean = self.__latency_total / self.__latency_count * 1000.0
+            latency_max = self.__latency_max * 1000.0
+
+        return {
+            'frame_rate': frame_rate,
+            'dropped_frames': self.__dropped_frames if self.__frame_count else 'NA',
+            'latency_mean': latency_mean,
+            'latency_max': latency_max,
+        }
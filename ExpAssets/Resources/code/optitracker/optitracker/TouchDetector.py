@@ -0,0 +1,106 @@
+import time
+
+from .ScreenCalibration import ScreenCalibration
+
+
+class TouchDetector(object):
+    """Detects when a tracked position touches on-screen targets.
+
+    Each frame's position is mapped onto the screen and tested against the
+    targets' boundaries as the frame arrives, so touches are timed at the tracker's
+    resolution rather than by when the screen's touch events are next pumped.
+
+    Attributes:
+        bounds (BoundarySet): Targets, in screen pixels (anything with a klibs-style
+            which_boundary(point, labels=None) method)
+        calibration (ScreenCalibration): Mapping from tracker to screen space
+        labels (list | None): Boundaries to test; if None, all of them
+        contact_distance (float): How close (mm) to the screen a position must be to
+            count as touching it
+    """
+
+    def __init__(
+        self,
+        bounds,
+        calibration: ScreenCalibration,
+        labels: list | None = None,
+        contact_distance: float = 10.0,
+    ):
+        """Initialize the TouchDetector object.
+
+        Args:
+            bounds (BoundarySet): Targets, in screen pixels
+            calibration (ScreenCalibration): Mapping from tracker to screen space,
+                knowing the screen's plane (as fitted calibrations do)
+            labels (list, optional): Boundaries to test. Defaults to None (all).
+            contact_distance (float, optional): Maximum distance (mm) from the screen
+                of a touch. Defaults to 10.0.
+
+        Raises:
+            ValueError: If contact_distance is negative, or the calibration doesn't
+                know the screen's plane (so positions hovering over a target would
+                count as touching it)
+        """
+        if contact_distance < 0:
+            raise ValueError('Contact distance cannot be negative.')
+        if calibration.plane is None:
+            raise ValueError('Touches cannot be detected without the screen plane.')
+
+        self.bounds = bounds
+        self.calibration = calibration
+        self.labels = labels
+        self.contact_distance = contact_distance
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget any touch detected, e.g., at the start of a new trial."""
+        self.__touch = None
+
+    @property
+    def touch(self) -> dict | None:
+        """Get the first touch detected since reset, or None.
+
+        The touch is a dict with keys label (boundary touched), frame_number,
+        timestamp (tracker clock, s; None if frames lack timestamps) and received
+        (time.perf_counter() when the frame arrived, for comparison with screen
+        events).
+        """
+        return self.__touch
+
+    def update(
+        self,
+        frame_number: int,
+        position,
+        timestamp=None,
+        received: float | None = None,
+    ) -> None:
+        """Test a newly received frame's position against the targets.
+
+        Args:
+            frame_number (int): Frame identifier
+            position (array-like): (x, y, z) position in tracker space (mm)
+            timestamp (float, optional): Time (s) the frame was captured. Defaults to None.
+            received (float, optional): time.perf_counter() when the frame arrived,
+                if it is tested later. Defaults to None (now).
+        """
+        if self.__touch is not None:
+            return
+
+        if timestamp is not None and timestamp != timestamp:  # i.e., NaN
+            timestamp = None
+
+        if abs(self.calibration.depth(position)) > self.contact_distance:
+            return
+
+        point = self.calibration.to_screen(position)
+        label = self.bounds.which_boundary(point, labels=self.labels)
+        if label is None:
+            return
+
+        self.__touch = {
+            'label': label,
+            'frame_number': frame_number,
+            'timestamp': timestamp,
+            'received': time.perf_counter() if received is None else received,
+        }
@@ -0,0 +1,319 @@
+import json
+import os
+import struct
+import warnings
+import zlib
+
+import numpy as np
+
+
+MAGIC = b'OTRJ\x01'
+
+# per chunk: metadata length, row count, payload length
+CHUNK_HEADER = struct.Struct('<III')
+
+POSITION_FIELDS = ('pos_x', 'pos_y', 'pos_z')
+
+# marks missing (NaN) positions once quantised
+MISSING = np.iinfo(np.int64).min
+
+
+class _TruncatedChunk(ValueError):
+    """Raised where a stream ends partway through a chunk."""
+
+
+class TrajectoryWriter(object):
+    """Appends trajectories to a compressed stream file, one chunk per write.
+
+    Each column of a chunk is delta encoded (per marker, from one frame to the
+    next), byte-shuffled and deflated, so smoothly varying positions cost a few
+    bits each rather than ~20 characters of CSV text. Chunks are self-contained and
+    written as they come, so a session can be compressed while it is recorded, and
+    read back one chunk at a time (see TrajectoryReader).
+
+    Positions are stored exactly by default. Given a quantum, they are instead
+    rounded to multiples of it (i.e., to within quantum / 2), which compresses
+    further still.
+
+    Attributes:
+        path (str): Path to the stream file
+        quantum (float | None): Step positions are rounded to; None if exact
+        level (int): zlib compression level
+    """
+
+    def __init__(self, path: str, quantum: float | None = None, level: int = 6):
+        """Initialize the TrajectoryWriter object, opening (or creating) the stream.
+
+        Args:
+            path (str): Path to the stream file; chunks are appended if it exists,
+                after any partial chunk (left by an interrupted session) is cut off
+            quantum (float, optional): Step (in recorded units) to round positions
+                to. Defaults to None (exact).
+            level (int, optional): zlib compression level. Defaults to 6.
+
+        Raises:
+            ValueError: If quantum is non-positive, or path is not a stream file
+        """
+        if quantum is not None and quantum <= 0:
+            raise ValueError('Quantum must be positive.')
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            size, complete = os.path.getsize(path), _complete_size(path)
+            if complete < size:
+                warnings.warn(
+                    f'Discarding {size - complete} bytes of a partial chunk at the '
+                    f'end of {path}'
+                )
+                os.truncate(path, complete)
+
+        self.path = path
+        self.quantum = quantum
+        self.level = level
+
+        self.__file = open(path, 'ab')
+        if self.__file.tell() == 0:
+            self.__file.write(MAGIC)
+            self.__file.flush()
+
+    def write(self, frames: np.ndarray, **info) -> None:
+        """Encode frames as a chunk, and append it to the stream.
+
+        Args:
+            frames (np.ndarray): Structured array of marker rows, ordered by frame
+            **info: Any other (JSON serializable) details to label the chunk with,
+                e.g., block_num and trial_num
+        """
+        metadata, payload = _encode(frames, self.quantum, self.level)
+        metadata['info'] = info
+        metadata = json.dumps(metadata).encode('utf-8')
+
+        self.__file.write(CHUNK_HEADER.pack(len(metadata), len(frames), len(payload)))
+        self.__file.write(metadata)
+        self.__file.write(payload)
+        self.__file.flush()
+
+    def close(self) -> None:
+        """Close the stream file."""
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryReader(object):
+    """Reads a stream file written by TrajectoryWriter, one chunk at a time.
+
+    Attributes:
+        path (str): Path to the stream file
+    """
+
+    def __init__(self, path: str):
+        """Initialize the TrajectoryReader object.
+
+        Args:
+            path (str): Path to the stream file
+        """
+        self.path = path
+        self.__index = None
+
+    def index(self) -> list:
+        """Return chunk details (one dict per chunk, in order of writing).
+
+        Entries hold the info the chunk was written with, plus its offset within
+        the file (see read()) and row_count. Only chunk headers are read. A partial
+        chunk ending the stream (e.g., where recording was interrupted) is left
+        out, with a warning.
+
+        Raises:
+            ValueError: If the file is not a stream file
+        """
+        if self.__index is None:
+            self.__index = [
+                dict(info, offset=offset, row_count=rows)
+                for offset, rows, info, _ in self.__chunks(decode=False)
+            ]
+        return self.__index
+
+    def read(self, offset: int) -> np.ndarray:
+        """Decode the single chunk at offset, without reading any other.
+
+        Args:
+            offset (int): Offset of the chunk, as given by index()
+
+        Returns:
+            np.ndarray: Structured array of the chunk's marker rows
+        """
+        with open(self.path, 'rb') as file:
+            file.seek(offset)
+            chunk = self.__next_chunk(file, decode=True)
+        if chunk is None:
+            raise ValueError(f'No chunk at offset {offset} of {self.path}')
+        return chunk[3]
+
+    def __iter__(self):
+        """Iterate over (info, frames) pairs, decoding one chunk at a time.
+
+        As with index(), a partial chunk ending the stream is skipped, with a warning.
+        """
+        for _, _, info, frames in self.__chunks(decode=True):
+            yield info, frames
+
+    def __len__(self) -> int:
+        return len(self.index())
+
+    def __chunks(self, decode: bool):
+        with open(self.path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'Not a trajectory stream: {self.path}')
+
+            while True:
+                try:
+                    chunk = self.__next_chunk(file, decode)
+                except _TruncatedChunk as error:
+                    warnings.warn(f'{error}; ignoring it and the rest of the stream')
+                    return
+                if chunk is None:
+                    return
+                yield chunk
+
+    def __next_chunk(self, file, decode: bool):
+        # (offset, row count, info, frames or None); None at end of stream
+        offset = file.tell()
+        header = file.read(CHUNK_HEADER.size)
+        if len(header) == 0:
+            return None
+        if len(header) < CHUNK_HEADER.size:
+            raise _TruncatedChunk(
+                f'Truncated chunk at offset {offset} of {self.path}'
+            )
+
+        metadata_size, rows, payload_size = CHUNK_HEADER.unpack(header)
+        metadata = file.read(metadata_size)
+        if decode:
+            payload = file.read(payload_size)
+            complete = len(payload) == payload_size
+        else:
+            file.seek(payload_size, os.SEEK_CUR)
+            complete = file.tell() <= os.fstat(file.fileno()).st_size
+
+        if len(metadata) < metadata_size or not complete:
+            raise _TruncatedChunk(
+                f'Truncated chunk at offset {offset} of {self.path}'
+            )
+
+        metadata = json.loads(metadata)
+        frames = _decode(metadata, rows, payload) if decode else None
+        return offset, rows, metadata['info'], frames
+
+
+def _complete_size(path: str) -> int:
+    """Size of a stream file up to the end of its last complete chunk."""
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'Not a trajectory stream: {path}')
+
+        size = os.fstat(file.fileno()).st_size
+        complete = file.tell()
+        while True:
+            header = file.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return complete
+            metadata_size, _, payload_size = CHUNK_HEADER.unpack(header)
+            end = file.tell() + metadata_size + payload_size
+            if end > size:
+                return complete
+            file.seek(end)
+            complete = end
+
+
+def _stride(frame_numbers: np.ndarray) -> int:
+    """Rows per frame, if constant (so deltas follow each marker); otherwise 1."""
+    if len(frame_numbers) == 0:
+        return 1
+    _, counts = np.unique(frame_numbers, return_counts=True)
+    return int(counts[0]) if np.all(counts == counts[0]) else 1
+
+
+def _encode(frames: np.ndarray, quantum: float | None, level: int):
+    """Return metadata (dict) and compressed payload (bytes) of a chunk."""
+    names = frames.dtype.names
+    stride = _stride(frames['frame_number']) if 'frame_number' in names else 1
+
+    columns = []
+    for name in names:
+        values = frames[name]
+
+        if quantum is not None and name in POSITION_FIELDS:
+            missing = np.isnan(values)
+            values = np.rint(np.where(missing, 0.0, values) / quantum).astype(np.int64)
+            values[missing] = MISSING
+        elif values.dtype.kind == 'f':
+            # exact: deltas of the bits (wrapping), so any value round-trips
+            values = values.view(f'<i{values.dtype.itemsize}')
+        elif values.dtype.kind in 'iu':
+            values = values.astype(np.int64)
+        else:
+            columns.append(np.ascontiguousarray(values).tobytes())
+            continue
+
+        deltas = values.copy()
+        deltas[stride:] -= values[:-stride]
+
+        # shuffle bytes, so the (mostly zero) high bytes of deltas lie together
+        shuffled = deltas.view(np.uint8).reshape(len(deltas), deltas.itemsize)
+        columns.append(shuffled.T.tobytes())
+
+    metadata = {
+        'dtype': [(name, frames.dtype[name].str) for name in names],
+        'stride': stride,
+        'quantum': quantum,
+    }
+    return metadata, zlib.compress(b''.join(columns), level)
+
+
+def _decode(metadata: dict, rows: int, payload: bytes) -> np.ndarray:
+    """Return the frames of a chunk, given its metadata and compressed payload."""
+    dtype = np.dtype([tuple(field) for field in metadata['dtype']])
+    stride = metadata['stride']
+    quantum = metadata['quantum']
+
+    frames = np.empty(rows, dtype=dtype)
+    data = zlib.decompress(payload)
+    start = 0
+
+    for name in dtype.names:
+        field = dtype[name]
+        quantised = quantum is not None and name in POSITION_FIELDS
+
+        if quantised or field.kind in 'iu':
+            stored = np.dtype('<i8')
+        elif field.kind == 'f':
+            stored = np.dtype(f'<i{field.itemsize}')
+        else:
+            size = rows * field.itemsize
+            frames[name] = np.frombuffer(data, field, rows, start)
+            start += size
+            continue
+
+        size = rows * stored.itemsize
+        shuffled = np.frombuffer(data, np.uint8, size, start)
+        start += size
+        deltas = shuffled.reshape(stored.itemsize, rows).T.copy().view(stored).ravel()
+
+        # undo deltas per marker (wrapping, as they were taken)
+        values = deltas.reshape(-1, stride).cumsum(axis=0, dtype=stored).ravel()
+
+        if quantised:
+            missing = values == MISSING
+            values = values * quantum
+            values[missing] = np.nan
+            frames[name] = values
+        elif field.kind == 'f':
+            frames[name] = values.view(field)
+        else:
+            frames[name] = values
+
+    return frames
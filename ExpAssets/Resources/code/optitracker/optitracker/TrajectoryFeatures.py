@@ -0,0 +1,223 @@
+from collections import deque
+import numpy as np
+
+
+AXES = {'x': 0, 'y': 1, 'z': 2}
+
+
+class TrajectoryFeatures(object):
+    """Incrementally derives per-trial kinematic summaries from centroid positions.
+
+    Features are updated one frame at a time as data arrive, so a trial's summary
+    is available as soon as the trial ends, without re-reading recorded data.
+
+    Attributes:
+        sample_rate (int): Data sampling rate in Hz
+        window_size (int): Number of frames velocity is averaged over
+        primary_axis (str): Axis of movement (for/back) used to detect reversals
+        lateral_axis (str): Axis along which lateral deviation is measured
+
+    Travel since a mark (see mark()) is kept as running totals, so checks such as
+    "has the hand drifted since the cue phase began" cost the same however long
+    the phase has run.
+
+    Note:
+        Velocity is distance travelled over the last window_size frames divided by
+        the time they span, matching Optitracker.velocity(axis='all') for evenly
+        spaced frames. Times are reported in ms relative to the first frame
+        received; they are taken from frame timestamps where given, and otherwise
+        assume frames are 1 / sample_rate apart.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 120,
+        window_size: int = 5,
+        primary_axis: str = 'z',
+        lateral_axis: str = 'x',
+    ):
+        """Initialize the TrajectoryFeatures object.
+
+        Args:
+            sample_rate (int, optional): Data sampling rate in Hz. Defaults to 120.
+            window_size (int, optional): Number of frames to average velocity over. Defaults to 5.
+            primary_axis (str, optional): Axis of movement. Defaults to 'z'.
+            lateral_axis (str, optional): Axis of lateral deviation. Defaults to 'x'.
+
+        Raises:
+            ValueError: If sample_rate or window_size are non-positive
+            ValueError: If either axis is not one of 'x', 'y', 'z'
+        """
+        if sample_rate <= 0:
+            raise ValueError('Sample rate must be positive.')
+
+        if window_size < 1:
+            raise ValueError('Window size must be postively non-zero.')
+
+        if primary_axis not in AXES or lateral_axis not in AXES:
+            raise ValueError('Feature axes must be one of: x, y, z')
+
+        self.__sample_rate = sample_rate
+        self.__window_size = window_size
+        self.__primary = AXES[primary_axis]
+        self.__lateral = AXES[lateral_axis]
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard all accumulated state, e.g., at the start of a new trial."""
+        self.__first_frame = None
+        self.__first_timestamp = None
+        self.__origin = None
+        self.__last_pos = None
+        self.__last_speed = None
+        self.__time = 0.0
+
+        # per-frame step lengths, durations & signed primary-axis steps within window
+        self.__steps = deque(maxlen=self.__window_size)
+        self.__intervals = deque(maxlen=self.__window_size)
+        self.__primary_steps = deque(maxlen=self.__window_size)
+
+        self.__path_length = 0.0
+        # position & path length as of the last mark (position set by first frame)
+        self.__mark = (None, 0.0)
+        self.__lateral_deviation = 0.0
+        self.__peak_velocity = None
+        self.__peak_velocity_time = None
+        self.__peak_velocity_dir = 0.0
+        self.__peak_acceleration = None
+        self.__peak_acceleration_time = None
+        self.__reversal_time = None
+
+    def update(self, frame_number: int, position, timestamp=None) -> None:
+        """Update features with the centroid position of a newly received frame.
+
+        Args:
+            frame_number (int): Frame identifier
+            position (array-like): Centroid (x, y, z) position for the frame
+            timestamp (float, optional): Time (s) the frame was captured. Defaults to
+                None (time is inferred from frame_number & sample_rate).
+        """
+        pos = np.asarray(position, dtype=np.float64)
+
+        if timestamp is not None and np.isnan(timestamp):
+            timestamp = None
+
+        if self.__first_frame is None:
+            self.__first_frame = frame_number
+            self.__first_timestamp = timestamp
+            self.__origin = pos
+            self.__last_pos = pos
+            if self.__mark[0] is None:
+                self.__mark = (pos, self.__mark[1])
+            return
+
+        if timestamp is not None and self.__first_timestamp is not None:
+            now = (timestamp - self.__first_timestamp) * 1000.0
+            interval = (now - self.__time) / 1000.0
+        else:
+            now = (frame_number - self.__first_frame) * 1000.0 / self.__sample_rate
+            interval = 1.0 / self.__sample_rate
+
+        if now <= self.__time:
+            return  # duplicate or out-of-order frame
+
+        self.__time = now
+
+        delta = pos - self.__last_pos
+        step = float(np.sqrt(np.dot(delta, delta)))
+        self.__last_pos = pos
+
+        self.__path_length += step
+        self.__steps.append(step)
+        self.__intervals.append(interval)
+        self.__primary_steps.append(float(delta[self.__primary]))
+
+        lateral = abs(float(pos[self.__lateral] - self.__origin[self.__lateral]))
+        if lateral > self.__lateral_deviation:
+            self.__lateral_deviation = lateral
+
+        # speed over window
+        speed = sum(self.__steps) / sum(self.__intervals)
+        direction = sum(self.__primary_steps)
+
+        if self.__peak_velocity is None or speed > self.__peak_velocity:
+            self.__peak_velocity = speed
+            self.__peak_velocity_time = self.__time
+            self.__peak_velocity_dir = direction
+            self.__reversal_time = None
+
+        elif (
+            self.__reversal_time is None
+            and direction * self.__peak_velocity_dir < 0
+        ):
+            self.__reversal_time = self.__time
+
+        if self.__last_speed is not None:
+            acceleration = (speed - self.__last_speed) / interval
+            if (
+                self.__peak_acceleration is None
+                or acceleration > self.__peak_acceleration
+            ):
+                self.__peak_acceleration = acceleration
+                self.__peak_acceleration_time = self.__time
+
+        self.__last_speed = speed
+
+    def mark(self) -> None:
+        """Start measuring travel from the latest frame, e.g., at a phase boundary.
+
+        If no frame has been received yet, travel is measured from the first.
+        """
+        self.__mark = (self.__last_pos, self.__path_length)
+
+    def travelled(self) -> float:
+        """Return the path length covered since the last mark (or first frame)."""
+        return self.__path_length - self.__mark[1]
+
+    def displacement(self, axis: str = 'all') -> float:
+        """Return how far the latest frame lies from the position at the last mark.
+
+        Args:
+            axis (str, optional): One of 'x', 'y', 'z' for the signed displacement
+                along that axis, or 'all' for the Euclidean distance. Defaults to 'all'.
+
+        Returns:
+            float: Displacement (0.0 if no frames have been received)
+
+        Raises:
+            ValueError: If axis is not one of 'x', 'y', 'z', 'all'
+        """
+        if axis != 'all' and axis not in AXES:
+            raise ValueError('Axis must be one of: x, y, z, all')
+
+        origin = self.__mark[0]
+        if origin is None or self.__last_pos is None:
+            return 0.0
+
+        delta = self.__last_pos - origin
+        if axis == 'all':
+            return float(np.sqrt(np.dot(delta, delta)))
+        return float(delta[AXES[axis]])
+
+    def summary(self) -> dict:
+        """Return features accumulated so far, keyed for database insertion.
+
+        Returns:
+            dict: Mapping with keys peak_velocity, peak_velocity_time, peak_acceleration,
+                peak_acceleration_time, path_length, lateral_deviation and reversal_time;
+                values not (yet) available are reported as 'NA'.
+        """
+
+        def na(value):
+            return 'NA' if value is None else value
+
+        return {
+            'peak_velocity': na(self.__peak_velocity),
+            'peak_velocity_time': na(self.__peak_velocity_time),
+            'peak_acceleration': na(self.__peak_acceleration),
+            'peak_acceleration_time': na(self.__peak_acceleration_time),
+            'path_length': self.__path_length,
+            'lateral_deviation': self.__lateral_deviation,
+            'reversal_time': na(self.__reversal_time),
+        }
@@ -0,0 +1,257 @@
+from threading import Lock
+
+import numpy as np
+
+from . import Kinematics
+
+
+AXES = {'x': 0, 'y': 1, 'z': 2}
+
+
+class TrajectoryIndex(object):
+    """Prefix sums over a trajectory, for constant-time range queries.
+
+    For each frame the index holds the centroid position and the path length
+    covered since the first frame. Displacement between two frames is then the
+    difference of their positions, and distance travelled the difference of their
+    path lengths, however many frames lie between. Frames can be appended as they
+    arrive (live), or the index built in one pass over a recorded trial.
+
+    Ranges are given as frame numbers, and located by binary search, so frames
+    dropped from the stream are handled; a range covers frames numbered start to
+    end (inclusive) that are present.
+
+    Note:
+        Frame times are frame timestamps where given, and otherwise frame_number /
+        sample_rate.
+    """
+
+    def __init__(self, sample_rate: int = 120, capacity: int = 4096):
+        """Initialize the TrajectoryIndex object.
+
+        Args:
+            sample_rate (int, optional): Data sampling rate in Hz, used to time
+                frames without timestamps. Defaults to 120.
+            capacity (int, optional): Number of frames to preallocate room for
+                (grows by doubling). Defaults to 4096.
+
+        Raises:
+            ValueError: If sample_rate or capacity is non-positive
+        """
+        if sample_rate <= 0:
+            raise ValueError('Sample rate must be positive.')
+        if capacity < 1:
+            raise ValueError('Capacity must be positive.')
+
+        self.__sample_rate = sample_rate
+        self.__lock = Lock()
+
+        self.__frames = np.zeros(capacity, dtype=np.int64)
+        self.__times = np.zeros(capacity, dtype=np.float64)
+        self.__positions = np.zeros((capacity, 3), dtype=np.float64)
+        self.__path = np.zeros(capacity, dtype=np.float64)
+        self.__count = 0
+
+    @classmethod
+    def from_frames(
+        cls, frames: np.ndarray, marker_count: int, sample_rate: int = 120
+    ) -> 'TrajectoryIndex':
+        """Build an index over a recorded trial's marker rows.
+
+        Args:
+            frames (np.ndarray): Structured array of marker rows, ordered by frame
+                (timestamps are used if every frame has one)
+            marker_count (int): Number of markers tracked per frame
+            sample_rate (int, optional): See __init__(). Defaults to 120.
+
+        Returns:
+            TrajectoryIndex: Index over the frames' centroids
+        """
+        positions = Kinematics.centroids(frames, marker_count)
+        index = cls(sample_rate, capacity=max(len(positions), 1))
+        index.extend(positions, Kinematics.frame_times(frames))
+        return index
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def reset(self) -> None:
+        """Drop all frames, e.g., at the start of a new trial."""
+        with self.__lock:
+            self.__count = 0
+
+    def append(self, frame_number: int, position, timestamp=None) -> None:
+        """Add a frame's (centroid) position to the end of the index.
+
+        Args:
+            frame_number (int): Frame identifier; must exceed those already indexed
+            position (array-like): Centroid (x, y, z) position for the frame
+            timestamp (float, optional): Time (s) the frame was captured. Defaults to None.
+        """
+        with self.__lock:
+            if self.__count and frame_number <= self.__frames[self.__count - 1]:
+                return  # duplicate or out-of-order frame
+
+            self.__reserve(1)
+            i = self.__count
+            self.__frames[i] = frame_number
+            self.__positions[i] = position
+            self.__times[i] = self.__time(frame_number, timestamp)
+
+            if i == 0:
+                self.__path[i] = 0.0
+            else:
+                step = self.__positions[i] - self.__positions[i - 1]
+                self.__path[i] = self.__path[i - 1] + np.sqrt(np.dot(step, step))
+
+            self.__count += 1
+
+    def extend(
+        self, positions: np.ndarray, timestamps: np.ndarray | None = None
+    ) -> None:
+        """Add many frames' positions to the end of the index in one pass.
+
+        Args:
+            positions (np.ndarray): Structured array of centroid positions (see
+                Kinematics.centroids()), following any frames already indexed
+            timestamps (np.ndarray, optional): Timestamp (s) of each position.
+                Defaults to None.
+        """
+        count = len(positions)
+        if count == 0:
+            return
+
+        with self.__lock:
+            self.__reserve(count)
+            start, end = self.__count, self.__count + count
+
+            self.__frames[start:end] = positions['frame_number']
+            for i, col in enumerate(['pos_x', 'pos_y', 'pos_z']):
+                self.__positions[start:end, i] = positions[col]
+
+            if timestamps is None:
+                np.divide(
+                    self.__frames[start:end],
+                    self.__sample_rate,
+                    out=self.__times[start:end],
+                )
+            else:
+                self.__times[start:end] = timestamps
+
+            # path length continues on from the last frame already indexed
+            first = max(start, 1)
+            if start == 0:
+                self.__path[0] = 0.0
+            steps = np.diff(self.__positions[first - 1 : end], axis=0)
+            lengths = np.sqrt(np.einsum('ij,ij->i', steps, steps))
+            np.cumsum(lengths, out=self.__path[first:end])
+            self.__path[first:end] += self.__path[first - 1]
+
+            self.__count = end
+
+    def distance(self, start: int, end: int, axis: str = 'all') -> float:
+        """Return distance travelled between two frames.
+
+        Args:
+            start (int): Frame number range begins at
+            end (int): Frame number range ends at (inclusive)
+            axis (str, optional): As in Kinematics.distances(): one of 'x', 'y', 'z'
+                for signed displacement along that axis, or 'all' for path length.
+                Defaults to 'all'.
+
+        Returns:
+            float: Distance travelled (0.0 if the range covers fewer than two frames)
+        """
+        return float(self.distances([start], [end], axis)[0])
+
+    def velocity(self, start: int, end: int, axis: str = 'all') -> float:
+        """Return mean velocity between two frames (see distance()).
+
+        Returns:
+            float: Distance travelled over time elapsed, in units/second (NaN if
+                the range covers fewer than two frames)
+        """
+        return float(self.velocities([start], [end], axis)[0])
+
+    def distances(self, starts, ends, axis: str = 'all') -> np.ndarray:
+        """Return distances travelled over many ranges at once (see distance()).
+
+        Args:
+            starts (array-like): Frame numbers ranges begin at
+            ends (array-like): Frame numbers ranges end at (inclusive)
+            axis (str, optional): See distance(). Defaults to 'all'.
+
+        Returns:
+            np.ndarray: Distance travelled over each range
+
+        Raises:
+            ValueError: If axis is not one of 'x', 'y', 'z', 'all'
+            LookupError: If no frames have been indexed
+        """
+        if axis != 'all' and axis not in AXES:
+            raise ValueError('Axis must be one of: x, y, z, all')
+
+        first, last = self.__locate(starts, ends)
+        return self.__span(first, last, axis)
+
+    def velocities(self, starts, ends, axis: str = 'all') -> np.ndarray:
+        """Return mean velocities over many ranges at once (see velocity()).
+
+        Returns:
+            np.ndarray: Mean velocity over each range
+        """
+        if axis != 'all' and axis not in AXES:
+            raise ValueError('Axis must be one of: x, y, z, all')
+
+        first, last = self.__locate(starts, ends)
+        elapsed = self.__times[last] - self.__times[first]
+        distance = self.__span(first, last, axis)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(elapsed > 0, distance / elapsed, np.nan)
+
+    def __locate(self, starts, ends) -> tuple[np.ndarray, np.ndarray]:
+        """Return indices of the first & last frames present within each range."""
+        with self.__lock:
+            count = self.__count
+        if count == 0:
+            raise LookupError('No frames have been indexed.')
+
+        frames = self.__frames[:count]
+        first = np.searchsorted(frames, starts, side='left')
+        last = np.searchsorted(frames, ends, side='right') - 1
+
+        # empty ranges collapse onto a single frame, i.e., cover no distance
+        np.clip(first, 0, count - 1, out=first)
+        np.clip(last, first, count - 1, out=last)
+        return first, last
+
+    def __span(self, first: np.ndarray, last: np.ndarray, axis: str) -> np.ndarray:
+        """Return distance travelled between frames at indices first & last."""
+        if axis == 'all':
+            return self.__path[last] - self.__path[first]
+
+        column = self.__positions[:, AXES[axis]]
+        return column[last] - column[first]
+
+    def __time(self, frame_number: int, timestamp) -> float:
+        if timestamp is None or np.isnan(timestamp):
+            return frame_number / self.__sample_rate
+        return timestamp
+
+    def __reserve(self, count: int) -> None:
+        # grow storage (under lock) so that count more frames fit
+        needed = self.__count + count
+        if needed <= len(self.__frames):
+            return
+
+        size = max(needed, 2 * len(self.__frames))
+        self.__frames = self.__grow(self.__frames, size)
+        self.__times = self.__grow(self.__times, size)
+        self.__positions = self.__grow(self.__positions, size)
+        self.__path = self.__grow(self.__path, size)
+
+    def __grow(self, array: np.ndarray, size: int) -> np.ndarray:
+        grown = np.zeros((size,) + array.shape[1:], dtype=array.dtype)
+        grown[: self.__count] = array[: self.__count]
+        return grown
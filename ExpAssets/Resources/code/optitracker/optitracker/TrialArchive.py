@@ -0,0 +1,152 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+
+
+class TrialArchive(object):
+    """A single-file, per-participant archive of trial recordings.
+
+    The archive is a zip file holding one compressed .npy member per trial, plus a
+    chunked trial index (one small compressed JSON member per appended trial). The
+    zip directory allows any trial to be read without decompressing the others, and
+    trials can be appended while a session is running.
+
+    Each append writes a copy of the archive alongside it, which then replaces the
+    archive; an append that is interrupted (e.g. by a crash) leaves the archive as
+    it was, rather than with a partly rewritten zip directory.
+
+    Attributes:
+        path (str): Path to the archive file
+
+    Note:
+        Trials are identified by block and trial number; names take the form
+        'Block_{block_num}_Trial_{trial_num}'.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the TrialArchive object.
+
+        Args:
+            path (str): Path to the archive file; created on first append if absent.
+        """
+        self.path = path
+        self.__index = None
+
+    @staticmethod
+    def trial_name(block_num: int, trial_num: int) -> str:
+        """Return the name under which a trial is archived."""
+        return f'Block_{block_num}_Trial_{trial_num}'
+
+    def append(self, frames: np.ndarray, block_num: int, trial_num: int, **info) -> str:
+        """Append a trial's frames to the archive.
+
+        Args:
+            frames (np.ndarray): Structured array of the trial's frame data
+            block_num (int): Block number of the trial
+            trial_num (int): Trial number within the block
+            **info: Any other (JSON serializable) details to index the trial by
+
+        Returns:
+            str: Name the trial was archived under
+
+        Raises:
+            ValueError: If the trial is already present in the archive
+        """
+        name = self.trial_name(block_num, trial_num)
+
+        buffer = io.BytesIO()
+        np.save(buffer, frames, allow_pickle=False)
+
+        entry = dict(info, name=name, block_num=block_num, trial_num=trial_num)
+        entry['frame_count'] = int(len(np.unique(frames['frame_number'])))
+        entry['row_count'] = int(len(frames))
+
+        descriptor, temp_path = tempfile.mkstemp(
+            prefix=os.path.basename(self.path) + '.',
+            suffix='.tmp',
+            dir=os.path.dirname(os.path.abspath(self.path)),
+        )
+        os.close(descriptor)
+        try:
+            mode = 'w'
+            if os.path.exists(self.path):
+                shutil.copyfile(self.path, temp_path)
+                mode = 'a'
+
+            with zipfile.ZipFile(temp_path, mode, zipfile.ZIP_DEFLATED) as archive:
+                # the zip directory is already loaded, so the index needn't be
+                members = archive.namelist()
+                if f'trials/{name}.npy' in members:
+                    raise ValueError(f'{name} already present in archive.')
+
+                position = sum(member.startswith('index/') for member in members)
+                archive.writestr(f'trials/{name}.npy', buffer.getvalue())
+                archive.writestr(f'index/{position:06d}.json', json.dumps(entry))
+
+            os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        if self.__index is not None:
+            self.__index[name] = entry
+
+        return name
+
+    def index(self) -> list:
+        """Return index entries (one dict per trial, in order of appending)."""
+        return list(self.__entries().values())
+
+    def read(self, block_num: int, trial_num: int) -> np.ndarray:
+        """Read a single trial's frames, without reading any other trial.
+
+        Args:
+            block_num (int): Block number of the trial
+            trial_num (int): Trial number within the block
+
+        Returns:
+            np.ndarray: Structured array of the trial's frame data
+
+        Raises:
+            KeyError: If the trial is not present in the archive
+        """
+        name = self.trial_name(block_num, trial_num)
+        if not os.path.exists(self.path):
+            raise KeyError(f'{name} not present in archive.')
+
+        with zipfile.ZipFile(self.path, 'r') as archive:
+            try:
+                info = archive.getinfo(f'trials/{name}.npy')
+            except KeyError:
+                raise KeyError(f'{name} not present in archive.') from None
+            with archive.open(info) as member:
+                return np.load(io.BytesIO(member.read()), allow_pickle=False)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__entries()
+
+    def __len__(self) -> int:
+        return len(self.__entries())
+
+    def __iter__(self):
+        """Iterate over (index entry, frames) pairs, one trial at a time."""
+        for entry in self.index():
+            yield entry, self.read(entry['block_num'], entry['trial_num'])
+
+    def __entries(self) -> dict:
+        # index entries by trial name, loaded on first use
+        if self.__index is None:
+            self.__index = {}
+            if os.path.exists(self.path):
+                with zipfile.ZipFile(self.path, 'r') as archive:
+                    for member in sorted(archive.namelist()):
+                        if member.startswith('index/'):
+                            entry = json.loads(archive.read(member))
+                            self.__index[entry['name']] = entry
+
+        return self.__index
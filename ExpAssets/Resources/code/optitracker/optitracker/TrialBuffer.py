@@ -0,0 +1,203 @@
+from threading import Lock
+
+import numpy as np
+
+from .RecordingSinks import FRAME_DTYPE
+from .Workspace import Workspace, allocate
+
+
+class TrialBuffer(object):
+    """Holds a trial's marker rows in memory until the trial is committed or discarded.
+
+    Rows are appended by the acquisition thread and queried by the experiment
+    thread. Nothing touches storage until commit(), so abandoning a trial is just a
+    matter of dropping the buffered rows.
+
+    Rows are kept in a preallocated array which is reused from trial to trial, and
+    only grows (doubling in size) should a trial outlast it.
+    """
+
+    def __init__(self, capacity: int = 16384):
+        """Initialize the TrialBuffer object.
+
+        Args:
+            capacity (int, optional): Number of marker rows to preallocate room for.
+                Defaults to 16384 (e.g., ~13 s of 10 markers at 120 Hz).
+        """
+        if capacity < 1:
+            raise ValueError('Capacity must be positive.')
+
+        self.__lock = Lock()
+        self.__rows = np.zeros(capacity, dtype=FRAME_DTYPE)
+        self.__count = 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __reserve(self, count: int) -> None:
+        # grow storage (under lock) so that count more rows fit
+        needed = self.__count + count
+        if needed > len(self.__rows):
+            rows = np.zeros(max(needed, 2 * len(self.__rows)), dtype=FRAME_DTYPE)
+            rows[: self.__count] = self.__rows[: self.__count]
+            self.__rows = rows
+
+    def append(self, rows) -> None:
+        """Buffer marker rows.
+
+        Args:
+            rows (list | np.ndarray): Marker dicts, each with frame_number, pos_x,
+                pos_y, pos_z and optionally timestamp; or a structured array with
+                those fields. Rows without a timestamp are buffered with NaN.
+        """
+        if isinstance(rows, np.ndarray):
+            with self.__lock:
+                self.__reserve(len(rows))
+                end = self.__count + len(rows)
+                for col, _ in FRAME_DTYPE:
+                    self.__rows[col][self.__count : end] = (
+                        rows[col] if col in rows.dtype.names else np.nan
+                    )
+                self.__count = end
+            return
+
+        rows = [
+            (
+                row['frame_number'],
+                row['pos_x'],
+                row['pos_y'],
+                row['pos_z'],
+                row.get('timestamp', np.nan),
+            )
+            for row in rows
+            if row is not None
+        ]
+        with self.__lock:
+            self.__reserve(len(rows))
+            for row in rows:
+                self.__rows[self.__count] = row
+                self.__count += 1
+
+    def latest(
+        self, num_frames: int, workspace: Workspace | None = None
+    ) -> np.ndarray:
+        """Return rows belonging to the most recent frames.
+
+        Frame numbers are assumed to increase over a trial, so the start of the
+        requested frames is found by binary search; cost scales with num_frames
+        rather than with trial length.
+
+        Args:
+            num_frames (int): Number of most recent frames to return
+            workspace (Workspace, optional): Buffers to copy rows into, rather than
+                allocating a new array. Defaults to None.
+
+        Returns:
+            np.ndarray: Structured array of marker rows with fields frame_number,
+                pos_x, pos_y, pos_z, timestamp
+
+        Raises:
+            LookupError: If no rows have been buffered
+        """
+        with self.__lock:
+            if self.__count == 0:
+                raise LookupError('No frames recorded for current trial.')
+
+            frame_numbers = self.__rows['frame_number'][: self.__count]
+            lookback = frame_numbers[-1] - num_frames
+            start = int(np.searchsorted(frame_numbers, lookback, side='right'))
+
+            return self.__tail(start, workspace)
+
+    @property
+    def timestamped(self) -> bool:
+        """Whether buffered rows carry timestamps (as judged by the latest row)."""
+        with self.__lock:
+            return self.__count > 0 and not np.isnan(
+                self.__rows['timestamp'][self.__count - 1]
+            )
+
+    def since(
+        self, timestamp: float, workspace: Workspace | None = None
+    ) -> np.ndarray:
+        """Return rows of frames captured at or after timestamp.
+
+        Timestamps are assumed to increase over a trial, so the start of the window
+        is found by binary search, as in latest().
+
+        Args:
+            timestamp (float): Start of the window, on the tracker's clock (s)
+            workspace (Workspace, optional): See latest(). Defaults to None.
+
+        Returns:
+            np.ndarray: Structured array of marker rows (see latest())
+
+        Raises:
+            LookupError: If no rows have been buffered
+            ValueError: If rows were buffered without timestamps
+        """
+        with self.__lock:
+            timestamps = self.__timestamps()
+            start = int(np.searchsorted(timestamps, timestamp, side='left'))
+            return self.__tail(start, workspace)
+
+    def within(
+        self, seconds: float, workspace: Workspace | None = None
+    ) -> np.ndarray:
+        """Return rows of frames captured within seconds of the latest frame.
+
+        Args:
+            seconds (float): Length of the window, back from the latest frame (s)
+            workspace (Workspace, optional): See latest(). Defaults to None.
+
+        Returns:
+            np.ndarray: Structured array of marker rows (see latest())
+
+        Raises:
+            LookupError: If no rows have been buffered
+            ValueError: If rows were buffered without timestamps
+        """
+        with self.__lock:
+            timestamps = self.__timestamps()
+            start = int(
+                np.searchsorted(timestamps, timestamps[-1] - seconds, side='left')
+            )
+            return self.__tail(start, workspace)
+
+    def __timestamps(self) -> np.ndarray:
+        # (under lock) timestamp index of buffered rows, sorted as they arrive
+        if self.__count == 0:
+            raise LookupError('No frames recorded for current trial.')
+
+        timestamps = self.__rows['timestamp'][: self.__count]
+        if np.isnan(timestamps[-1]):
+            raise ValueError('Frames were recorded without timestamps.')
+        return timestamps
+
+    def __tail(self, start: int, workspace: Workspace | None) -> np.ndarray:
+        # (under lock) copy out rows from start onwards
+        tail = allocate(workspace, 'frames', FRAME_DTYPE, self.__count - start)
+        tail[:] = self.__rows[start : self.__count]
+        return tail
+
+    def frames(self) -> np.ndarray:
+        """Return all buffered rows as a structured array."""
+        with self.__lock:
+            return self.__rows[: self.__count].copy()
+
+    def commit(self, sink) -> None:
+        """Store buffered rows via sink, then empty the buffer.
+
+        Args:
+            sink (CSVSink | SQLiteSink | ArchiveSink): Where the trial is stored
+        """
+        with self.__lock:
+            rows = self.__rows[: self.__count].copy()
+            self.__count = 0
+
+        sink.commit(rows)
+
+    def discard(self) -> None:
+        """Drop buffered rows without storing them."""
+        with self.__lock:
+            self.__count = 0
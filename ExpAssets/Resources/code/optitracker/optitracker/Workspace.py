@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class Workspace(object):
+    """Named output buffers, reused across repeated queries.
+
+    Each buffer is only (re)allocated when a query needs more room than it has,
+    and is then sized with headroom to spare. Once a trial's queries have warmed
+    up, they are served from existing buffers without allocating.
+
+    Attributes:
+        allocations (int): Number of times a buffer has been (re)allocated
+
+    Note:
+        Arrays handed out are views into the workspace, and are overwritten by the
+        next request for the same buffer; copy() anything that needs to be kept.
+    """
+
+    def __init__(self):
+        """Initialize the Workspace object."""
+        self.__buffers = {}
+        self.allocations = 0
+
+    def get(self, name: str, dtype, size: int) -> np.ndarray:
+        """Return a view of (at least) size elements from the named buffer.
+
+        Contents are left as-is from previous use; callers are expected to
+        overwrite them.
+
+        Args:
+            name (str): Buffer identifier
+            dtype (np.dtype | list): Element type of the buffer (a given name should
+                always be requested with the same dtype)
+            size (int): Number of elements needed
+
+        Returns:
+            np.ndarray: Array of exactly size elements
+        """
+        buffer = self.__buffers.get(name)
+
+        if buffer is None or len(buffer) < size:
+            buffer = np.zeros(max(2 * size, 1), dtype=dtype)
+            self.__buffers[name] = buffer
+            self.allocations += 1
+
+        return buffer[:size]
+
+    def arange(self, size: int) -> np.ndarray:
+        """Return a view of 0, 1, ..., size - 1 (as int64), filled only on (re)allocation."""
+        buffer = self.__buffers.get('arange')
+
+        if buffer is None or len(buffer) < size:
+            buffer = np.arange(max(2 * size, 1), dtype=np.int64)
+            self.__buffers['arange'] = buffer
+            self.allocations += 1
+
+        return buffer[:size]
+
+
+def allocate(workspace: Workspace | None, name: str, dtype, size: int) -> np.ndarray:
+    """Take an array from workspace, or allocate a fresh one if none is given."""
+    if workspace is None:
+        return np.zeros(size, dtype=dtype)
+    return workspace.get(name, dtype, size)
+
+
+def arange(workspace: Workspace | None, size: int) -> np.ndarray:
+    """Take 0, 1, ..., size - 1 from workspace, or allocate it if none is given."""
+    if workspace is None:
+        return np.arange(size, dtype=np.int64)
+    return workspace.arange(size)
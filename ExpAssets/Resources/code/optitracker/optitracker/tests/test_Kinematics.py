@@ -0,0 +1,115 @@
+import unittest
+import numpy as np
+
+from .. import Kinematics
+from ..Workspace import Workspace
+
+
+class TestKinematics(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # 3 markers per frame, centroid moving 1 unit per frame along each axis
+        num_frames = 6
+        self.frames = np.zeros(
+            num_frames * 3, dtype=Kinematics.POSITION_DTYPE
+        )
+        self.frames['frame_number'] = np.repeat(np.arange(1, num_frames + 1), 3)
+        offsets = np.tile([-1.0, 0.0, 1.0], num_frames)
+        for axis in ['pos_x', 'pos_y', 'pos_z']:
+            self.frames[axis] = self.frames['frame_number'] + offsets
+
+    def test_centroids(self):
+        """Test whole-trial centroid calculation."""
+        positions = Kinematics.centroids(self.frames, marker_count=3)
+        self.assertEqual(len(positions), 6)
+        np.testing.assert_array_equal(positions['frame_number'], np.arange(1, 7))
+        np.testing.assert_allclose(positions['pos_z'], np.arange(1, 7))
+
+    def test_distances(self):
+        """Test signed and Euclidean frame-to-frame distances."""
+        positions = Kinematics.centroids(self.frames, marker_count=3)
+
+        along_z = Kinematics.distances(positions, axis='z')
+        np.testing.assert_array_equal(along_z['frame_number'], np.arange(2, 7))
+        np.testing.assert_allclose(along_z['distance'], 1.0)
+
+        overall = Kinematics.distances(positions, axis='all')
+        np.testing.assert_allclose(overall['distance'], np.sqrt(3))
+
+        reversed_z = Kinematics.distances(positions[::-1], axis='z')
+        np.testing.assert_allclose(reversed_z['distance'], -1.0)
+
+    def test_velocities(self):
+        """Test frame-to-frame velocities."""
+        positions = Kinematics.centroids(self.frames, marker_count=3)
+        velocity = Kinematics.velocities(positions, sample_rate=120, axis='z')
+        np.testing.assert_allclose(velocity['velocity'], 120.0)
+
+    def test_timestamped_velocities(self):
+        """Test that velocities follow frame timestamps where frames are unevenly spaced."""
+        frames = np.zeros(
+            len(self.frames), dtype=Kinematics.POSITION_DTYPE + [('timestamp', 'f8')]
+        )
+        for col, _ in Kinematics.POSITION_DTYPE:
+            frames[col] = self.frames[col]
+        # second frame arrives late, third is dropped
+        frames['timestamp'] = np.repeat([0.0, 0.02, 0.03, 0.04, 0.05, 0.06], 3)
+
+        positions = Kinematics.centroids(frames, marker_count=3)
+        timestamps = Kinematics.frame_times(frames)
+        np.testing.assert_allclose(timestamps, [0.0, 0.02, 0.03, 0.04, 0.05, 0.06])
+
+        velocity = Kinematics.velocities(positions, 120, 'z', timestamps=timestamps)
+        np.testing.assert_allclose(velocity['velocity'], [50, 100, 100, 100, 100])
+
+        # without timestamps on every frame, spacing falls back to sample rate
+        frames['timestamp'][0] = np.nan
+        self.assertIsNone(Kinematics.frame_times(frames))
+
+    def test_single_frame(self):
+        """Test that a single frame yields no distances."""
+        positions = Kinematics.centroids(self.frames[:3], marker_count=3)
+        self.assertEqual(len(Kinematics.distances(positions)), 0)
+
+    def test_workspace(self):
+        """Test that results written into a workspace match, and reuse its buffers."""
+        workspace = Workspace()
+
+        positions = Kinematics.centroids(self.frames, 3, workspace)
+        expected = Kinematics.velocities(positions.copy(), 120, 'all')
+        velocity = Kinematics.velocities(positions, 120, 'all', workspace)
+        np.testing.assert_allclose(velocity['velocity'], expected['velocity'])
+
+        allocations = workspace.allocations
+        for _ in range(3):
+            positions = Kinematics.centroids(self.frames, 3, workspace)
+            Kinematics.velocities(positions, 120, 'all', workspace)
+        self.assertEqual(workspace.allocations, allocations)
+
+        # asking for more than a buffer holds grows it
+        Kinematics.centroids(np.tile(self.frames, 4), 3, workspace)
+        self.assertGreater(workspace.allocations, allocations)
+
+    def test_occlusion(self):
+        """Test that missing & surplus markers stay within their own frames."""
+        # frame 2 loses a marker, frame 4 gains a ghost marker
+        frames = np.concatenate(
+            [self.frames[:3], self.frames[3:5], self.frames[6:12], self.frames[9:10], self.frames[12:]]
+        )
+        frames = frames[np.argsort(frames['frame_number'], kind='stable')]
+
+        numbers, markers, counts = Kinematics.assemble(frames, max_markers=3)
+        np.testing.assert_array_equal(numbers, np.arange(1, 7))
+        self.assertEqual(markers.shape, (6, 3, 3))
+        np.testing.assert_array_equal(counts, [3, 2, 3, 3, 3, 3])
+        self.assertTrue(np.isnan(markers[1, 2]).all())
+
+        positions = Kinematics.centroids(frames, marker_count=3)
+        np.testing.assert_array_equal(positions['frame_number'], np.arange(1, 7))
+        # frame 2 is the mean of its two remaining markers, later frames unaffected
+        self.assertAlmostEqual(positions['pos_z'][1], 1.5)
+        np.testing.assert_allclose(positions['pos_z'][2:], np.arange(3, 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import struct
+import unittest
+
+import numpy as np
+
+from ...NatNetClient.NatNetClient import (
+    FRAME_SUFFIX,
+    FRAME_SUFFIXES,
+    NatNetClient,
+)
+
+
+def make_packet(
+    frame_number, marker_sets, timestamp=0.0, exposure=0, transmit=0, suffix=FRAME_SUFFIX
+):
+    """Pack marker sets (label -> list of (x, y, z)) into a frame of NatNet data."""
+    body = b''
+    for label, markers in marker_sets.items():
+        body += label.encode('utf8') + b'\0'
+        body += struct.pack('<I', len(markers))
+        for marker in markers:
+            body += struct.pack('<3f', *marker)
+
+    packet = struct.pack('<III', frame_number, len(marker_sets), len(body)) + body
+    # no rigid bodies
+    packet += struct.pack('<II', 0, 0)
+    # stamps came with NatNet 3.0, precision timestamps with 4.1
+    stamps = (exposure, 0, transmit) if suffix.size > 30 else ()
+    precision = (0, 0) if suffix is FRAME_SUFFIX else ()
+    return packet + suffix.pack(0, 0, timestamp, *stamps, *precision, 0, 0)
+
+
+class TestNatNetClient(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.client = NatNetClient()
+        self.client.settings['server_stream_version'] = [4, 1, 0, 0]
+        self.received = []
+        self.client.marker_listener = self.received.append
+
+        self.packet = make_packet(
+            7,
+            {
+                'Hand': [(0.0, 1.0, 2.0), (1.0, 2.0, 3.0)],
+                'Other': [(9.0, 9.0, 9.0)],
+                'Object': [(4.0, 5.0, 6.0)],
+            },
+            timestamp=12.5,
+            exposure=1000,
+            transmit=5000,
+        )
+
+    def unpack(self):
+        return self.client._NatNetClient__unpack_data(self.packet)  # type: ignore
+
+    def test_all_marker_sets(self):
+        """Test that every marker set is decoded when no labels are given."""
+        # decoding stops short of the sections following rigid bodies
+        self.assertEqual(self.unpack(), len(self.packet) - FRAME_SUFFIX.size)
+        self.assertEqual([s['label'] for s in self.received], ['Hand', 'Other', 'Object'])
+
+        hand = self.received[0]['markers']
+        np.testing.assert_array_equal(hand['frame_number'], [7, 7])
+        np.testing.assert_allclose(hand['pos_z'], [2.0, 3.0])
+
+    def test_selected_marker_sets(self):
+        """Test that sets not listened for are skipped over."""
+        self.client.marker_labels = {'Hand', 'Object'}
+        # decoding stops short of the sections following rigid bodies
+        self.assertEqual(self.unpack(), len(self.packet) - FRAME_SUFFIX.size)
+        self.assertEqual([s['label'] for s in self.received], ['Hand', 'Object'])
+        np.testing.assert_allclose(self.received[1]['markers']['pos_x'], [4.0])
+
+    def test_frame_timing(self):
+        """Test that frame timestamp and latency are read from the frame suffix."""
+        self.unpack()
+        np.testing.assert_array_equal(self.received[0]['markers']['timestamp'], 12.5)
+        self.assertEqual(self.received[0]['frame_number'], 7)
+        self.assertIsNone(self.received[0]['latency'])  # clock frequency unknown
+
+        self.received.clear()
+        self.client.settings['clock_frequency'] = 1_000_000
+        self.unpack()
+        self.assertAlmostEqual(self.received[0]['latency'], 0.004)
+
+    def test_frame_timing_by_version(self):
+        """Test that the suffix is read as laid out in the stream's NatNet version."""
+        self.client.settings['clock_frequency'] = 1_000_000
+        for version, suffix in FRAME_SUFFIXES[1:]:
+            self.client.settings['server_stream_version'] = [*version, 0, 0]
+            self.packet = make_packet(
+                7, {'Hand': [(0.0, 1.0, 2.0)]}, timestamp=12.5, exposure=1000,
+                transmit=5000, suffix=suffix,
+            )
+            self.received.clear()
+            self.unpack()
+            self.assertEqual(self.received[0]['timestamp'], 12.5)
+            if version >= (3, 0):
+                self.assertAlmostEqual(self.received[0]['latency'], 0.004)
+            else:
+                self.assertIsNone(self.received[0]['latency'])
+
+        # before 2.7, timing isn't read at all
+        self.client.settings['server_stream_version'] = [2, 5, 0, 0]
+        self.received.clear()
+        self.unpack()
+        self.assertIsNone(self.received[0]['timestamp'])
+        self.assertTrue(np.isnan(self.received[0]['markers']['timestamp']).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
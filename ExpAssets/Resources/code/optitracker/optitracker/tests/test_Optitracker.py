@@ -4,10 +4,19 @@ import os
 import tempfile
 import shutil
 import psutil
+import subprocess
+import sys
+import tracemalloc
 from textwrap import dedent
 from rich.console import Console
 
+from unittest import mock
+
+from ..Acquisition import Acquisition
 from ..OptiTracker import Optitracker
+from ..RecordingSinks import FRAME_DTYPE
+from ..ScreenCalibration import ScreenCalibration
+from ..SharedRing import SharedRing
 
 console = Console()
 
@@ -194,6 +203,374 @@ class TestOptitracker(unittest.TestCase):
         self.assertIsInstance(distance, float)
         self.assertAlmostEqual(distance, expected(num_frames, False))
 
+    def test_wait_for_frame(self):
+        """Test that waiting is paced by frames arriving."""
+        self.assertFalse(self.tracker.wait_for_frame(timeout=0.01))
+
+        marker_set = {
+            'label': 'Hand',
+            'markers': [
+                {'frame_number': 11, 'pos_x': 0.0, 'pos_y': 0.0, 'pos_z': 0.0}
+            ]
+            * 3,
+        }
+        self.tracker._Optitracker__write(marker_set)  # type: ignore
+
+        self.assertTrue(self.tracker.wait_for_frame(timeout=0.01))
+        # frame has already been waited on
+        self.assertFalse(self.tracker.wait_for_frame(timeout=0.01))
+
+    def test_health(self):
+        """Test that stream health reflects frames as they arrive."""
+        health = self.tracker.health()
+        self.assertFalse(health['listening'])
+        self.assertEqual(health['frames'], 0)
+        self.assertIsNone(health['frame_rate'])
+        self.assertGreaterEqual(health['since_last_frame'], 0.0)
+
+        write = self.tracker._Optitracker__write  # type: ignore
+        for frame, count in [(11, 3), (12, 3), (15, 2)]:
+            write({
+                'label': 'Hand',
+                'frame_number': frame,
+                'markers': [
+                    {'frame_number': frame, 'pos_x': 0.0, 'pos_y': 0.0, 'pos_z': 0.0}
+                ]
+                * count,
+            })
+
+        health = self.tracker.health()
+        self.assertEqual(health['frames'], 3)
+        self.assertEqual(health['dropped_frames'], 2)
+        self.assertEqual(health['marker_mismatches'], 1)
+        self.assertEqual(health['backlog'], 0)
+        self.assertLess(health['since_last_frame'], 1.0)
+
+    def test_readiness(self):
+        """Test that listening resolves as ready once valid frames are buffered."""
+        natnet = self.tracker._Optitracker__natnet  # type: ignore
+        write = self.tracker._Optitracker__write  # type: ignore
+
+        def frame(frame_number, count):
+            return {
+                'label': 'Hand',
+                'markers': [
+                    {'frame_number': frame_number, 'pos_x': 0.0, 'pos_y': 0.0, 'pos_z': 0.0}
+                ]
+                * count,
+            }
+
+        with mock.patch.object(natnet, 'startup', return_value=False):
+            self.assertFalse(self.tracker.start_listening(record=False))
+
+        with mock.patch.object(natnet, 'startup', return_value=True):
+            ready = self.tracker.start_listening(record=False, ready_frames=2)
+        self.assertTrue(ready)
+        self.assertFalse(ready.wait(timeout=0.01))
+
+        # frames without any markers (e.g., hand out of view) don't count
+        write(frame(11, 3))
+        write(frame(12, 0))
+        self.assertFalse(ready.done())
+
+        write(frame(13, 2))
+        self.assertTrue(ready.done())
+        self.assertEqual(ready.result(timeout=0), 2)
+
+        with mock.patch.object(natnet, 'shutdown'):
+            self.tracker.stop_listening()
+
+    def test_multiple_marker_sets(self):
+        """Test that tracked marker sets are buffered & queried independently."""
+        self.tracker.track('Object', marker_count=2)
+        self.assertEqual(self.tracker.marker_sets, ['Hand', 'Object'])
+
+        with self.assertRaises(ValueError):
+            self.tracker.track('Object', marker_count=2)
+
+        write = self.tracker._Optitracker__write  # type: ignore
+        for frame in range(11, 14):
+            write({
+                'label': 'Object',
+                'markers': [
+                    {'frame_number': frame, 'pos_x': frame / 1000, 'pos_y': 0.0, 'pos_z': 0.0}
+                ]
+                * 2,
+            })
+            write({'label': 'Untracked', 'markers': []})
+
+        # only the primary set paces waiting
+        self.assertFalse(self.tracker.wait_for_frame(timeout=0.01))
+
+        position = self.tracker.position(marker_set='Object')
+        self.assertAlmostEqual(position['pos_x'].item(), 13.0)
+        self.assertAlmostEqual(
+            self.tracker.distance(num_frames=3, axis='x', marker_set='Object'), 2.0
+        )
+        self.assertEqual(self.tracker.features('Object')['path_length'], 2.0)
+
+        # primary set still reads from its recorded file
+        self.assertAlmostEqual(self.tracker.position()['pos_x'].item(), 10.0)
+
+        with self.assertRaises(LookupError):
+            self.tracker.position(marker_set='Untracked')
+
+    def test_time_windows(self):
+        """Test queries over time windows, with and without frame timestamps."""
+        write = self.tracker._Optitracker__write  # type: ignore
+        for frame in range(11, 16):
+            write({
+                'label': 'Hand',
+                'markers': [
+                    {'frame_number': frame, 'pos_x': 0.0, 'pos_y': 0.0, 'pos_z': frame / 1000}
+                ]
+                * 3,
+            })
+
+        # untimestamped frames are counted at the sample rate (120 Hz)
+        self.assertAlmostEqual(self.tracker.distance(last_ms=25), 2.0)
+        with self.assertRaises(ValueError):
+            self.tracker.distance(since=0.0)
+        with self.assertRaises(ValueError):
+            self.tracker.distance(num_frames=3, last_ms=25)
+
+        self.tracker.discard()
+        # frames 200 Hz apart, save for a 20 ms stall before the last
+        for frame, timestamp in zip(range(1, 6), [1.0, 1.005, 1.01, 1.015, 1.035]):
+            write({
+                'label': 'Hand',
+                'markers': [
+                    {
+                        'frame_number': frame,
+                        'pos_x': 0.0,
+                        'pos_y': 0.0,
+                        'pos_z': frame / 1000,
+                        'timestamp': timestamp,
+                    }
+                ]
+                * 3,
+            })
+
+        self.assertAlmostEqual(self.tracker.distance(last_ms=25), 2.0)
+        self.assertAlmostEqual(self.tracker.distance(since=1.005), 3.0)
+        self.assertEqual(len(self.tracker.query_frames(last_ms=10)), 3)
+        self.assertAlmostEqual(self.tracker.velocity(last_ms=25), 125.0)
+
+        with self.assertRaises(ValueError):
+            self.tracker.velocity(last_ms=10)
+
+    def test_travel(self):
+        """Test travel measured from a mark, e.g., the start of a trial phase."""
+        write = self.tracker._Optitracker__write  # type: ignore
+        for frame in range(11, 14):
+            write({
+                'label': 'Hand',
+                'markers': [
+                    {'frame_number': frame, 'pos_x': 0.0, 'pos_y': 0.0, 'pos_z': frame / 1000}
+                ]
+                * 3,
+            })
+        self.assertAlmostEqual(self.tracker.travelled(), 2.0)
+
+        self.tracker.mark()
+        self.assertAlmostEqual(self.tracker.travelled(), 0.0)
+        for frame, z in [(14, 10), (15, 12)]:
+            write({
+                'label': 'Hand',
+                'markers': [
+                    {'frame_number': frame, 'pos_x': 0.0, 'pos_y': 0.0, 'pos_z': z / 1000}
+                ]
+                * 3,
+            })
+        self.assertAlmostEqual(self.tracker.travelled(), 5.0)
+        self.assertAlmostEqual(self.tracker.displacement(axis='z'), -1.0)
+
+        # the same frames, indexed for range queries
+        trajectory = self.tracker.trajectory()
+        self.assertAlmostEqual(trajectory.distance(11, 15), 7.0)
+        self.assertAlmostEqual(trajectory.distance(13, 15, axis='z'), -1.0)
+
+    def test_watch_touches(self):
+        """Test that touches are detected as frames arrive, in screen space."""
+        class Bounds(object):
+            def which_boundary(self, point, labels=None):
+                return 'target' if point[0] >= 13.0 else None
+
+        with self.assertRaises(RuntimeError):
+            self.tracker.touch()
+
+        # 1 px per mm; touches need the screen's plane, to tell them from hovering
+        calibration = ScreenCalibration([[1.0, 0, 0, 0], [0, 1.0, 0, 0]])
+        with self.assertRaises(ValueError):
+            self.tracker.watch(Bounds(), calibration)
+
+        calibration = ScreenCalibration(calibration.matrix, plane=[0.0, 0.0, 1.0, 0.0])
+        self.tracker.watch(Bounds(), calibration)
+
+        write = self.tracker._Optitracker__write  # type: ignore
+        for frame in range(11, 16):
+            write({
+                'label': 'Hand',
+                'markers': [
+                    {'frame_number': frame, 'pos_x': frame / 1000, 'pos_y': 0.0, 'pos_z': 0.0}
+                ]
+                * 3,
+                'received': frame / 100,
+            })
+
+        touch = self.tracker.touch()
+        self.assertEqual((touch['label'], touch['frame_number']), ('target', 13))
+        self.assertEqual(touch['received'], 0.13)  # on arrival, not when tested
+
+    def test_occluded_markers(self):
+        """Test that queries stay aligned while markers drop out."""
+        write = self.tracker._Optitracker__write  # type: ignore
+        for frame, visible in zip(range(11, 16), [3, 2, 3, 1, 3]):
+            write({
+                'label': 'Hand',
+                'markers': [
+                    {'frame_number': frame, 'pos_x': 0.0, 'pos_y': 0.0, 'pos_z': frame / 1000}
+                ]
+                * visible,
+            })
+
+        np.testing.assert_array_equal(
+            self.tracker.visible_markers(num_frames=5), [3, 2, 3, 1, 3]
+        )
+        self.assertAlmostEqual(self.tracker.position()['pos_z'].item(), 15.0)
+        self.assertAlmostEqual(self.tracker.distance(num_frames=5), 4.0)
+
+    def test_acquisition_process(self):
+        """Test that frames published to the shared ring are taken up by queries."""
+        with self.assertRaises(ValueError):
+            Optitracker(
+                marker_count=3, use_mouse=True, display_ppi=96, acquisition_process=True
+            )
+
+        tracker = Optitracker(
+            marker_count=3,
+            window_size=3,
+            data_dir=self.data_file,
+            acquisition_process=True,
+            ring_capacity=16,
+        )
+
+        # stand in for the acquisition process, publishing to the ring
+        with mock.patch.object(Acquisition, 'start', return_value=True):
+            ready = tracker.start_listening(ready_frames=4)
+        self.assertTrue(ready)
+        acquisition = tracker._Optitracker__acquisition  # type: ignore
+        writer = SharedRing(name=acquisition.ring.name)
+
+        try:
+            self.assertFalse(tracker.wait_for_frame(timeout=0.01))
+            self.assertFalse(ready.wait(timeout=0.01))
+
+            class Bounds(object):
+                def which_boundary(self, point, labels=None):
+                    return 'target'
+
+            # touches are tested once taken up, but timed by the frame's arrival
+            calibration = ScreenCalibration(
+                [[1.0, 0, 0, 0], [0, 1.0, 0, 0]], plane=[0.0, 0.0, 1.0, 0.0]
+            )
+            tracker.watch(Bounds(), calibration, contact_distance=11.5)
+
+            markers = np.zeros(3, dtype=FRAME_DTYPE)
+            for frame in range(11, 15):
+                markers['pos_z'] = frame / 1000
+                writer.write(
+                    0, frame, markers, timestamp=frame / 100, latency=0.002,
+                    received=frame / 10,
+                )
+
+            # published, but not yet taken up
+            self.assertEqual(tracker.health()['backlog'], 4)
+            self.assertTrue(ready.done())
+            health = tracker.health()
+            self.assertEqual(health['backlog'], 0)
+            self.assertEqual(health['frames'], 4)
+
+            self.assertTrue(tracker.wait_for_frame(timeout=0.01))
+            # markers are single precision, as streamed by NatNet
+            self.assertAlmostEqual(tracker.position()['pos_z'].item(), 14.0, places=4)
+            self.assertAlmostEqual(tracker.distance(num_frames=3), 2.0, places=4)
+            self.assertAlmostEqual(tracker.stream_stats()['frame_rate'], 100.0)
+            self.assertAlmostEqual(tracker.stream_stats()['latency_max'], 2.0)
+            touch = tracker.touch()
+            self.assertEqual((touch['frame_number'], touch['received']), (11, 1.1))
+
+            # frames published after listening stopped are not taken up
+            tracker.stop_listening()
+            writer.write(0, 15, markers)
+            self.assertAlmostEqual(tracker.position()['pos_z'].item(), 14.0, places=4)
+        finally:
+            writer.close()
+            tracker.close()
+
+    def test_steady_state_allocations(self):
+        """Test that repeated queries allocate nothing in proportion to their window."""
+        for frame in range(11, 2011):
+            marker_set = {
+                'label': 'Hand',
+                'markers': [
+                    {'frame_number': frame, 'pos_x': 0.0, 'pos_y': 0.0, 'pos_z': frame / 1000}
+                ]
+                * 3,
+            }
+            self.tracker._Optitracker__write(marker_set)  # type: ignore
+
+        frames = np.zeros(6000, dtype=FRAME_DTYPE)
+        position = np.zeros(1, dtype=self.tracker.position().dtype)
+
+        def query():
+            self.tracker.velocity(num_frames=2000, axis='all')
+            self.tracker.distance(num_frames=2000, axis='z')
+            self.tracker.query_frames(num_frames=2000, out=frames)
+            self.tracker.position(out=position)
+
+        query()
+        allocations = self.tracker.allocations
+
+        tracemalloc.start()
+        try:
+            baseline, _ = tracemalloc.get_traced_memory()
+            for _ in range(20):
+                query()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # transient allocations stay well below a single copy of the window's frames,
+        # and none are kept
+        self.assertLess(peak - baseline, frames.nbytes / 4)
+        self.assertLess(current - baseline, frames.nbytes / 16)
+        self.assertEqual(self.tracker.allocations, allocations)
+
+        self.assertTrue(np.shares_memory(self.tracker.position(out=position), position))
+        self.assertAlmostEqual(position['pos_z'].item(), 2010.0)
+
+    def test_import_is_lightweight(self):
+        """Test that importing Optitracker doesn't load backend dependencies."""
+        package = __package__.rsplit('.', 1)[0]
+        root = os.path.abspath(__file__)
+        for _ in range(__package__.count('.') + 2):
+            root = os.path.dirname(root)
+
+        script = (
+            f'import sys; import {package}.OptiTracker; '
+            "print(','.join(m for m in ('rich', 'construct', 'pyautogui', 'zipfile') "
+            'if m in sys.modules))'
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), '')
+
     @unittest.skip('Not implemented')
     def test_query_frames_validation(self):
         """Test frame querying validation."""
@@ -0,0 +1,49 @@
+import unittest
+
+from ..Readiness import Readiness
+
+
+class TestReadiness(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.buffered = 0
+        self.waits = []
+
+    def wait(self, required, timeout):
+        self.waits.append(timeout)
+        return self.buffered >= required
+
+    def test_resolves(self):
+        """Test that the handle resolves once enough frames are buffered, and stays so."""
+        ready = Readiness(True, 3, self.wait)
+        self.assertTrue(ready)
+        self.assertFalse(ready.done())
+        with self.assertRaises(TimeoutError):
+            ready.result(timeout=0.01)
+
+        self.buffered = 3
+        self.assertTrue(ready.wait(timeout=1.0))
+        self.assertEqual(ready.result(), 3)
+
+        # once resolved, no more waiting
+        self.buffered = 0
+        self.assertTrue(ready.done())
+        self.assertEqual(self.waits, [0, 0.01, 1.0])
+
+    def test_not_started(self):
+        """Test that a handle for listening that never started is falsy & never resolves."""
+        ready = Readiness(False, 1, self.wait)
+        self.assertFalse(ready)
+        self.assertFalse(ready.wait())
+        with self.assertRaises(RuntimeError):
+            ready.result()
+        self.assertEqual(self.waits, [])
+
+    def test_invalid_required(self):
+        """Test that at least one frame must be required."""
+        with self.assertRaises(ValueError):
+            Readiness(True, 0, self.wait)
+
+
+if __name__ == '__main__':
+    unittest.main()
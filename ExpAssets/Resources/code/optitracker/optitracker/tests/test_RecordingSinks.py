@@ -0,0 +1,227 @@
+import unittest
+import os
+import shutil
+import sqlite3
+import tempfile
+import numpy as np
+
+from ..RecordingSinks import (
+    FRAME_DTYPE,
+    ArchiveSink,
+    CSVSink,
+    SQLiteSink,
+    StreamSink,
+    as_frames,
+    load_csv,
+)
+from ..TrajectoryCodec import TrajectoryReader
+
+
+def make_frames(num_frames, marker_count=3):
+    frames = np.zeros(num_frames * marker_count, dtype=FRAME_DTYPE)
+    frames['frame_number'] = np.repeat(np.arange(1, num_frames + 1), marker_count)
+    frames['pos_x'] = frames['frame_number'] / 1000
+    frames['pos_z'] = np.tile(np.arange(marker_count) / 1000, num_frames)
+    return frames
+
+
+RECORDING = os.path.join(
+    os.path.dirname(__file__),
+    'recorded_opti_files',
+    'gripaperture_trial_handmarkers.csv',
+)
+
+
+class TestLoadCSV(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'trial.csv')
+
+    def tearDown(self):
+        """Clean up test fixtures after each test method."""
+        shutil.rmtree(self.test_dir)
+
+    def test_recording(self):
+        """Test that only frame columns of a recording are read by default."""
+        frames = load_csv(RECORDING)
+
+        self.assertEqual(frames.dtype.names, ('pos_x', 'pos_y', 'pos_z', 'frame_number'))
+        self.assertEqual(len(frames), 2700)
+        self.assertEqual(frames['frame_number'][0], 86515)
+        self.assertAlmostEqual(frames['pos_x'][0], 0.31590989232063293)
+
+        other = load_csv(RECORDING, columns=['frame_number', '_io'])
+        self.assertTrue(other['_io'][0].startswith('<_io.BytesIO'))
+
+    def test_missing_columns(self):
+        """Test that files lacking position columns are refused."""
+        with open(self.path, 'w') as file:
+            file.write('frame_number,pos_x\n1,0.5\n')
+
+        with self.assertRaises(ValueError):
+            load_csv(self.path)
+
+    def test_malformed_tail(self):
+        """Test that rows cut short at the end of a file are left out."""
+        with open(self.path, 'w') as file:
+            file.write('frame_number,pos_x,pos_y,pos_z\n')
+            file.write('1,0.1,0.2,0.3\n2,0.1,0.2,0.3\n3,0.1,0.2\n4,0.1,')
+
+        frames = load_csv(self.path)
+        np.testing.assert_array_equal(frames['frame_number'], [1, 2])
+
+        # header only
+        with open(self.path, 'w') as file:
+            file.write('frame_number,pos_x,pos_y,pos_z\n')
+        self.assertEqual(len(load_csv(self.path)), 0)
+
+    def test_as_frames(self):
+        """Test that recordings with & without timestamps share FRAME_DTYPE."""
+        frames = as_frames(load_csv(RECORDING))
+        self.assertEqual(frames.dtype, np.dtype(FRAME_DTYPE))
+        self.assertEqual(frames['frame_number'][0], 86515)
+        self.assertTrue(np.isnan(frames['timestamp']).all())
+
+        live = make_frames(3)
+        live['timestamp'] = live['frame_number'] / 120
+        np.testing.assert_array_equal(as_frames(live), live)
+
+
+class TestCSVSink(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.sink = CSVSink(os.path.join(self.test_dir, 'trial.csv'))
+
+    def tearDown(self):
+        """Clean up test fixtures after each test method."""
+        shutil.rmtree(self.test_dir)
+
+    def test_unset_path(self):
+        """Test that recording requires a path."""
+        with self.assertRaises(ValueError):
+            CSVSink().begin()
+
+    def test_commit_and_read(self):
+        """Test committing a trial, then querying it back."""
+        self.sink.begin()
+        self.sink.commit(make_frames(5))
+
+        frames = self.sink.read(num_frames=2)
+        self.assertEqual(len(frames), 6)
+        self.assertEqual(set(frames['frame_number']), {4, 5})
+        np.testing.assert_allclose(frames['pos_x'], 0.004, atol=0.0011)
+
+    def test_read_header_only(self):
+        """Test that a trial file without rows reads back as no frames."""
+        self.sink.begin()
+        self.sink.commit(make_frames(0))
+
+        frames = self.sink.read(num_frames=2)
+        self.assertEqual(len(frames), 0)
+        self.assertEqual(frames.dtype, np.dtype(FRAME_DTYPE))
+
+
+class TestSQLiteSink(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, 'test.db')
+        self.sink = SQLiteSink(self.db_path)
+        self.sink.key = {'participant_id': 1, 'block_num': 1, 'trial_num': 1}
+
+    def tearDown(self):
+        """Clean up test fixtures after each test method."""
+        self.sink.close()
+        shutil.rmtree(self.test_dir)
+
+    def count_rows(self):
+        with sqlite3.connect(self.db_path) as connection:
+            return connection.execute(
+                'SELECT COUNT(*) FROM trajectories'
+            ).fetchone()[0]
+
+    def test_missing_key(self):
+        """Test that recording requires a complete key."""
+        self.sink.key = {'participant_id': 1}
+        with self.assertRaises(ValueError):
+            self.sink.begin()
+
+    def test_commit_and_read(self):
+        """Test that trials are committed whole, and read back by key."""
+        self.sink.begin()
+        self.sink.commit(make_frames(3))
+        self.assertEqual(self.count_rows(), 9)
+
+        self.sink.key = {'participant_id': 1, 'block_num': 1, 'trial_num': 2}
+        self.sink.begin()
+        self.sink.commit(make_frames(5))
+        self.assertEqual(self.count_rows(), 24)
+
+        frames = self.sink.read(participant_id=1, block_num=1, trial_num=1)
+        np.testing.assert_array_equal(frames, make_frames(3))
+
+
+class TestArchiveSink(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.sink = ArchiveSink(os.path.join(self.test_dir, 'p1.zip'))
+        self.sink.key = {'block_num': 1, 'trial_num': 1, 'practicing': False}
+
+    def tearDown(self):
+        """Clean up test fixtures after each test method."""
+        shutil.rmtree(self.test_dir)
+
+    def test_missing_key(self):
+        """Test that recording requires a block & trial number."""
+        self.sink.key = {'block_num': 1}
+        with self.assertRaises(ValueError):
+            self.sink.begin()
+
+    def test_commit(self):
+        """Test that committed trials are archived."""
+        self.sink.begin()
+        self.sink.commit(make_frames(5))
+
+        self.assertEqual(len(self.sink.archive), 1)
+        self.assertEqual(len(self.sink.archive.read(1, 1)), 15)
+        self.assertFalse(self.sink.archive.index()[0]['practicing'])
+
+
+class TestStreamSink(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'p1.otrj')
+        self.sink = StreamSink(self.path)
+
+    def tearDown(self):
+        """Clean up test fixtures after each test method."""
+        self.sink.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_missing_key(self):
+        """Test that recording requires a block & trial number."""
+        self.sink.key = {'trial_num': 1}
+        with self.assertRaises(ValueError):
+            self.sink.begin()
+
+    def test_commit(self):
+        """Test that each committed trial is appended to the stream as it comes."""
+        for trial_num in [1, 2]:
+            self.sink.key = {'block_num': 1, 'trial_num': trial_num}
+            self.sink.begin()
+            self.sink.commit(make_frames(5))
+
+            # readable before the session ends
+            self.assertEqual(len(TrajectoryReader(self.path)), trial_num)
+
+        info, frames = list(TrajectoryReader(self.path))[1]
+        self.assertEqual(info, {'block_num': 1, 'trial_num': 2})
+        np.testing.assert_array_equal(frames, make_frames(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
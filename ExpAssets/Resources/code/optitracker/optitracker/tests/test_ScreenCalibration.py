@@ -0,0 +1,138 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..RecordingSinks import FRAME_DTYPE
+from ..ScreenCalibration import ScreenCalibration
+
+
+class TestScreenCalibration(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # screen lies in the tracker's x-y plane: 2 px per mm, y flipped, origin
+        # at pixel (100, 500)
+        self.calibration = ScreenCalibration(
+            [[2.0, 0.0, 0.0, 100.0], [0.0, -2.0, 0.0, 500.0]],
+            plane=[0.0, 0.0, 3.0, 0.0],
+        )
+
+    def test_to_screen(self):
+        """Test mapping tracker positions onto the screen."""
+        self.assertEqual(self.calibration.to_screen((10.0, 20.0, 5.0)), (120.0, 460.0))
+
+        # projective transform: homogeneous coordinate divides through
+        projective = ScreenCalibration(
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 0.0, 2.0]]
+        )
+        self.assertEqual(projective.to_screen((10.0, 20.0, 0.0)), (5.0, 10.0))
+
+        with self.assertRaises(ValueError):
+            ScreenCalibration(np.eye(3))
+
+    def test_depth(self):
+        """Test distance from the screen's plane."""
+        self.assertEqual(self.calibration.depth((10.0, 20.0, 5.0)), 5.0)
+        self.assertIsNone(ScreenCalibration(np.zeros((2, 4))).depth((0, 0, 0)))
+
+        with self.assertRaises(ValueError):
+            ScreenCalibration(np.zeros((2, 4)), plane=[0.0, 0.0, 0.0, 1.0])
+
+    def test_save_load(self):
+        """Test that a saved calibration loads unchanged."""
+        path = os.path.join(tempfile.mkdtemp(), 'calibration.json')
+        self.calibration.save(path)
+
+        loaded = ScreenCalibration.load(path)
+        np.testing.assert_array_equal(loaded.matrix, self.calibration.matrix)
+        np.testing.assert_array_equal(loaded.plane, self.calibration.plane)
+
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+    def test_fit(self):
+        """Test fitting calibrations to points touched on a tilted screen."""
+        rng = np.random.default_rng(0)
+
+        # screen tilted back 30 degrees about the tracker's x axis, 0.25 mm per px
+        tilt = np.radians(30)
+        right = np.array([1.0, 0.0, 0.0])
+        down = np.array([0.0, -np.cos(tilt), -np.sin(tilt)])
+        origin = np.array([-100.0, 300.0, 50.0])
+
+        screen_points = rng.uniform(0, 1000, size=(9, 2))
+        tracker_points = origin + 0.25 * (
+            screen_points[:, :1] * right + screen_points[:, 1:] * down
+        )
+
+        for model in ['affine', 'projective']:
+            calibration = ScreenCalibration.fit(tracker_points, screen_points, model)
+            self.assertLess(calibration.error, 1e-6)
+            np.testing.assert_allclose(
+                calibration.to_screen(tracker_points), screen_points, atol=1e-6
+            )
+
+            # a point hovering 20 mm in front of the screen
+            normal = -np.cross(right, down)
+            hovering = origin + 0.25 * 500 * right + 20.0 * normal
+            self.assertAlmostEqual(calibration.depth(hovering), 20.0)
+            np.testing.assert_allclose(
+                calibration.to_screen(hovering), (500.0, 0.0), atol=1e-6
+            )
+
+        with self.assertRaises(ValueError):
+            ScreenCalibration.fit(tracker_points[:3], screen_points[:3], 'projective')
+        with self.assertRaises(ValueError):
+            ScreenCalibration.fit(tracker_points, screen_points, 'cubic')
+
+    def test_keystone(self):
+        """Test that a projective fit recovers a keystoned mapping."""
+        homography = np.array(
+            [[2.0, 0.1, 10.0], [0.05, 1.5, 20.0], [1e-4, 2e-4, 1.0]]
+        )
+        plane_points = np.array(
+            [[x, y, 1.0] for x in [0, 50, 100, 150] for y in [0, 60, 120]]
+        )
+        mapped = plane_points @ homography.T
+        screen_points = mapped[:, :2] / mapped[:, 2:]
+        # screen lies in the plane z = 7
+        tracker_points = plane_points.copy()
+        tracker_points[:, 2] = 7.0
+
+        projective = ScreenCalibration.fit(tracker_points, screen_points, 'projective')
+        affine = ScreenCalibration.fit(tracker_points, screen_points, 'affine')
+        self.assertLess(projective.error, 1e-6)
+        self.assertGreater(affine.error, 1.0)
+
+    def test_batched(self):
+        """Test mapping whole buffers of frames in one call."""
+        frames = np.zeros(3, dtype=FRAME_DTYPE)
+        frames['pos_x'] = [0.0, 10.0, 20.0]
+        frames['pos_y'] = [0.0, 5.0, 10.0]
+
+        out = np.zeros((3, 2))
+        screen = self.calibration.to_screen(frames, out=out)
+        self.assertIs(screen, out)
+        np.testing.assert_allclose(screen, [[100, 500], [120, 490], [140, 480]])
+
+        points = np.column_stack([frames['pos_x'], frames['pos_y'], frames['pos_z']])
+        np.testing.assert_allclose(self.calibration.to_screen(points), screen)
+
+    def test_station_cache(self):
+        """Test that calibrations are cached per station."""
+        directory = os.path.join(tempfile.mkdtemp(), 'calibration')
+        self.assertIsNone(ScreenCalibration.cached(directory, station='booth_1'))
+
+        path = self.calibration.cache(directory, station='booth_1')
+        self.assertEqual(os.path.basename(path), 'booth_1.json')
+        self.assertIsNotNone(ScreenCalibration.cached(directory, station='booth_1'))
+        self.assertIsNone(ScreenCalibration.cached(directory, station='booth_2'))
+
+        os.remove(path)
+        os.rmdir(directory)
+        os.rmdir(os.path.dirname(directory))
+
+
+if __name__ == '__main__':
+    unittest.main()
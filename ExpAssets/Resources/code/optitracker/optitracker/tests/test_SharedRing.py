@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+
+from ..RecordingSinks import FRAME_DTYPE
+from ..SharedRing import SharedRing
+
+
+def make_markers(frame_number, count):
+    markers = np.zeros(count, dtype=FRAME_DTYPE)
+    markers['frame_number'] = frame_number
+    markers['pos_x'] = np.arange(count)
+    markers['pos_z'] = frame_number
+    return markers
+
+
+class TestSharedRing(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.ring = SharedRing(max_markers=3, capacity=4)
+        # a second handle, as held by the acquisition process
+        self.writer = SharedRing(name=self.ring.name)
+
+    def tearDown(self):
+        self.writer.close()
+        self.ring.close()
+
+    def test_layout(self):
+        """Test that an attached ring shares the creator's layout."""
+        self.assertEqual(self.writer.capacity, 4)
+        self.assertEqual(self.writer.max_markers, 3)
+
+        with self.assertRaises(ValueError):
+            SharedRing(max_markers=0)
+
+    def test_read_write(self):
+        """Test that messages are read back in order, across processes' handles."""
+        self.writer.write(1, 10, make_markers(10, 2), timestamp=0.5)
+        self.writer.write(0, 10, make_markers(10, 5), latency=0.002)
+
+        slot, cursor, lost = self.ring.read(0)
+        self.assertEqual((cursor, lost), (1, 0))
+        self.assertEqual(slot['set_index'][0], 1)
+        self.assertEqual(slot['marker_count'][0], 2)
+        self.assertEqual(slot['timestamp'][0], 0.5)
+        self.assertTrue(np.isnan(slot['latency'][0]))
+        np.testing.assert_allclose(slot['markers'][0, :2, 0], [0.0, 1.0])
+
+        # surplus markers are left out
+        slot, cursor, lost = self.ring.read(cursor)
+        self.assertEqual(slot['marker_count'][0], 3)
+        self.assertAlmostEqual(slot['latency'][0], 0.002)
+
+        slot, cursor, lost = self.ring.read(cursor)
+        self.assertIsNone(slot)
+        self.assertEqual(cursor, 2)
+
+    def test_overrun(self):
+        """Test that overwritten and torn messages are skipped and counted as lost."""
+        for frame in range(6):
+            self.writer.write(0, frame, make_markers(frame, 1))
+
+        slot, cursor, lost = self.ring.read(0)
+        self.assertEqual(lost, 2)
+        self.assertEqual(slot['frame_number'][0], 2)
+
+        # a message caught mid-write (odd sequence number) is not read
+        self.writer.write(0, 6, make_markers(6, 1))
+        self.writer._SharedRing__slots['seq'][6 % 4] += 1  # type: ignore
+
+        frames = []
+        lost_total = 0
+        while True:
+            slot, cursor, lost = self.ring.read(cursor)
+            lost_total += lost
+            if slot is None:
+                break
+            frames.append(int(slot['frame_number'][0]))
+        self.assertEqual(frames, [3, 4, 5])
+        self.assertEqual(lost_total, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from unittest import mock
+
+from ..StreamHealth import StreamHealth
+
+
+class TestStreamHealth(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.health = StreamHealth(marker_count=3, sample_rate=100, window=4)
+
+    def test_empty_report(self):
+        """Test report before any frames have been received."""
+        with mock.patch('time.perf_counter', return_value=10.0):
+            self.health.reset()
+        with mock.patch('time.perf_counter', return_value=10.5):
+            report = self.health.report()
+
+        self.assertEqual(report['frames'], 0)
+        self.assertIsNone(report['frame_rate'])
+        self.assertEqual(report['jitter'], 0.0)
+        # measured from when the stream began
+        self.assertAlmostEqual(report['since_last_frame'], 0.5)
+
+    def test_rate_drops_and_mismatches(self):
+        """Test frame rate over the recent window, drops and marker mismatches."""
+        # arriving at 50 Hz for a while, then 100 Hz
+        arrivals = [0.0, 0.02, 0.04, 0.05, 0.06, 0.07]
+        for frame, received in enumerate(arrivals):
+            self.health.update(frame, 3, received=received)
+        self.health.update(9, 2, received=0.08)
+        self.health.update(9, 3, received=0.09)  # duplicate frame is ignored
+
+        with mock.patch('time.perf_counter', return_value=0.1):
+            report = self.health.report(backlog=5)
+
+        self.assertEqual(report['frames'], 7)
+        self.assertAlmostEqual(report['frame_rate'], 100.0)
+        self.assertEqual(report['dropped_frames'], 3)
+        self.assertEqual(report['marker_mismatches'], 1)
+        self.assertEqual(report['backlog'], 5)
+        self.assertAlmostEqual(report['since_last_frame'], 0.02)
+
+    def test_jitter(self):
+        """Test jitter, from variation in transit time between frames."""
+        # steady transit: no jitter
+        for frame in range(5):
+            self.health.update(frame, 3, timestamp=frame / 100, received=frame / 100 + 0.01)
+        self.assertAlmostEqual(self.health.report()['jitter'], 0.0)
+
+        # one frame arrives 16 ms late
+        self.health.update(5, 3, timestamp=0.05, received=0.076)
+        self.assertAlmostEqual(self.health.report()['jitter'], 1.0)
+
+    def test_invalid_window(self):
+        """Test that the rate window must span two frames."""
+        with self.assertRaises(ValueError):
+            StreamHealth(marker_count=3, window=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
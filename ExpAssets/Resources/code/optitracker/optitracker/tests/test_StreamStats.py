@@ -0,0 +1,53 @@
+import unittest
+
+from ..StreamStats import StreamStats
+
+
+class TestStreamStats(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.stats = StreamStats()
+
+    def test_empty_summary(self):
+        """Test summary before any frames have been received."""
+        summary = self.stats.summary()
+        for key in ['frame_rate', 'dropped_frames', 'latency_mean', 'latency_max']:
+            self.assertEqual(summary[key], 'NA')
+
+    def test_rate_and_drops(self):
+        """Test frame rate and dropped frames measured from frame timestamps."""
+        for frame in [10, 11, 12, 15, 16]:
+            self.stats.update(frame, timestamp=(frame - 10) / 100)
+        self.stats.update(16, timestamp=0.06)  # duplicate frame is ignored
+
+        summary = self.stats.summary()
+        self.assertAlmostEqual(summary['frame_rate'], 100.0)
+        self.assertEqual(summary['dropped_frames'], 2)
+        self.assertEqual(summary['latency_mean'], 'NA')
+
+    def test_rate_untimed_frames(self):
+        """Test that frames without timestamps don't skew the frame rate."""
+        self.stats.update(10)
+        self.stats.update(11, timestamp=float('nan'))
+        for frame in [12, 13, 14]:
+            self.stats.update(frame, timestamp=(frame - 10) / 100)
+        self.stats.update(15)
+
+        self.assertAlmostEqual(self.stats.summary()['frame_rate'], 100.0)
+
+    def test_latency(self):
+        """Test mean and max latency, reported in ms."""
+        for frame, latency in enumerate([0.002, 0.004, 0.003]):
+            self.stats.update(frame, latency=latency)
+
+        summary = self.stats.summary()
+        self.assertAlmostEqual(summary['latency_mean'], 3.0)
+        self.assertAlmostEqual(summary['latency_max'], 4.0)
+        self.assertEqual(summary['frame_rate'], 'NA')
+
+        self.stats.reset()
+        self.assertEqual(self.stats.summary()['latency_max'], 'NA')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+from ..ScreenCalibration import ScreenCalibration
+from ..TouchDetector import TouchDetector
+
+
+class Bounds(object):
+    """Stands in for a klibs BoundarySet of two square targets."""
+
+    TARGETS = {'left': (0, 100), 'right': (200, 300)}
+
+    def which_boundary(self, point, labels=None):
+        x, y = point
+        for label, (low, high) in self.TARGETS.items():
+            if labels is not None and label not in labels:
+                continue
+            if low <= x <= high and 0 <= y <= 100:
+                return label
+        return None
+
+
+class TestTouchDetector(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        # 1 px per mm, screen in the tracker's x-y plane
+        calibration = ScreenCalibration(
+            [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]], plane=[0.0, 0.0, 1.0, 0.0]
+        )
+        self.detector = TouchDetector(Bounds(), calibration, contact_distance=5.0)
+
+    def test_touch(self):
+        """Test that the first frame on a target, at the screen, is the touch."""
+        self.detector.update(1, (250.0, 50.0, 40.0))  # hovering over target
+        self.detector.update(2, (150.0, 50.0, 0.0))  # on screen, between targets
+        self.assertIsNone(self.detector.touch)
+
+        self.detector.update(3, (250.0, 50.0, 4.0), timestamp=1.5)
+        self.detector.update(4, (50.0, 50.0, 0.0), timestamp=1.6)
+
+        touch = self.detector.touch
+        self.assertEqual(touch['label'], 'right')
+        self.assertEqual(touch['frame_number'], 3)
+        self.assertEqual(touch['timestamp'], 1.5)
+
+        self.detector.reset()
+        self.assertIsNone(self.detector.touch)
+
+        # frames tested after arriving (e.g., taken from another process) keep
+        # their arrival time
+        self.detector.update(5, (250.0, 50.0, 0.0), received=12.25)
+        self.assertEqual(self.detector.touch['received'], 12.25)
+
+    def test_labels(self):
+        """Test that only the given targets are tested."""
+        self.detector.labels = ['left']
+        self.detector.update(1, (250.0, 50.0, 0.0), timestamp=float('nan'))
+        self.assertIsNone(self.detector.touch)
+
+        self.detector.update(2, (50.0, 50.0, 0.0), timestamp=float('nan'))
+        self.assertEqual(self.detector.touch['label'], 'left')
+        self.assertIsNone(self.detector.touch['timestamp'])
+
+    def test_plane_required(self):
+        """Test that calibrations not knowing the screen's plane are refused."""
+        calibration = ScreenCalibration([[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0]])
+        with self.assertRaises(ValueError):
+            TouchDetector(Bounds(), calibration)
+
+
+if __name__ == '__main__':
+    unittest.main()
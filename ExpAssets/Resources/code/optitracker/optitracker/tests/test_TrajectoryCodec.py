@@ -0,0 +1,146 @@
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from ..RecordingSinks import FRAME_DTYPE, load_csv
+from ..TrajectoryCodec import TrajectoryReader, TrajectoryWriter
+
+
+RECORDING = os.path.join(
+    os.path.dirname(__file__),
+    'recorded_opti_files',
+    'gripaperture_trial_handmarkers.csv',
+)
+
+
+def make_frames(num_frames, marker_count=3):
+    frames = np.zeros(num_frames * marker_count, dtype=FRAME_DTYPE)
+    frames['frame_number'] = np.repeat(np.arange(1, num_frames + 1), marker_count)
+    step = np.repeat(np.arange(num_frames), marker_count)
+    frames['pos_x'] = 0.25 + np.sin(step / 50) / 10
+    frames['pos_y'] = np.tile(np.arange(marker_count) / 100, num_frames)
+    frames['pos_z'] = 0.6 - step / 1000
+    frames['timestamp'] = frames['frame_number'] / 120
+    return frames
+
+
+class TestTrajectoryCodec(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'p1.otrj')
+
+    def tearDown(self):
+        """Clean up test fixtures after each test method."""
+        shutil.rmtree(self.test_dir)
+
+    def test_exact(self):
+        """Test that frames round-trip exactly, NaNs included."""
+        frames = make_frames(200)
+        frames['pos_x'][10:13] = np.nan
+        frames['timestamp'][-1] = np.nan
+
+        with TrajectoryWriter(self.path) as writer:
+            writer.write(frames, block_num=1, trial_num=1)
+            writer.write(frames[:0], block_num=1, trial_num=2)
+
+        chunks = list(TrajectoryReader(self.path))
+        self.assertEqual(chunks[0][0], {'block_num': 1, 'trial_num': 1})
+        self.assertEqual(chunks[0][1].dtype, frames.dtype)
+        for col in frames.dtype.names:
+            np.testing.assert_array_equal(chunks[0][1][col], frames[col])
+        self.assertEqual(len(chunks[1][1]), 0)
+
+    def test_quantised(self):
+        """Test that quantised positions are within half a quantum."""
+        frames = make_frames(200)
+        frames['pos_z'][5] = np.nan
+
+        with TrajectoryWriter(self.path, quantum=1e-5) as writer:
+            writer.write(frames)
+
+        _, decoded = next(iter(TrajectoryReader(self.path)))
+        np.testing.assert_array_equal(decoded['frame_number'], frames['frame_number'])
+        np.testing.assert_array_equal(decoded['timestamp'], frames['timestamp'])
+        for col in ['pos_x', 'pos_y', 'pos_z']:
+            np.testing.assert_allclose(decoded[col], frames[col], rtol=0, atol=5e-6)
+        self.assertTrue(np.isnan(decoded['pos_z'][5]))
+
+    def test_recording(self):
+        """Test that a recorded trial compresses well below its CSV size."""
+        frames = load_csv(RECORDING)
+        frames = frames[['frame_number', 'pos_x', 'pos_y', 'pos_z']]
+
+        with TrajectoryWriter(self.path) as writer:
+            writer.write(frames)
+
+        _, decoded = next(iter(TrajectoryReader(self.path)))
+        np.testing.assert_array_equal(decoded, frames)
+        self.assertLess(os.path.getsize(self.path), os.path.getsize(RECORDING) / 4)
+
+    def test_append_and_index(self):
+        """Test appending across writers, and reading any one chunk back."""
+        for trial_num in range(1, 4):
+            with TrajectoryWriter(self.path) as writer:
+                writer.write(make_frames(trial_num * 10), trial_num=trial_num)
+
+        reader = TrajectoryReader(self.path)
+        self.assertEqual(len(reader), 3)
+
+        entry = reader.index()[1]
+        self.assertEqual(entry['trial_num'], 2)
+        self.assertEqual(entry['row_count'], 60)
+        np.testing.assert_array_equal(reader.read(entry['offset']), make_frames(20))
+
+    def test_truncated(self):
+        """Test that complete chunks are read from an interrupted stream."""
+        with TrajectoryWriter(self.path) as writer:
+            writer.write(make_frames(10), trial_num=1)
+            writer.write(make_frames(10), trial_num=2)
+
+        with open(self.path, 'r+b') as file:
+            file.truncate(os.path.getsize(self.path) - 10)
+
+        chunks = iter(TrajectoryReader(self.path))
+        self.assertEqual(next(chunks)[0], {'trial_num': 1})
+        with self.assertWarns(UserWarning):
+            with self.assertRaises(StopIteration):
+                next(chunks)
+
+        with self.assertWarns(UserWarning):
+            index = TrajectoryReader(self.path).index()
+        self.assertEqual([entry['trial_num'] for entry in index], [1])
+
+    def test_append_after_truncation(self):
+        """Test that appending to an interrupted stream cuts off its partial chunk."""
+        with TrajectoryWriter(self.path) as writer:
+            writer.write(make_frames(10), trial_num=1)
+            writer.write(make_frames(10), trial_num=2)
+
+        with open(self.path, 'r+b') as file:
+            file.truncate(os.path.getsize(self.path) - 10)
+
+        with self.assertWarns(UserWarning):
+            writer = TrajectoryWriter(self.path)
+        with writer:
+            writer.write(make_frames(20), trial_num=3)
+
+        chunks = list(TrajectoryReader(self.path))
+        self.assertEqual([info['trial_num'] for info, _ in chunks], [1, 3])
+        np.testing.assert_array_equal(chunks[1][1], make_frames(20))
+
+    def test_not_a_stream(self):
+        """Test that other files are refused."""
+        with open(self.path, 'w') as file:
+            file.write('frame_number,pos_x,pos_y,pos_z\n')
+
+        with self.assertRaises(ValueError):
+            TrajectoryWriter(self.path)
+        with self.assertRaises(ValueError):
+            TrajectoryReader(self.path).index()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from ..TrajectoryFeatures import TrajectoryFeatures
+
+
+class TestTrajectoryFeatures(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.features = TrajectoryFeatures(
+            sample_rate=100, window_size=1, primary_axis='z', lateral_axis='x'
+        )
+
+    def test_empty_summary(self):
+        """Test summary before any frames have been received."""
+        summary = self.features.summary()
+        self.assertEqual(summary['peak_velocity'], 'NA')
+        self.assertEqual(summary['reversal_time'], 'NA')
+        self.assertEqual(summary['path_length'], 0.0)
+
+    def test_constant_velocity(self):
+        """Test features for straight movement at constant speed."""
+        for frame in range(11):
+            self.features.update(frame, (0.0, 0.0, frame * 2.0))
+
+        summary = self.features.summary()
+        self.assertAlmostEqual(summary['path_length'], 20.0)
+        self.assertAlmostEqual(summary['peak_velocity'], 200.0)
+        self.assertAlmostEqual(summary['peak_velocity_time'], 10.0)
+        self.assertAlmostEqual(summary['lateral_deviation'], 0.0)
+        self.assertEqual(summary['reversal_time'], 'NA')
+
+    def test_peak_and_reversal(self):
+        """Test peak velocity/acceleration and reversal timing."""
+        z_positions = [0, 1, 3, 7, 9, 10, 9, 8]
+        x_positions = [0, 0, 1, 1, -2, -1, 0, 0]
+        for frame, (x, z) in enumerate(zip(x_positions, z_positions)):
+            self.features.update(frame, (x, 0.0, z))
+
+        summary = self.features.summary()
+        self.assertAlmostEqual(summary['peak_velocity'], 400.0)
+        self.assertAlmostEqual(summary['peak_velocity_time'], 30.0)
+        self.assertAlmostEqual(summary['reversal_time'], 60.0)
+        self.assertAlmostEqual(summary['lateral_deviation'], 2.0)
+        self.assertGreater(summary['peak_acceleration'], 0)
+
+    def test_reset(self):
+        """Test that reset discards accumulated state."""
+        for frame in range(5):
+            self.features.update(frame, (0.0, 0.0, float(frame)))
+
+        self.features.reset()
+        self.assertEqual(self.features.summary()['peak_velocity'], 'NA')
+
+    def test_invalid_axis(self):
+        """Test initialization with invalid axis."""
+        with self.assertRaises(ValueError):
+            TrajectoryFeatures(primary_axis='all')
+
+    def test_travel_since_mark(self):
+        """Test path length & displacement accumulated since a mark."""
+        self.features.mark()  # before any frame: measured from the first
+        self.assertEqual(self.features.displacement(), 0.0)
+
+        for frame, z in enumerate([0.0, 3.0, 1.0]):
+            self.features.update(frame, (4.0, 0.0, z))
+        self.assertAlmostEqual(self.features.travelled(), 5.0)
+        self.assertAlmostEqual(self.features.displacement('z'), 1.0)
+
+        self.features.mark()
+        self.features.update(3, (1.0, 0.0, 5.0))
+        self.assertAlmostEqual(self.features.travelled(), 5.0)
+        self.assertAlmostEqual(self.features.displacement(), 5.0)
+        self.assertAlmostEqual(self.features.displacement('x'), -3.0)
+        self.assertAlmostEqual(self.features.summary()['path_length'], 10.0)
+
+        with self.assertRaises(ValueError):
+            self.features.displacement('w')
+
+
+if __name__ == '__main__':
+    unittest.main()
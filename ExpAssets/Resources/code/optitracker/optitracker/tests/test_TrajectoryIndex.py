@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+
+from .. import Kinematics
+from ..TrajectoryIndex import TrajectoryIndex
+
+
+class TestTrajectoryIndex(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        rng = np.random.default_rng(0)
+        num_frames = 200
+
+        # 2 markers per frame, wandering about
+        self.frames = np.zeros(
+            num_frames * 2, dtype=Kinematics.POSITION_DTYPE + [('timestamp', 'f8')]
+        )
+        self.frames['frame_number'] = np.repeat(np.arange(1, num_frames + 1), 2)
+        self.frames['timestamp'] = self.frames['frame_number'] / 100
+        for col in ['pos_x', 'pos_y', 'pos_z']:
+            self.frames[col] = np.repeat(rng.normal(size=num_frames).cumsum(), 2)
+
+        self.positions = Kinematics.centroids(self.frames, marker_count=2)
+        self.index = TrajectoryIndex.from_frames(self.frames, marker_count=2)
+
+    def test_matches_kinematics(self):
+        """Test range queries against distances computed over the range's frames."""
+        for start, end in [(1, 200), (17, 18), (50, 120)]:
+            within = self.positions[start - 1 : end]
+            for axis in ['x', 'z', 'all']:
+                expected = Kinematics.distances(within, axis)['distance'].sum()
+                self.assertAlmostEqual(self.index.distance(start, end, axis), expected)
+
+        # timestamps are 100 Hz
+        path = self.index.distance(50, 60)
+        self.assertAlmostEqual(self.index.velocity(50, 60), path / 0.1)
+
+    def test_batched(self):
+        """Test many ranges in one call, including empty and out-of-bounds ranges."""
+        starts = np.array([1, 50, 10, 300, -5])
+        ends = np.array([200, 120, 10, 400, 3])
+
+        distances = self.index.distances(starts, ends)
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            self.assertAlmostEqual(distances[i], self.index.distance(start, end))
+        self.assertEqual(distances[2], 0.0)
+        self.assertEqual(distances[3], 0.0)
+
+        velocities = self.index.velocities(starts, ends, axis='y')
+        self.assertTrue(np.isnan(velocities[2]))
+
+        with self.assertRaises(ValueError):
+            self.index.distances(starts, ends, axis='w')
+
+    def test_incremental(self):
+        """Test that frames appended live index the same as a trial built at once."""
+        index = TrajectoryIndex(sample_rate=100, capacity=8)
+        index.extend(self.positions[:20])
+        for pos in self.positions[20:]:
+            index.append(
+                int(pos['frame_number']), (pos['pos_x'], pos['pos_y'], pos['pos_z'])
+            )
+
+        self.assertEqual(len(index), 200)
+        starts = np.arange(1, 150)
+        ends = starts + 50
+        np.testing.assert_allclose(
+            index.distances(starts, ends), self.index.distances(starts, ends)
+        )
+        # untimestamped frames are timed by sample rate
+        np.testing.assert_allclose(
+            index.velocities(starts, ends), self.index.velocities(starts, ends)
+        )
+
+        index.reset()
+        with self.assertRaises(LookupError):
+            index.distance(1, 2)
+
+    def test_dropped_frames(self):
+        """Test that ranges are located by frame number, around gaps."""
+        index = TrajectoryIndex(sample_rate=100)
+        for frame, z in [(1, 0.0), (2, 1.0), (5, 4.0), (6, 6.0)]:
+            index.append(frame, (0.0, 0.0, z))
+
+        self.assertEqual(index.distance(2, 5, 'z'), 3.0)
+        self.assertEqual(index.distance(3, 4, 'z'), 0.0)
+        self.assertEqual(index.distance(3, 6, 'z'), 2.0)
+        self.assertAlmostEqual(index.velocity(1, 5, 'z'), 100.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+import numpy as np
+
+from ..TrialArchive import TrialArchive
+from ..RecordingSinks import FRAME_DTYPE
+
+
+def make_frames(num_frames, marker_count=3):
+    frames = np.zeros(num_frames * marker_count, dtype=FRAME_DTYPE)
+    frames['frame_number'] = np.repeat(np.arange(num_frames), marker_count)
+    frames['pos_z'] = np.arange(len(frames)) / 1000
+    return frames
+
+
+class TestTrialArchive(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'p1.zip')
+        self.archive = TrialArchive(self.path)
+
+    def tearDown(self):
+        """Clean up test fixtures after each test method."""
+        shutil.rmtree(self.test_dir)
+
+    def test_append_and_read(self):
+        """Test appending trials and reading any one of them back."""
+        for trial_num in range(1, 4):
+            self.archive.append(
+                make_frames(trial_num * 10), block_num=1, trial_num=trial_num,
+                cue_validity=True,
+            )
+
+        frames = self.archive.read(block_num=1, trial_num=2)
+        np.testing.assert_array_equal(frames, make_frames(20))
+
+        # index is persisted, and reloaded by new instances
+        archive = TrialArchive(self.path)
+        self.assertEqual(len(archive), 3)
+        self.assertEqual(archive.index()[2]['frame_count'], 30)
+        self.assertTrue(archive.index()[0]['cue_validity'])
+        self.assertIn('Block_1_Trial_3', archive)
+
+    def test_duplicate_trial(self):
+        """Test that a trial cannot be archived twice."""
+        self.archive.append(make_frames(5), block_num=1, trial_num=1)
+        with self.assertRaises(ValueError):
+            self.archive.append(make_frames(5), block_num=1, trial_num=1)
+
+        # also when appended through another instance, its index already loaded
+        other = TrialArchive(self.path)
+        self.assertEqual(len(other), 1)
+        self.archive.append(make_frames(5), block_num=1, trial_num=2)
+        with self.assertRaises(ValueError):
+            other.append(make_frames(5), block_num=1, trial_num=2)
+
+        # a fresh instance reads trials without loading the index first
+        self.assertEqual(len(TrialArchive(self.path).read(1, 2)), 15)
+        self.assertEqual(len(TrialArchive(self.path)), 2)
+
+    def test_interrupted_append(self):
+        """Test that an append interrupted midway leaves the archive as it was."""
+        self.archive.append(make_frames(5), block_num=1, trial_num=1)
+
+        writestr = zipfile.ZipFile.writestr
+
+        def interrupted(archive, name, *args, **kwargs):
+            # fails after the trial's frames are written, before its index entry
+            if name.startswith('index/'):
+                raise KeyboardInterrupt
+            return writestr(archive, name, *args, **kwargs)
+
+        with mock.patch.object(zipfile.ZipFile, 'writestr', interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.archive.append(make_frames(6), block_num=1, trial_num=2)
+
+        self.assertEqual(os.listdir(self.test_dir), ['p1.zip'])
+        archive = TrialArchive(self.path)
+        names = [entry['name'] for entry in archive.index()]
+        self.assertEqual(names, ['Block_1_Trial_1'])
+        with self.assertRaises(KeyError):
+            archive.read(block_num=1, trial_num=2)
+
+        # the trial can be appended again once the interruption has passed
+        archive.append(make_frames(6), block_num=1, trial_num=2)
+        self.assertEqual(len(TrialArchive(self.path).read(1, 2)), 18)
+
+    def test_missing_trial(self):
+        """Test reading a trial not present in the archive."""
+        with self.assertRaises(KeyError):
+            self.archive.read(block_num=1, trial_num=1)
+
+    def test_iteration(self):
+        """Test iterating over trials in order of appending."""
+        self.archive.append(make_frames(5), block_num=2, trial_num=1)
+        self.archive.append(make_frames(6), block_num=1, trial_num=1)
+
+        names = [entry['name'] for entry, _ in self.archive]
+        self.assertEqual(names, ['Block_2_Trial_1', 'Block_1_Trial_1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+from ..RecordingSinks import CSVSink
+from ..TrialBuffer import TrialBuffer
+
+
+def make_rows(frame_number, count=3, timestamp=None):
+    rows = [
+        {
+            'frame_number': frame_number,
+            'pos_x': frame_number / 1000,
+            'pos_y': 0.0,
+            'pos_z': i / 1000,
+        }
+        for i in range(count)
+    ]
+    if timestamp is not None:
+        for row in rows:
+            row['timestamp'] = timestamp
+    return rows
+
+
+class TestTrialBuffer(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.sink = CSVSink(os.path.join(self.test_dir, 'trial.csv'))
+        self.buffer = TrialBuffer()
+        for frame in range(1, 6):
+            self.buffer.append(make_rows(frame))
+
+    def tearDown(self):
+        """Clean up test fixtures after each test method."""
+        shutil.rmtree(self.test_dir)
+
+    def test_latest(self):
+        """Test querying the most recent frames."""
+        frames = self.buffer.latest(num_frames=2)
+        self.assertEqual(len(frames), 6)
+        self.assertEqual(set(frames['frame_number']), {4, 5})
+        self.assertEqual(len(self.buffer.frames()), 15)
+
+    def test_empty(self):
+        """Test querying before anything has been buffered."""
+        with self.assertRaises(LookupError):
+            TrialBuffer().latest(num_frames=2)
+
+    def test_commit(self):
+        """Test that committing stores the trial, and empties the buffer."""
+        self.buffer.commit(self.sink)
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(len(self.sink.read(num_frames=5)), 15)
+
+    def test_discard(self):
+        """Test that discarding never touches storage."""
+        self.buffer.discard()
+        self.assertEqual(len(self.buffer), 0)
+        self.assertFalse(os.path.exists(self.sink.path))
+
+    def test_growth(self):
+        """Test that rows survive the buffer outgrowing its initial capacity."""
+        buffer = TrialBuffer(capacity=4)
+        for frame in range(1, 6):
+            buffer.append(make_rows(frame))
+
+        frames = buffer.frames()
+        self.assertEqual(len(frames), 15)
+        self.assertEqual(list(frames['frame_number'][::3]), [1, 2, 3, 4, 5])
+
+    def test_reuse(self):
+        """Test that a discarded buffer is refilled from the start."""
+        self.buffer.discard()
+        self.buffer.append(make_rows(1))
+        self.assertEqual(len(self.buffer.frames()), 3)
+        self.assertEqual(set(self.buffer.latest(num_frames=5)['frame_number']), {1})
+
+    def test_time_windows(self):
+        """Test querying frames by timestamp, at an uneven frame rate."""
+        with self.assertRaises(ValueError):
+            self.buffer.since(0.0)
+        self.assertFalse(self.buffer.timestamped)
+
+        buffer = TrialBuffer()
+        for frame, timestamp in zip(range(1, 7), [0.0, 0.01, 0.02, 0.04, 0.05, 0.09]):
+            buffer.append(make_rows(frame, timestamp=timestamp))
+        self.assertTrue(buffer.timestamped)
+
+        self.assertEqual(set(buffer.since(0.04)['frame_number']), {4, 5, 6})
+        self.assertEqual(set(buffer.since(0.03)['frame_number']), {4, 5, 6})
+        self.assertEqual(set(buffer.within(0.04)['frame_number']), {5, 6})
+        self.assertEqual(set(buffer.within(0.0)['frame_number']), {6})
+
+        with self.assertRaises(LookupError):
+            TrialBuffer().within(0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+# Batch computes per-trial and per-frame kinematics for all recorded OptiData
+import argparse
+import csv
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+# NOTE: On PC this is case sensitive (first O is a big O)
+from Optitracker.optitracker import Kinematics  # type: ignore
+from Optitracker.optitracker.RecordingSinks import (  # type: ignore
+    SQLiteSink,
+    as_frames,
+    load_csv,
+)
+from Optitracker.optitracker.TrajectoryCodec import TrajectoryReader  # type: ignore
+from Optitracker.optitracker.TrajectoryFeatures import TrajectoryFeatures  # type: ignore
+from Optitracker.optitracker.TrialArchive import TrialArchive  # type: ignore
+
+from optidata import database_trials, participant_sources, trial_files
+
+
+TRIAL_COLS = [
+    'p_id', 'block_num', 'trial_num', 'practicing', 'cue_reliability',
+    'cue_laterality', 'cue_validity', 'frame_count',
+    'peak_velocity', 'peak_velocity_time', 'peak_acceleration',
+    'peak_acceleration_time', 'path_length', 'lateral_deviation', 'reversal_time',
+]
+
+FRAME_COLS = [
+    'p_id', 'block_num', 'trial_num', 'frame_number',
+    'pos_x', 'pos_y', 'pos_z', 'velocity',
+]
+
+
+def trial_tasks(opti_data, database=None):
+    """Yields a (p_id, source path, trial details) task for every recorded trial.
+
+    Tasks only describe where a trial lives; frames are loaded by the worker.
+    Trials recorded to the klibs database are included, given its path.
+
+    """
+    for p_id, source in participant_sources(opti_data, database):
+        if source.endswith('.db'):
+            for info in database_trials(database, int(p_id)):
+                yield p_id, source, info
+        elif source.endswith('.zip'):
+            for entry in TrialArchive(source).index():
+                yield p_id, source, entry
+        elif source.endswith('.otrj'):
+            for entry in TrajectoryReader(source).index():
+                yield p_id, source, entry
+        else:
+            for path, info in trial_files(source):
+                yield p_id, path, info
+
+
+@lru_cache(maxsize=8)
+def open_archive(source):
+    """Returns an archive, stream or database reader, shared by a worker's trials."""
+    if source.endswith('.zip'):
+        return TrialArchive(source)
+    if source.endswith('.otrj'):
+        return TrajectoryReader(source)
+    return SQLiteSink(source)  # the klibs database
+
+
+def load_trial(source, info):
+    """Loads a trial's marker rows from a csv file, archive, stream or database."""
+    if source.endswith('.zip'):
+        frames = open_archive(source).read(info['block_num'], info['trial_num'])
+    elif source.endswith('.otrj'):
+        frames = open_archive(source).read(info['offset'])
+    elif source.endswith('.db'):
+        frames = open_archive(source).read(
+            info['participant_id'], info['block_num'], info['trial_num']
+        )
+    else:
+        frames = load_csv(source)
+    return as_frames(frames)
+
+
+def trial_kinematics(frames, marker_count, rescale_by, sample_rate, window_size, primary_axis):
+    """Computes a trial's centroid positions, frame velocities and summary features.
+
+    Frames are spaced by their recorded timestamps, as they are live; only trials
+    recorded without timestamps are taken to be 1 / sample_rate apart.
+
+    Returns:
+        tuple: Centroid positions (structured array), per-frame velocity (list,
+        NaN for the first frame) and summary features (dict).
+
+    """
+    for col in ['pos_x', 'pos_y', 'pos_z']:
+        frames[col] *= rescale_by
+
+    positions = Kinematics.centroids(frames, marker_count)
+    timestamps = Kinematics.frame_times(frames)
+    speeds = Kinematics.velocities(
+        positions, sample_rate, axis='all', timestamps=timestamps
+    )
+
+    features = TrajectoryFeatures(
+        sample_rate=sample_rate,
+        window_size=window_size,
+        primary_axis=primary_axis,
+    )
+    for i, pos in enumerate(positions):
+        features.update(
+            int(pos['frame_number']),
+            (pos['pos_x'], pos['pos_y'], pos['pos_z']),
+            None if timestamps is None else float(timestamps[i]),
+        )
+
+    velocity = [float('nan')] + speeds['velocity'].tolist()
+    return positions, velocity, features.summary()
+
+
+def process_trial(task, **kinematics_args):
+    """Computes kinematics for a single trial (run within a worker process).
+
+    Returns:
+        tuple: The trial's summary row (dict) and its per-frame rows (list of tuples).
+
+    """
+    p_id, source, info = task
+
+    frames = load_trial(source, info)
+    positions, velocity, features = trial_kinematics(frames, **kinematics_args)
+
+    summary = {col: info.get(col, 'NA') for col in TRIAL_COLS}
+    summary.update(features, p_id=p_id, frame_count=len(positions))
+
+    rows = [
+        (p_id, info['block_num'], info['trial_num'], *pos.tolist(), vel)
+        for pos, vel in zip(positions, velocity)
+    ]
+
+    return summary, rows
+
+
+def bounded_map(executor, fn, iterable, max_pending):
+    """Like executor.map, but with at most max_pending tasks in flight at a time.
+
+    Results are yielded in order as they complete, so memory use is bounded
+    regardless of how many tasks there are.
+
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compute per-trial and per-frame kinematics for all OptiData recordings.'
+    )
+    parser.add_argument('opti_data', nargs='?', default='OptiData')
+    parser.add_argument(
+        '--database', default='ExpAssets/symbolic_cues_2025.db',
+        help='klibs database, for trajectories recorded to it',
+    )
+    parser.add_argument('--out', default='kinematics', help='prefix for output tables')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--marker-count', type=int, default=10)
+    parser.add_argument('--rescale-by', type=float, default=1000)
+    parser.add_argument('--sample-rate', type=int, default=120)
+    parser.add_argument('--window-size', type=int, default=5)
+    parser.add_argument('--primary-axis', default='z')
+    args = parser.parse_args(argv)
+
+    worker = partial(
+        process_trial,
+        marker_count=args.marker_count,
+        rescale_by=args.rescale_by,
+        sample_rate=args.sample_rate,
+        window_size=args.window_size,
+        primary_axis=args.primary_axis,
+    )
+
+    trial_count = 0
+    with open(f'{args.out}_trials.csv', 'w', newline='') as trials_file, open(
+        f'{args.out}_frames.csv', 'w', newline=''
+    ) as frames_file, ProcessPoolExecutor(max_workers=args.workers) as executor:
+        trials_out = csv.DictWriter(trials_file, fieldnames=TRIAL_COLS)
+        trials_out.writeheader()
+        frames_out = csv.writer(frames_file)
+        frames_out.writerow(FRAME_COLS)
+
+        tasks = trial_tasks(args.opti_data, args.database)
+        results = bounded_map(executor, worker, tasks, 4 * args.workers)
+        for summary, rows in results:
+            trials_out.writerow(summary)
+            frames_out.writerows(rows)
+            trial_count += 1
+
+    print(f'Processed {trial_count} trials')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
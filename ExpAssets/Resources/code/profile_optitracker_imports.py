@@ -0,0 +1,84 @@
+# Profiles the import cost of the optitracker package, per tracking backend
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# NOTE: On PC this is case sensitive (first O is a big O)
+PACKAGE = 'Optitracker' if os.path.isdir(os.path.join(HERE, 'Optitracker')) else 'optitracker'
+
+SCENARIOS = {
+    'numpy (baseline)': 'import numpy',
+    'optitracker': f'from {PACKAGE}.optitracker.OptiTracker import Optitracker',
+    'optitracker + natnet backend': (
+        f'from {PACKAGE}.optitracker.OptiTracker import Optitracker; '
+        f'from {PACKAGE}.NatNetClient.NatNetClient import NatNetClient'
+    ),
+    'optitracker + mouse backend': (
+        f'from {PACKAGE}.optitracker.OptiTracker import Optitracker; import pyautogui'
+    ),
+}
+
+
+def profile_import(statement):
+    """Runs statement in a fresh interpreter under -X importtime.
+
+    Returns:
+        dict: Cumulative import time (in µs) by top-level module imported, or None
+            if the statement failed (e.g. a backend dependency isn't installed).
+
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # top-level imports are those without indentation in the name column
+        if not name[1:].startswith(' '):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Report import time of the optitracker package for each backend.'
+    )
+    parser.add_argument('--runs', type=int, default=10, help='fresh interpreters per scenario')
+    parser.add_argument('--top', type=int, default=5, help='slowest imports to list')
+    args = parser.parse_args(argv)
+
+    for label, statement in SCENARIOS.items():
+        runs = [profile_import(statement) for _ in range(args.runs)]
+        if any(run is None for run in runs):
+            print(f'{label}: unavailable (import failed)\n')
+            continue
+
+        totals = [sum(run.values()) / 1000 for run in runs]
+        print(
+            f'{label}: median {statistics.median(totals):.1f} ms, '
+            f'min {min(totals):.1f} ms over {args.runs} runs'
+        )
+
+        slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)
+        for name, cumulative in slowest[: args.top]:
+            print(f'    {cumulative / 1000:8.1f} ms  {name}')
+        print()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# Lightweight per-iteration telemetry for the trial loop (development mode)
+import time
+
+import numpy as np
+
+
+TELEMETRY_DTYPE = [
+    ('time_ms', 'f8'),
+    ('phase', 'U16'),
+    ('pos_x', 'f8'),
+    ('pos_y', 'f8'),
+    ('velocity', 'f8'),
+    ('loop_ms', 'f8'),
+]
+
+
+class Telemetry(object):
+    """Records trial-loop state into a fixed-size ring, with rate-limited output.
+
+    Recording is a handful of array writes into preallocated memory, with no locks
+    or I/O, so it barely perturbs loop timing. Summaries are printed at most once
+    per emit_interval, and the full per-iteration log is written out by dump().
+
+    Note:
+        The ring is written to by a single thread (the trial loop); once capacity is
+        reached, the oldest records are overwritten.
+
+    """
+
+    def __init__(self, capacity=8192, emit_interval=0.5):
+        """Initialize the Telemetry object.
+
+        Args:
+            capacity (int, optional): Number of iterations retained. Defaults to 8192.
+            emit_interval (float, optional): Minimum time between printed summaries,
+                in seconds. Defaults to 0.5.
+
+        """
+        if capacity < 1:
+            raise ValueError('Capacity must be positive.')
+
+        self.capacity = capacity
+        self.emit_interval = emit_interval
+
+        self.__ring = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        self.reset()
+
+    def reset(self, label=''):
+        """Empties the ring, e.g. at the start of a trial."""
+        self.label = label
+        self.__count = 0
+        self.__last_tick = None
+        self.__last_emit = time.perf_counter()
+        self.__emitted_at = 0
+
+    def record(self, time_ms, phase, position, velocity):
+        """Records the state of one loop iteration.
+
+        Args:
+            time_ms (float): Trial time, in ms.
+            phase (str): Current trial phase.
+            position (tuple): Current (x, y) cursor position.
+            velocity (float): Current velocity.
+
+        """
+        tick = time.perf_counter()
+        loop_ms = (tick - self.__last_tick) * 1000 if self.__last_tick else 0.0
+        self.__last_tick = tick
+
+        entry = self.__ring[self.__count % self.capacity]
+        entry['time_ms'] = time_ms
+        entry['phase'] = phase
+        entry['pos_x'] = position[0]
+        entry['pos_y'] = position[1]
+        entry['velocity'] = velocity
+        entry['loop_ms'] = loop_ms
+
+        self.__count += 1
+
+    def __len__(self):
+        return min(self.__count, self.capacity)
+
+    def records(self):
+        """Returns retained records, oldest first."""
+        if self.__count <= self.capacity:
+            return self.__ring[: self.__count].copy()
+        start = self.__count % self.capacity
+        return np.concatenate([self.__ring[start:], self.__ring[:start]])
+
+    def summary(self):
+        """Returns a one-line summary of iterations since the last emitted summary."""
+        if self.__count == 0:
+            return f'{self.label} | no iterations recorded'
+
+        first = max(self.__emitted_at, self.__count - self.capacity)
+        idx = np.arange(first, self.__count) % self.capacity
+        recent = self.__ring[idx]
+        latest = self.__ring[(self.__count - 1) % self.capacity]
+
+        loop_ms = recent['loop_ms'][recent['loop_ms'] > 0]
+        mean_loop = loop_ms.mean() if len(loop_ms) else 0.0
+        max_loop = loop_ms.max() if len(loop_ms) else 0.0
+
+        return (
+            f'{self.label} | {latest["phase"]} | t={int(latest["time_ms"])} ms'
+            f' | pos=({int(latest["pos_x"])}, {int(latest["pos_y"])})'
+            f' | vel={int(latest["velocity"])}'
+            f' | loop mean={mean_loop:.2f} ms max={max_loop:.2f} ms'
+            f' ({len(recent)} iterations)'
+        )
+
+    def emit(self, force=False):
+        """Prints a summary, if at least emit_interval has passed since the last one.
+
+        Returns:
+            bool: True if a summary was printed.
+
+        """
+        now = time.perf_counter()
+        if not force and now - self.__last_emit < self.emit_interval:
+            return False
+
+        print(self.summary())
+        self.__last_emit = now
+        self.__emitted_at = self.__count
+        return True
+
+    def dump(self, path):
+        """Writes all retained records to a csv file."""
+        records = self.records()
+        with open(path, 'w', newline='') as file:
+            file.write(','.join(records.dtype.names) + '\n')
+            np.savetxt(file, records, delimiter=',', fmt='%s')
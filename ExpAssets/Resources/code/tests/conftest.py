@@ -0,0 +1,21 @@
+import importlib.util
+import os
+import sys
+
+# the scripts live one level up
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODE_DIR)
+
+# The scripts import the package as Optitracker, as it is named on the lab PCs. On
+# case sensitive file systems the checkout (optitracker/) is registered under that
+# name, so that the scripts import as they do in the experiment.
+if importlib.util.find_spec('Optitracker') is None:
+    package_dir = os.path.join(CODE_DIR, 'optitracker')
+    spec = importlib.util.spec_from_file_location(
+        'Optitracker',
+        os.path.join(package_dir, '__init__.py'),
+        submodule_search_locations=[package_dir],
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules['Optitracker'] = package
+    spec.loader.exec_module(package)
@@ -0,0 +1,72 @@
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from export_optidata import joined_rows
+
+
+def make_database(trials, aborts):
+    """Returns an in-memory klibs-like database holding trials & aborts."""
+    connection = sqlite3.connect(':memory:')
+    connection.execute(
+        'CREATE TABLE trials (id INTEGER PRIMARY KEY, participant_id INTEGER, '
+        'block_num INTEGER, trial_num INTEGER, rt REAL)'
+    )
+    connection.execute(
+        'CREATE TABLE aborts (id INTEGER PRIMARY KEY, participant_id INTEGER, '
+        'block_num INTEGER, trial_num INTEGER, reason TEXT, recycled TEXT)'
+    )
+    connection.executemany(
+        'INSERT INTO trials (participant_id, block_num, trial_num, rt) '
+        'VALUES (?, ?, ?, ?)',
+        trials,
+    )
+    connection.executemany(
+        'INSERT INTO aborts (participant_id, block_num, trial_num, reason, recycled) '
+        'VALUES (?, ?, ?, ?, ?)',
+        aborts,
+    )
+    return connection
+
+
+class TestJoinedRows(unittest.TestCase):
+    def test_recycled_aborts_kept_apart(self):
+        """Test that recycled aborts are exported as rows of their own."""
+        connection = make_database(
+            trials=[(1, 1, 1, 0.5), (1, 1, 2, 0.6), (1, 1, 3, 0.7), (2, 1, 2, 0.1)],
+            aborts=[
+                (1, 1, 2, 'early', 'True'),
+                (1, 1, 2, 'slow', 'False'),
+                (2, 1, 1, 'early', 'True'),
+            ],
+        )
+        rows = list(joined_rows(connection, 1))
+        connection.close()
+
+        # trial (1, 2) is its recycled early abort, then its attempt joined with slow
+        self.assertEqual(
+            [(row['trial_num'], row.get('abort_reason')) for row in rows],
+            [(1, None), (2, 'early'), (2, 'slow'), (3, None)],
+        )
+        self.assertEqual(rows[1]['abort_recycled'], 'True')
+        self.assertNotIn('rt', rows[1])
+        self.assertEqual(rows[2]['rt'], 0.6)
+        self.assertEqual(rows[2]['abort_recycled'], 'False')
+
+    def test_unmatched_abort(self):
+        """Test that a non-recycled abort without a trial is still exported."""
+        connection = make_database(
+            trials=[(1, 1, 1, 0.5)], aborts=[(1, 1, 2, 'early', 0)]
+        )
+        rows = list(joined_rows(connection, 1))
+        connection.close()
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['abort_reason'], 'early')
+        self.assertEqual(rows[1]['abort_recycled'], '0')
+
+
+if __name__ == '__main__':
+    unittest.main()
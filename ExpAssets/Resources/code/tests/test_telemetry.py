@@ -0,0 +1,57 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetry import Telemetry
+
+
+class TestTelemetry(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.telemetry = Telemetry(capacity=4, emit_interval=60.0)
+        self.telemetry.reset(label='Block 1 Trial 1')
+
+    def tearDown(self):
+        """Clean up test fixtures after each test method."""
+        shutil.rmtree(self.test_dir)
+
+    def test_ring(self):
+        """Test that the latest records are retained, oldest first."""
+        for i in range(6):
+            self.telemetry.record(i * 10.0, 'reach', (i, -i), float(i))
+
+        records = self.telemetry.records()
+        self.assertEqual(len(self.telemetry), 4)
+        self.assertEqual(list(records['time_ms']), [20.0, 30.0, 40.0, 50.0])
+        self.assertEqual(records['phase'][0], 'reach')
+
+        path = os.path.join(self.test_dir, 'telemetry.csv')
+        self.telemetry.dump(path)
+        with open(path, 'r') as file:
+            self.assertEqual(len(file.readlines()), 5)
+
+        with self.assertRaises(ValueError):
+            Telemetry(capacity=0)
+
+    def test_emit(self):
+        """Test that summaries are rate limited, unless forced."""
+        self.telemetry.record(5.0, 'wait', (1, 2), 0.0)
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertFalse(self.telemetry.emit())
+            self.assertTrue(self.telemetry.emit(force=True))
+        self.assertIn('Block 1 Trial 1 | wait | t=5 ms', output.getvalue())
+
+        self.telemetry.reset()
+        self.assertIn('no iterations recorded', self.telemetry.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
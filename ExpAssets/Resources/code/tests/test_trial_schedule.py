@@ -0,0 +1,108 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trial_schedule import TrialSchedule, build_trial_set
+
+# as in the experiment's params
+CUE_TYPES = {
+    'high': {'left': [0.8, 0.2], 'right': [0.2, 0.8]},
+    'low': {'left': [0.525, 0.475], 'right': [0.475, 0.525]},
+}
+
+PARAMS = {
+    'cue_types': CUE_TYPES,
+    'trials_per_cue': 40,
+    'block_count': 4,
+    'practice_count': 20,
+    'seed': 1234,
+    'max_run': 4,
+}
+
+
+def longest_run(trials):
+    longest = run = 1
+    for previous, trial in zip(trials, trials[1:]):
+        run = run + 1 if trial == previous else 1
+        longest = max(longest, run)
+    return longest
+
+
+class TestTrialSchedule(unittest.TestCase):
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures after each test method."""
+        shutil.rmtree(self.test_dir)
+
+    def test_proportions(self):
+        """Test that every block meets each cue's validity proportions exactly."""
+        schedule = TrialSchedule.generate(**PARAMS)
+        self.assertEqual(len(schedule.blocks), 4)
+        self.assertEqual(len(schedule.practice), 20)
+
+        for block in schedule.blocks:
+            counts = Counter(block)
+            self.assertEqual(len(block), 160)
+            self.assertEqual(counts[('high', 'left', True)], 32)
+            self.assertEqual(counts[('high', 'left', False)], 8)
+            self.assertEqual(counts[('high', 'right', True)], 8)
+            self.assertEqual(counts[('low', 'left', True)], 21)
+            self.assertEqual(counts[('low', 'left', False)], 19)
+
+        with self.assertRaises(ValueError):
+            build_trial_set(CUE_TYPES, 30)
+
+    def test_max_run(self):
+        """Test that no trial type repeats more than max_run times in a row."""
+        for seed in range(5):
+            schedule = TrialSchedule.generate(**dict(PARAMS, seed=seed, max_run=2))
+            for block in schedule.blocks:
+                self.assertLessEqual(longest_run(block), 2)
+
+    def test_recycle(self):
+        """Test that recycled trials are re-queued at random among those remaining."""
+        queue = TrialSchedule.generate(**PARAMS).queues()[0]
+
+        positions = []
+        for _ in range(50):
+            trial = queue.pop()
+            remaining = list(queue)
+            queue.recycle(trial)
+
+            trials = list(queue)
+            self.assertEqual(Counter(trials), Counter(remaining + [trial]))
+            self.assertLessEqual(longest_run(trials), 4)
+            # where the trial went: the first position no longer holding what it did
+            pairs = enumerate(zip(remaining + [trial], trials))
+            moved = [i for i, (old, new) in pairs if old != new]
+            positions.append(moved[0] if moved else len(remaining))
+
+        self.assertEqual(len(queue), 160)
+        self.assertGreater(len(set(positions)), 10)
+
+    def test_cached(self):
+        """Test that cached schedules reload identically for the same seed."""
+        first = TrialSchedule.load_or_generate(self.test_dir, 'p1', **PARAMS)
+        again = TrialSchedule.load_or_generate(self.test_dir, 'p1', **PARAMS)
+        self.assertEqual(again.blocks, first.blocks)
+        self.assertEqual(again.practice, first.practice)
+        self.assertEqual(again.blocks, TrialSchedule.generate(**PARAMS).blocks)
+
+        recycled = [queue.pop() for queue in first.queues()]
+        self.assertEqual(recycled, [queue.pop() for queue in again.queues()])
+
+        other = TrialSchedule.load_or_generate(
+            self.test_dir, 'p1', **dict(PARAMS, seed=1)
+        )
+        self.assertNotEqual(other.blocks, first.blocks)
+
+
+if __name__ == '__main__':
+    unittest.main()
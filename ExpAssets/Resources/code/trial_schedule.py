@@ -0,0 +1,223 @@
+# Seeded, counterbalanced trial schedules with run-length constraints
+import json
+import os
+from random import Random
+
+
+def build_trial_set(cue_types, trials_per_cue):
+    """Builds the set of trials making up one block, with exact cue validities.
+
+    Args:
+        cue_types (dict): Proportions of validly & invalidly cued trials, by cue
+            reliability then laterality, e.g. {'high': {'left': [0.8, 0.2]}}.
+        trials_per_cue (int): Number of trials per cue (reliability & laterality).
+
+    Returns:
+        list: (reliability, laterality, validity) tuples.
+
+    Raises:
+        ValueError: If a cue's proportions don't divide its trials exactly.
+
+    """
+    trials = []
+    for reliability, lateralities in cue_types.items():
+        for laterality, (valid, invalid) in lateralities.items():
+            n_valid = round(valid * trials_per_cue)
+            n_invalid = round(invalid * trials_per_cue)
+            if n_valid + n_invalid != trials_per_cue or not (
+                abs(n_valid - valid * trials_per_cue) < 1e-6
+                and abs(n_invalid - invalid * trials_per_cue) < 1e-6
+            ):
+                raise ValueError(
+                    f'Proportions for {reliability}/{laterality} cues cannot be '
+                    f'met exactly with {trials_per_cue} trials.'
+                )
+            trials += [(reliability, laterality, True)] * n_valid
+            trials += [(reliability, laterality, False)] * n_invalid
+    return trials
+
+
+def constrained_order(trials, rng, max_run, attempts=1000):
+    """Randomly orders trials such that no trial type repeats more than max_run times.
+
+    Trials are drawn one at a time, weighted by how many of each type remain,
+    skipping types that would extend a run past max_run. Draws that paint
+    themselves into a corner are restarted.
+
+    Raises:
+        RuntimeError: If no valid order is found within the given attempts.
+
+    """
+    for _ in range(attempts):
+        remaining = {}
+        for trial in trials:
+            remaining[trial] = remaining.get(trial, 0) + 1
+
+        order = []
+        run = 0
+        while remaining:
+            options = [
+                t for t in remaining if not (order and t == order[-1] and run >= max_run)
+            ]
+            if not options:
+                break
+            weights = [remaining[t] for t in options]
+            trial = rng.choices(options, weights=weights)[0]
+            run = run + 1 if order and trial == order[-1] else 1
+            order.append(trial)
+            remaining[trial] -= 1
+            if remaining[trial] == 0:
+                del remaining[trial]
+
+        if len(order) == len(trials):
+            return order
+
+    raise RuntimeError(f'Could not satisfy max_run={max_run} for trial set.')
+
+
+class TrialQueue(object):
+    """A block's remaining trials, run from the end of the queue.
+
+    Recycled trials are re-inserted at a random remaining position in constant
+    time (by swapping with the trial already there), rather than by reshuffling.
+
+    """
+
+    def __init__(self, trials, rng, max_run=None):
+        self.__trials = list(trials)
+        self.__rng = rng
+        self.__max_run = max_run
+
+    def __len__(self):
+        return len(self.__trials)
+
+    def __iter__(self):
+        return iter(self.__trials)
+
+    def pop(self):
+        """Removes and returns the next trial to run."""
+        return self.__trials.pop()
+
+    def __run_length(self, trials, i):
+        # length of the run of identical trials through position i
+        run = 1
+        for step in (-1, 1):
+            j = i + step
+            while 0 <= j < len(trials) and trials[j] == trials[i]:
+                run += 1
+                j += step
+        return run
+
+    def recycle(self, trial, attempts=10):
+        """Re-inserts a trial at a random position among those remaining.
+
+        A few candidate positions are tried, taking the first that keeps runs
+        within max_run; if none do, the last candidate is kept regardless.
+
+        """
+        trials = self.__trials
+        trials.append(trial)
+        end = len(trials) - 1
+
+        for _ in range(attempts):
+            i = self.__rng.randint(0, end)
+            trials[i], trials[end] = trials[end], trials[i]
+            if self.__max_run is None or (
+                self.__run_length(trials, i) <= self.__max_run
+                and self.__run_length(trials, end) <= self.__max_run
+            ):
+                return
+            trials[i], trials[end] = trials[end], trials[i]
+
+        trials[i], trials[end] = trials[end], trials[i]
+
+
+class TrialSchedule(object):
+    """A full-session schedule of blocks (and practice trials), generated from a seed.
+
+    Schedules are cached on disk per participant and seed, so relaunching a session
+    reproduces it exactly without regenerating it.
+
+    """
+
+    def __init__(self, blocks, practice, params):
+        self.blocks = blocks
+        self.practice = practice
+        self.params = params
+
+    @classmethod
+    def generate(cls, cue_types, trials_per_cue, block_count, practice_count, seed, max_run):
+        """Generates a new schedule.
+
+        Args:
+            cue_types (dict): See build_trial_set().
+            trials_per_cue (int): Number of trials per cue, per block.
+            block_count (int): Number of (non-practice) blocks.
+            practice_count (int): Number of practice trials.
+            seed (int): Seed for the schedule's random number generator.
+            max_run (int): Maximum consecutive trials of the same type.
+
+        """
+        params = {
+            'cue_types': cue_types,
+            'trials_per_cue': trials_per_cue,
+            'block_count': block_count,
+            'practice_count': practice_count,
+            'seed': seed,
+            'max_run': max_run,
+        }
+
+        rng = Random(seed)
+        trial_set = build_trial_set(cue_types, trials_per_cue)
+        blocks = [
+            constrained_order(trial_set, rng, max_run) for _ in range(block_count)
+        ]
+        practice = rng.sample(trial_set, practice_count)
+
+        return cls(blocks, practice, params)
+
+    @classmethod
+    def load_or_generate(cls, cache_dir, p_id, **params):
+        """Loads a participant's cached schedule, generating (and caching) it if needed.
+
+        A cached schedule is only reused if it was generated with the same params.
+
+        """
+        path = os.path.join(cache_dir, f'{p_id}_seed{params["seed"]}.json')
+
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                cached = json.load(file)
+            if cached['params'] == json.loads(json.dumps(params)):
+                return cls(
+                    [[tuple(t) for t in block] for block in cached['blocks']],
+                    [tuple(t) for t in cached['practice']],
+                    cached['params'],
+                )
+
+        schedule = cls.generate(**params)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, 'w') as file:
+            json.dump(
+                {
+                    'params': schedule.params,
+                    'blocks': schedule.blocks,
+                    'practice': schedule.practice,
+                },
+                file,
+            )
+
+        return schedule
+
+    def queues(self):
+        """Returns a TrialQueue per block, in order, seeded for recycling."""
+        seed = self.params['seed']
+        return [
+            TrialQueue(block, Random(f'{seed}-{i}'), self.params['max_run'])
+            for i, block in enumerate(self.blocks)
+        ]
+
+    def practice_queue(self):
+        """Returns a TrialQueue of practice trials."""
+        return TrialQueue(self.practice, Random(f'{self.params["seed"]}-practice'))
@@ -4,8 +4,8 @@ __author__ = 'Brett Feltmate'
 
 
 import os
-from copy import deepcopy
-from random import shuffle, sample
+import time
+from random import shuffle
 
 import klibs
 from klibs import P
@@ -25,8 +25,18 @@ from klibs.KLUtilities import smart_sleep
 
 from klibs.KLExceptions import TrialException
 
+from telemetry import Telemetry
+from trial_schedule import TrialSchedule
+
 # NOTE: On PC this is case sensitive (first O is a big O)
 from Optitracker.optitracker.OptiTracker import Optitracker  # type: ignore
+from Optitracker.optitracker.RecordingSinks import (  # type: ignore
+    ArchiveSink,
+    CSVSink,
+    SQLiteSink,
+    StreamSink,
+)
+from Optitracker.optitracker.ScreenCalibration import ScreenCalibration  # type: ignore
 
 BLACK = (0, 0, 0, 255)
 ORANGE = (255, 165, 0, 255)
@@ -39,6 +49,7 @@ CENTER = 'center'
 EARLY_START = 'early_start'
 EARLY_STOP = 'early_stop'
 MOVEMENT_TIMEOUT = 'movement_timeout'
+TRACKING_LOST = 'tracking_lost'
 PRACTICE = 'triangle'
 
 
@@ -49,8 +60,38 @@ class symbolic_cues_2025(klibs.Experiment):
             EARLY_START: 'Wait for go-signal before reaching!',
             MOVEMENT_TIMEOUT: 'Timed out! Please move faster!',
             EARLY_STOP: 'Do not pause whilst reaching!',
+            TRACKING_LOST: 'Tracking was lost! Please wait for the next trial.',
         }
 
+        # aborted trials that are run again later (their opti data are never stored)
+        self.recycled_behaviours = [EARLY_START, TRACKING_LOST]
+
+        # trajectories are kept in the klibs database, a per-participant archive or stream, or per-trial csv files
+        if not os.path.exists('OptiData'):
+            os.mkdir('OptiData')
+
+        self.opti_path = f'OptiData/{P.p_id}'
+
+        if P.opti_storage == 'sqlite':  # type: ignore[attr-defined]
+            opti_sink = SQLiteSink(database_path=P.database_path)
+        elif P.opti_storage == 'archive':  # type: ignore[attr-defined]
+            if os.path.exists(self.opti_path + '.zip'):
+                raise RuntimeError(
+                    f'Participant ID {P.p_id} already exists!\nYou likely ran `klibs hard-reset`, but did not re/move existing optidata.'
+                )
+            opti_sink = ArchiveSink(path=self.opti_path + '.zip')
+        elif P.opti_storage == 'stream':  # type: ignore[attr-defined]
+            if os.path.exists(self.opti_path + '.otrj'):
+                raise RuntimeError(
+                    f'Participant ID {P.p_id} already exists!\nYou likely ran `klibs hard-reset`, but did not re/move existing optidata.'
+                )
+            opti_sink = StreamSink(
+                path=self.opti_path + '.otrj',
+                quantum=P.opti_stream_quantum,  # type: ignore[attr-defined]
+            )
+        else:
+            opti_sink = CSVSink()
+
         # init optitracker
         self.opti = Optitracker(
             marker_count=10,
@@ -59,19 +100,19 @@ class symbolic_cues_2025(klibs.Experiment):
             primary_axis=P.primary_axis,  # type: ignore
             use_mouse=P.condition == 'mouse',  # type: ignore
             display_ppi=int(P.ppi),  # type: ignore
+            sink=opti_sink,
+            acquisition_process=(
+                P.opti_acquisition_process and P.condition != 'mouse'  # type: ignore
+            ),
         )
 
-        if not os.path.exists('OptiData'):
-            os.mkdir('OptiData')
-
-        self.opti_path = f'OptiData/{P.p_id}'
-
-        if os.path.exists(self.opti_path):
-            raise RuntimeError(
-                f'Participant ID {P.p_id} already exists!\nYou likely ran `klibs hard-reset`, but did not re/move existing optidata.'
-            )
+        if P.opti_storage == 'csv':  # type: ignore[attr-defined]
+            if os.path.exists(self.opti_path):
+                raise RuntimeError(
+                    f'Participant ID {P.p_id} already exists!\nYou likely ran `klibs hard-reset`, but did not re/move existing optidata.'
+                )
 
-        os.mkdir(self.opti_path)
+            os.mkdir(self.opti_path)
 
         # get base unit for sizings & positionings
         self.px_cm = P.ppi // 2.54
@@ -134,6 +175,27 @@ class symbolic_cues_2025(klibs.Experiment):
             ]
         )
 
+        # where tracker is calibrated to screen, it times target touches too
+        self.touch_set = P.opti_fingertip_set or None  # type: ignore[attr-defined]
+        calibration = None
+
+        if P.condition != 'mouse':  # type: ignore[attr-defined]
+            if self.touch_set is not None:
+                self.opti.track(self.touch_set, marker_count=1)
+
+            calibration = ScreenCalibration.cached(P.opti_calibration_dir)  # type: ignore[attr-defined]
+            if calibration is None and P.opti_calibrate_screen:  # type: ignore[attr-defined]
+                calibration = self.calibrate_screen()
+
+        self.tracker_touches = calibration is not None
+        if self.tracker_touches:
+            self.opti.watch(
+                self.bounds,
+                calibration,
+                marker_set=self.touch_set,
+                labels=[LEFT, RIGHT],
+            )
+
         if P.development_mode:
             self.cursor = kld.Annulus(
                 diameter=self.px_cm * P.circ_size,  # type: ignore
@@ -141,6 +203,11 @@ class symbolic_cues_2025(klibs.Experiment):
                 fill=ORANGE,
             )
 
+            # per-iteration trial loop state; summarized periodically, logged per trial
+            self.telemetry = Telemetry()
+            self.telemetry_path = f'TelemetryData/{P.p_id}'
+            os.makedirs(self.telemetry_path, exist_ok=True)
+
         # randomize image names before associating with cue types
         cue_image_names = ['bowtie', 'laos', 'legoman', 'barbell']
         shuffle(cue_image_names)
@@ -161,11 +228,18 @@ class symbolic_cues_2025(klibs.Experiment):
 
         self.db.insert(data=cue_map, table='cues')  # type: ignore
 
-        self.block_list = []
-        for _ in range(P.blocks_per_experiment):
-            trial_list = deepcopy(P.trial_list)  # type: ignore[attr-defined]
-            shuffle(trial_list)
-            self.block_list.append(trial_list)
+        # session schedule is generated once per participant & seed, then cached
+        self.schedule = TrialSchedule.load_or_generate(
+            'ScheduleData',
+            P.p_id,
+            cue_types=P.cue_types,  # type: ignore[attr-defined]
+            trials_per_cue=P.trials_per_cue,  # type: ignore[attr-defined]
+            block_count=P.blocks_per_experiment,
+            practice_count=P.trials_per_practice_block,  # type: ignore[attr-defined]
+            seed=P.random_seed,
+            max_run=P.max_trial_run,  # type: ignore[attr-defined]
+        )
+        self.block_list = self.schedule.queues()
 
         self.instructions = {
             'task': (
@@ -193,17 +267,20 @@ class symbolic_cues_2025(klibs.Experiment):
                 content='ExpAssets/Resources/image/triangle.jpg',
                 width=int(P.image_width * self.px_cm),  # type: ignore
             )
-            self.practice_trial_list = sample(self.block_list[0], P.trials_per_practice_block)  # type: ignore[attr-defined]
+            self.practice_trial_list = self.schedule.practice_queue()
             self.insert_practice_block(
                 block_nums=[1], trial_counts=P.trials_per_practice_block  # type: ignore[attr-defined]
             )
 
+        # pre-composite static display layers, so each redraw needs only a single blit
+        self.build_layers()
+
     def block(self):
         self.block_path = f'/Block_{P.block_number}'
         if P.practicing:
             self.trial_list = self.practice_trial_list
         else:
-            self.trial_list = self.block_list.pop()
+            self.trial_list = self.block_list.pop(0)
 
         fill()
 
@@ -243,19 +320,33 @@ class symbolic_cues_2025(klibs.Experiment):
         else:
             self.target_side = RIGHT if self.cue_validity else LEFT
 
-        self.trial_path = f'_Trial_{P.trial_number}_{self.cue_reliability}_{self.cue_laterality}_{self.cue_validity}'
+        if P.opti_storage in ['sqlite', 'archive', 'stream']:  # type: ignore[attr-defined]
+            self.opti.sink.key = {
+                'participant_id': P.participant_id,
+                'block_num': P.block_number,
+                'trial_num': P.trial_number,
+                'practicing': P.practicing,
+                'cue_reliability': self.cue_reliability,
+                'cue_laterality': self.cue_laterality,
+                'cue_validity': self.cue_validity,
+            }
+        else:
+            self.trial_path = f'_Trial_{P.trial_number}_{self.cue_reliability}_{self.cue_laterality}_{self.cue_validity}'
 
-        if P.practicing:
-            self.trial_path += '_PRACTICE'
+            if P.practicing:
+                self.trial_path += '_PRACTICE'
 
-        self.trial_path += '.csv'
+            self.trial_path += '.csv'
 
-        self.opti.data_dir = self.opti_path + self.block_path + self.trial_path
+            self.opti.data_dir = (
+                self.opti_path + self.block_path + self.trial_path
+            )
 
         self.draw_display(phase='pre_trial')
 
         # trial started by touching start position
         at_start = False
+        ready = None
         while not at_start:
             q = pump()
             ui_request(queue=q)
@@ -266,15 +357,18 @@ class symbolic_cues_2025(klibs.Experiment):
                 # if mouse ins at start position, set at_start to True
                 for lift_off in lift_offs:
                     if self.bounds.within_boundary(START, lift_off):
-                        self.opti.start_listening()
+                        # ready once enough frames are buffered to measure velocity
+                        ready = self.opti.start_listening(
+                            ready_frames=self.opti.window_size
+                        )
                         at_start = True
                         break
 
-        # Ensure opti is listening
-        if not self.opti.is_listening():
+        # Ensure opti is listening, and trial starts as soon as (never before) data exist
+        if not ready:
             raise RuntimeError('Failed to connect to OptiTrack system')
-        else:
-            smart_sleep(60)
+        if not ready.wait(timeout=P.opti_ready_timeout / 1000):  # type: ignore[attr-defined]
+            raise RuntimeError('No frames received from OptiTrack system')
 
     def trial(self):  # type: ignore[override]
         # control flags
@@ -289,14 +383,44 @@ class symbolic_cues_2025(klibs.Experiment):
         item_touched = None
         reaction_time = None
         movement_time = None
+        touched_at = None  # perf_counter() when screen reported the touch
+
+        # render state; display is only redrawn when what's visible changes
+        rendered_phase = None
+        rendered_cursor = None
+
+        # decisions are paced by tracker frames, allowing for brief stalls in the stream
+        frame_timeout = 2.0 / self.opti.sample_rate
+
+        if P.development_mode:
+            self.telemetry.reset(label=f'Trial {P.trial_number}')
+
+        # pre-cue drift is measured from here
+        self.opti.mark()
 
         # Proceed through trial until successful or erroneous behaviour
         while not bad_behaviour and item_touched is None:
 
             _ = ui_request()
 
-            # draw display for current phase
-            self.draw_display(phase=trial_phase)
+            # render step: flip() blocks on vsync, so only redraw on a change
+            if trial_phase != rendered_phase or (
+                P.development_mode and mouse_pos() != rendered_cursor
+            ):
+                self.draw_display(phase=trial_phase)
+                rendered_phase = trial_phase
+                rendered_cursor = mouse_pos()
+
+            # decision step: evaluate once per new tracker frame
+            self.opti.wait_for_frame(timeout=frame_timeout)
+
+            # a stalled stream would spoil the trial's data, so give up on it
+            if (
+                self.opti.health()['since_last_frame'] * 1000
+                > P.opti_max_frame_gap  # type: ignore[attr-defined]
+            ):
+                bad_behaviour = TRACKING_LOST
+                continue
 
             # state variables
             t_now = self.evm.trial_time_ms
@@ -304,12 +428,8 @@ class symbolic_cues_2025(klibs.Experiment):
             velocity = self.opti.velocity(axis='all')
 
             if P.development_mode:
-                print(f'\n\t   Trial: {P.trial_number}')
-                print(f'\n\t   Phase: {trial_phase}')
-                print(f'\n\tPosition: {cursor}')
-                print(f'\n\t    Time: {int(t_now)} ms')
-                print(f'\n\tVelocity: {int(velocity)} px/s')
-                print(f'\n\t   Error: {bad_behaviour}')
+                self.telemetry.record(t_now, trial_phase, cursor, velocity)
+                self.telemetry.emit()  # rate-limited
             #
             # Determine what should happen on next redraw
             #
@@ -317,14 +437,12 @@ class symbolic_cues_2025(klibs.Experiment):
             # Prior to go-signal: abort if moving
             if trial_phase == 'pre_cue':
 
-                # monitoring velocity proved to be fussy at this stage
-                travel = self.opti.distance(
-                    num_frames=t_now // 120, axis='all'
-                )
+                # monitoring velocity proved to be fussy at this stage; net
+                # displacement from the start position (kept as frames arrive, so
+                # this check is O(1)) ignores the jitter path length would accumulate
+                drift = self.opti.displacement(axis='all')
 
-                if (
-                    travel > 10
-                ):  # fail if hand drifts 50+ mm prior to cue onset
+                if drift > 10:  # fail if hand drifts 10+ mm prior to cue onset
                     bad_behaviour = EARLY_START
                 else:
                     if t_now >= P.cue_onset:  # type: ignore
@@ -354,8 +472,25 @@ class symbolic_cues_2025(klibs.Experiment):
                     which_bound = self.bounds.which_boundary(cursor)
                     if which_bound in [LEFT, RIGHT]:
                         item_touched = which_bound
+                        touched_at = time.perf_counter()
                         movement_time = t_now - movement_start  # type: ignore
 
+        if self.opti.is_listening():
+            self.opti.stop_listening()
+
+        if P.development_mode:
+            self.telemetry.emit(force=True)
+            print(f'\t   Error: {bad_behaviour}')
+            self.telemetry.dump(
+                f'{self.telemetry_path}/Block_{P.block_number}_Trial_{P.trial_number}.csv'
+            )
+
+        # Store trial's opti data, unless the trial will be recycled
+        if bad_behaviour in self.recycled_behaviours:
+            self.opti.discard()
+        else:
+            self.opti.commit()
+
         if bad_behaviour:
 
             fill()
@@ -390,41 +525,20 @@ class symbolic_cues_2025(klibs.Experiment):
                 if item_touched is not None
                 else 'NA',
                 'reason': bad_behaviour,
-                'recycled': bad_behaviour
-                == EARLY_START,  # only recycle early-starts
+                'recycled': bad_behaviour in self.recycled_behaviours,
             }
 
             self.db.insert(data=abort_info, table='aborts')  # type: ignore
 
-            # for early starts, toss opti data and recycle trial
-            if bad_behaviour == EARLY_START:
-                # Ensure OptiTracker has stopped listening before removing the file
-                if self.opti.is_listening():
-                    self.opti.stop_listening()
-
-                # Sometimes this is called whilst file is being written
-                max_attempts = 3
-                for attempt in range(max_attempts):
-                    try:
-                        if os.path.exists(self.opti.data_dir):
-                            os.remove(self.opti.data_dir)
-                        break  # Successfully removed or file doesn't exist
-                    except (PermissionError, OSError) as e:
-                        if attempt == max_attempts - 1:  # Last attempt
-                            print(
-                                f'Warning: Could not remove file {self.opti.data_dir}: {e}'
-                            )
-                        else:
-                            smart_sleep(50)  # Give writer time to finish
-
-                self.trial_list.append(
+            # for early starts & lost tracking, recycle trial (opti data were never stored)
+            if bad_behaviour in self.recycled_behaviours:
+                self.trial_list.recycle(
                     (
                         self.cue_reliability,
                         self.cue_laterality,
                         self.cue_validity,
                     )
                 )
-                shuffle(self.trial_list)
 
                 raise TrialException(bad_behaviour)
 
@@ -444,8 +558,82 @@ class symbolic_cues_2025(klibs.Experiment):
             'touched_target': item_touched == self.target_side
             if item_touched is not None
             else 'NA',
+            # per-trial kinematics, accumulated by opti as frames arrived
+            **self.opti.features(),
+            # measured frame rate, drops & latency of the tracker stream
+            **self.opti.stream_stats(),
+            **self.touch_timing(touched_at),
         }
 
+    def touch_timing(self, touched_at):
+        # target touched according to tracker, and how long before the screen said so
+        timing = {'tracker_touch': 'NA', 'touch_lag': 'NA'}
+
+        if self.tracker_touches:
+            touch = self.opti.touch(self.touch_set)
+            if touch is not None:
+                timing['tracker_touch'] = touch['label']
+                if touched_at is not None:
+                    timing['touch_lag'] = (touched_at - touch['received']) * 1000
+
+        return timing
+
+    def calibrate_screen(self):
+        # record fingertip at known screen locations, then fit tracker-to-screen mapping
+        fill()
+        message(
+            'Screen calibration: touch the centre of each circle as it appears.\n\n'
+            'Press any key to begin.',
+            location=P.screen_c,
+            registration=5,
+            blit_txt=True,
+        )
+        flip()
+        any_key()
+
+        screen_points = [
+            (int(P.screen_x * x), int(P.screen_y * y))  # type: ignore
+            for y in [0.1, 0.5, 0.9]
+            for x in [0.1, 0.5, 0.9]
+        ]
+        radius = P.circ_size * self.px_cm / 2  # type: ignore
+        tracker_points = []
+
+        if not self.opti.start_listening(record=False).wait(
+            timeout=P.opti_ready_timeout / 1000  # type: ignore[attr-defined]
+        ):
+            raise RuntimeError('No frames received from OptiTrack system')
+
+        for point in screen_points:
+            fill()
+            blit(self.placeholder, registration=5, location=point)
+            flip()
+
+            touched = False
+            while not touched:
+                q = pump()
+                ui_request(queue=q)
+
+                for click in get_clicks(queue=q):
+                    if (click[0] - point[0]) ** 2 + (click[1] - point[1]) ** 2 <= radius**2:
+                        position = self.opti.position(marker_set=self.touch_set)
+                        tracker_points.append(
+                            [position[col].item() for col in ['pos_x', 'pos_y', 'pos_z']]
+                        )
+                        touched = True
+                        break
+
+        self.opti.stop_listening()
+        self.opti.discard()
+
+        calibration = ScreenCalibration.fit(
+            tracker_points, screen_points, model=P.opti_calibration_model  # type: ignore
+        )
+        calibration.cache(P.opti_calibration_dir)  # type: ignore[attr-defined]
+        print(f'\tScreen calibration error: {calibration.error:.1f} px')
+
+        return calibration
+
     def trial_clean_up(self):
         mouse_pos(position=[0, 0])
         clear()
@@ -455,45 +643,92 @@ class symbolic_cues_2025(klibs.Experiment):
         smart_sleep(P.inter_trial_interval)  # type: ignore[attr-defined]
 
     def clean_up(self):
-        pass
+        self.opti.close()
+        if isinstance(self.opti.sink, (SQLiteSink, StreamSink)):
+            self.opti.sink.close()
+
+    def build_layers(self) -> None:
+        # layers only span stimuli, so blits stay cheap & layers light on memory
+        cues = [
+            ((reliability, laterality), self.cue_stims[reliability][laterality])
+            for reliability in [HIGH, LOW]
+            for laterality in [RIGHT, LEFT]
+        ]
+        if PRACTICE in self.cue_stims:
+            cues.append((PRACTICE, self.cue_stims[PRACTICE]))
+
+        extent = max(
+            self.px_cm * P.circ_size,  # type: ignore
+            self.px_cm * P.fix_size,  # type: ignore
+            *[max(cue.width, cue.height) for _, cue in cues],
+        ) / 2 + self.px_cm * P.line_width  # type: ignore
+
+        x_coords = [loc[0] for loc in self.locs.values()]
+        y_coords = [loc[1] for loc in self.locs.values()]
+        left = int(max(0, min(x_coords) - extent))
+        top = int(max(0, min(y_coords) - extent))
+        right = int(min(P.screen_x, max(x_coords) + extent))  # type: ignore
+        bottom = int(min(P.screen_y, max(y_coords) + extent))  # type: ignore
+
+        self.layer_origin = (left, top)
+
+        def composite(*stims):
+            canvas = kln.NumpySurface(
+                width=right - left,
+                height=bottom - top,
+                fill=P.default_fill_color,
+            )
+            for stim, loc in stims:
+                canvas.blit(
+                    stim,
+                    registration=5,
+                    location=(loc[0] - left, loc[1] - top),
+                )
+            return canvas.render()
+
+        placeholders = [
+            (self.placeholder, self.locs[LEFT]),
+            (self.placeholder, self.locs[RIGHT]),
+            (self.placeholder, self.locs[START]),
+        ]
+        fixation = (self.fix, self.locs[CENTER])
+
+        # keyed by (phase, cue, target side); None where phase doesn't depend on it
+        self.layers = {
+            ('pre_trial', None, None): composite(*placeholders),
+            ('pre_cue', None, None): composite(*placeholders, fixation),
+        }
+        for cue_key, cue in cues:
+            self.layers[('pre_target', cue_key, None)] = composite(
+                *placeholders, fixation, (cue, self.locs[CENTER])
+            )
+            for side in [LEFT, RIGHT]:
+                self.layers[('responding', cue_key, side)] = composite(
+                    *placeholders,
+                    (cue, self.locs[CENTER]),
+                    (self.target, self.locs[side]),
+                )
 
     def draw_display(self, phase: str, msg: str = '') -> None:
         fill()
 
-        blit(self.placeholder, location=self.locs[LEFT], registration=5)
-        blit(self.placeholder, location=self.locs[RIGHT], registration=5)
-        blit(self.placeholder, location=self.locs[START], registration=5)
-
-        if msg:
-            message(msg, location=P.screen_c, registration=5, blit_txt=True)
-
-        if phase == 'pre_cue' or phase == 'pre_target':
-            blit(self.fix, location=self.locs[CENTER], registration=5)
-
-        cue = (
-            self.cue_stims[self.cue_reliability][self.cue_laterality]
+        cue_key = (
+            (self.cue_reliability, self.cue_laterality)
             if not P.practicing
-            else self.cue_stims[PRACTICE]
+            else PRACTICE
         )
 
         if phase == 'pre_target':
-            blit(
-                cue,
-                location=self.locs[CENTER],
-                registration=5,
-            )
+            layer_key = (phase, cue_key, None)
+        elif phase == 'responding':
+            layer_key = (phase, cue_key, self.target_side)
+        else:
+            layer_key = (phase, None, None)
 
-        if phase == 'responding':
-            blit(
-                cue,
-                location=self.locs[CENTER],
-                registration=5,
-            )
-            blit(
-                self.target,
-                location=self.locs[self.target_side],
-                registration=5,
-            )
+        blit(self.layers[layer_key], location=self.layer_origin, registration=7)
+
+        if msg:
+            message(msg, location=P.screen_c, registration=5, blit_txt=True)
 
         # draw cursor when debugging
         if P.development_mode: